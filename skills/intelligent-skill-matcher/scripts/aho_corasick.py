@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Aho-Corasick 多模式匹配自动机
+对全部关键词和触发词一次性建树，命令文本只需单遍扫描即可找出所有命中的模式，
+匹配耗时取决于命令长度而不是词表规模
+"""
+
+from array import array
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+class AhoCorasick:
+    """Aho-Corasick 自动机"""
+
+    def __init__(self, patterns: List[str]):
+        """
+        Args:
+            patterns: 模式列表，模式ID即其在列表中的下标；空模式会被忽略
+        """
+        self.patterns = list(patterns)
+
+        # 状态0为根；goto[状态][字符] -> 下一状态
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # 每个状态结束的全部模式ID（已合并失败链上的输出）
+        self.output: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if pattern:
+                self._add_pattern(pattern, pattern_id)
+        self._build_fail_links()
+
+    def _add_pattern(self, pattern: str, pattern_id: int):
+        """把模式加入字典树"""
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            state = next_state
+        self.output[state].append(pattern_id)
+
+    def _build_fail_links(self):
+        """按广度优先计算失败指针并合并输出"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fail_state = self.fail[state]
+                while fail_state and char not in self.goto[fail_state]:
+                    fail_state = self.fail[fail_state]
+                target = self.goto[fail_state].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+
+                if self.output[self.fail[next_state]]:
+                    self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        单遍扫描文本
+
+        Yields:
+            (结束位置, 模式ID)，同一模式多次出现时会多次返回
+        """
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in output[state]:
+                yield position, pattern_id
+
+    def find_all(self, text: str) -> Set[int]:
+        """返回文本中出现过的全部模式ID（去重）"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+class CompactAhoCorasick:
+    """
+    紧凑存储的 Aho-Corasick 自动机，匹配结果与 AhoCorasick 相同
+
+    状态按广度优先编号，同一状态的子状态编号连续：各状态的出边字符依次拼成一个字符串，
+    第i条出边指向状态 i+1，edge_ptr[s]:edge_ptr[s+1] 为状态s的出边（字符有序）；
+    失败指针和合并后的输出同样存入 array('I')，不再为每个状态保存dict和list。
+    根状态的出边最多，单独用dict查找
+    """
+
+    def __init__(self, patterns: List[str]):
+        """
+        Args:
+            patterns: 模式列表，模式ID即其在列表中的下标；空模式会被忽略
+        """
+        self.patterns = list(patterns)
+        # 排序后字典树的每个状态对应一段连续区间，区间内先是恰好到该状态结束的模式
+        ordered = sorted((pattern, pattern_id) for pattern_id, pattern in enumerate(self.patterns) if pattern)
+
+        edge_chars: List[str] = []
+        self.edge_ptr = array('I', [0])
+        self.fail = array('I', [0])
+        self.output_ptr = array('I', [0, 0])
+        self.output_ids = array('I')
+        self.root: Dict[str, int] = {}
+
+        # (状态, 区间起点, 区间终点, 深度)，按广度优先处理
+        queue = deque([(0, 0, len(ordered), 0)])
+        while queue:
+            state, low, high, depth = queue.popleft()
+            while low < high and len(ordered[low][0]) == depth:
+                low += 1
+            while low < high:
+                char = ordered[low][0][depth]
+                end = low + 1
+                while end < high and ordered[end][0][depth] == char:
+                    end += 1
+                edge_chars.append(char)
+                child = len(edge_chars)
+
+                if state == 0:
+                    self.root[char] = child
+                    fail_target = 0
+                else:
+                    # 失败指针指向更浅的状态，其出边此时都已确定
+                    fail_state = self.fail[state]
+                    while True:
+                        fail_target = self._next_in(edge_chars, fail_state, char)
+                        if fail_target is not None or not fail_state:
+                            break
+                        fail_state = self.fail[fail_state]
+                    fail_target = fail_target or 0
+                self.fail.append(fail_target)
+
+                own_end = low
+                while own_end < end and len(ordered[own_end][0]) == depth + 1:
+                    own_end += 1
+                self.output_ids.extend(pattern_id for _, pattern_id in ordered[low:own_end])
+                self.output_ids.extend(self.output_ids[self.output_ptr[fail_target]:self.output_ptr[fail_target + 1]])
+                self.output_ptr.append(len(self.output_ids))
+
+                queue.append((child, low, end, depth + 1))
+                low = end
+            self.edge_ptr.append(len(edge_chars))
+
+        self.edge_chars = "".join(edge_chars)
+
+    def _next_in(self, edge_chars, state: int, char: str) -> Optional[int]:
+        """构建期间查找状态的出边（edge_chars 为出边字符列表）"""
+        if state == 0:
+            return self.root.get(char)
+        start, end = self.edge_ptr[state], self.edge_ptr[state + 1]
+        try:
+            return edge_chars.index(char, start, end) + 1
+        except ValueError:
+            return None
+
+    def _step(self, state: int, char: str) -> int:
+        """读入一个字符后的状态"""
+        edge_ptr, edge_chars, fail = self.edge_ptr, self.edge_chars, self.fail
+        while state:
+            position = edge_chars.find(char, edge_ptr[state], edge_ptr[state + 1])
+            if position >= 0:
+                return position + 1
+            state = fail[state]
+        return self.root.get(char, 0)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        单遍扫描文本
+
+        Yields:
+            (结束位置, 模式ID)，同一模式多次出现时会多次返回
+        """
+        output_ptr, output_ids = self.output_ptr, self.output_ids
+        state = 0
+        for position, char in enumerate(text):
+            state = self._step(state, char)
+            for pattern_id in output_ids[output_ptr[state]:output_ptr[state + 1]]:
+                yield position, pattern_id
+
+    def find_all(self, text: str) -> Set[int]:
+        """返回文本中出现过的全部模式ID（去重）"""
+        edge_ptr, edge_chars, fail, root = self.edge_ptr, self.edge_chars, self.fail, self.root
+        output_ptr, output_ids = self.output_ptr, self.output_ids
+        found = set()
+        state = 0
+        for char in text:
+            while state:
+                position = edge_chars.find(char, edge_ptr[state], edge_ptr[state + 1])
+                if position >= 0:
+                    state = position + 1
+                    break
+                state = fail[state]
+            else:
+                state = root.get(char, 0)
+            start, end = output_ptr[state], output_ptr[state + 1]
+            if start != end:
+                found.update(output_ids[start:end])
+        return found
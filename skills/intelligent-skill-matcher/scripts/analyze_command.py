@@ -4,16 +4,31 @@
 分析用户命令并匹配最适合的技能
 """
 
+import heapq
 import json
-import re
 import os
 import sys
-from typing import List, Dict, Tuple
+from typing import List, Dict, Optional, Set, Tuple
 
-# 添加当前目录到Python路径
+# 添加当前目录到Python路径（直接运行脚本时已在路径中，不重复添加）
 current_dir = os.path.dirname(os.path.abspath(__file__))
-sys.path.append(current_dir)
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
 
+# 各评分模式、拼写容错、缓存和编译产物相关的模块都在用到时才导入，单条命令的冷启动只加载默认路径所需模块
+from skill_terms import (CHINESE_CHAR_PATTERN, SPECIAL_KEYWORDS, extract_keywords, extract_skill_terms,
+                         extract_triggers, normalize_score)
+from skill_index import SkillIndex, get_skill_index
+import matcher_metrics
+from matcher_metrics import instrumented
+
+# 评分模式：weighted 为原有的固定权重评分，bm25 为BM25/TF-IDF排序，
+# ngram 为中文n-gram倒排索引评分，lsh 为MinHash/LSH剪枝后逐技能评分，
+# maxscore 为固定权重评分的MaxScore前k检索（结果与 weighted 完全一致），
+# sharded 为按技能分片、多进程并行的固定权重评分（结果与 weighted 完全一致）
+MATCH_MODES = ('weighted', 'bm25', 'ngram', 'lsh', 'maxscore', 'sharded')
+
+@instrumented('load_available_skills')
 def load_available_skills():
     """加载可用技能 - 简化版本用于测试"""
     # 这里使用简化版本，实际使用时会调用load_skills.py
@@ -66,54 +81,376 @@ def load_available_skills():
     ]
     return skills
 
-def analyze_user_command(command: str) -> Dict:
+def analyze_user_command(command: str, index: Optional[SkillIndex] = None,
+                         mode: str = 'weighted', cache=None, fuzzy: bool = False,
+                         debug: bool = False, ngram_weights: Optional[Dict[int, float]] = None,
+                         lsh_recall: Optional[float] = None, lsh_rows: Optional[int] = None) -> Dict:
     """
     分析用户命令并返回匹配的技能建议
     
     Args:
         command: 用户输入的命令文本
+        index: 预构建的技能索引（如 matcher_model.load_matcher() 的结果），
+               缺省时基于 load_available_skills() 构建
+        mode: 评分模式，见 MATCH_MODES
+        cache: 结果缓存（result_cache.ResultCache）；以评分时看到的命令文本（小写、去掉首尾空白）为缓存键，
+               技能注册表版本或索引变化时缓存自动失效
+        fuzzy: 是否启用拼写容错（weighted 模式），技能名称和英文关键词的拼写错误按折扣权重计分
+        debug: 是否在结果的 debug 字段中附上本次调用各阶段的耗时
+        ngram_weights: ngram 模式下各长度n-gram的权重系数 {长度: 系数}，
+                       缺省为 cjk_ngram_index.DEFAULT_NGRAM_WEIGHTS；系数为0的长度不参与计分
+        lsh_recall: lsh 模式的目标召回率（越高band越多、候选越多，>=1 时全量扫描），
+                    缺省沿用该技能索引已构建的LSH索引（没有时为 lsh_index.DEFAULT_RECALL）
+        lsh_rows: lsh 模式每个band的行数，band数按召回率和行数计算，缺省同上
         
     Returns:
         包含匹配技能和置信度的字典
     """
+    if debug:
+        with matcher_metrics.collect() as timings:
+            result = analyze_user_command(command, index, mode, cache, fuzzy, ngram_weights=ngram_weights,
+                                          lsh_recall=lsh_recall, lsh_rows=lsh_rows)
+        return dict(result, debug=timings)
+    
+    if mode not in MATCH_MODES:
+        raise ValueError(f"未知的评分模式: {mode}，可选: {', '.join(MATCH_MODES)}")
+    
     # 加载可用技能
-    available_skills = load_available_skills()
+    if index is None:
+        index = get_skill_index(load_available_skills())
+    
+    if cache is not None:
+        return _analyze_cached(command, index, mode, cache, fuzzy, ngram_weights, lsh_recall, lsh_rows)
+    
+    if mode == 'bm25':
+        return _analyze_bm25(command, index)
+    if mode == 'ngram':
+        return _analyze_ngram(command, index, ngram_weights)
+    if mode == 'lsh':
+        return _analyze_lsh(command, index, lsh_recall, lsh_rows)
+    if mode == 'maxscore':
+        return _analyze_maxscore(command, index, fuzzy)
+    if mode == 'sharded':
+        return analyze_user_commands([command], index, mode=mode, fuzzy=fuzzy)[0]
     
     # 预处理命令文本
     command_lower = command.lower().strip()
     
-    # 初始化匹配结果
+    # 通过倒排索引只对命中词条的技能计分；单遍扫描得到命中词条，计分和推理说明共用
+    hit_terms = index.find_terms(command_lower)
+    raw_scores = index.scores_for_terms(hit_terms)
+    
+    fuzzy_traces = None
+    if fuzzy:
+        from fuzzy_index import get_fuzzy_index
+        fuzzy_traces = get_fuzzy_index(index).fuzzy_traces(command_lower, hit_terms)
+        for skill_id, trace in fuzzy_traces.items():
+            raw_scores[skill_id] = raw_scores.get(skill_id, 0.0) + sum(weight for _, _, weight in trace)
+    
+    return build_match_result(command, index, raw_scores, hit_terms, fuzzy_traces)
+
+def _analyze_cached(command: str, index: SkillIndex, mode: str, cache, fuzzy: bool = False,
+                    ngram_weights: Optional[Dict[int, float]] = None, lsh_recall: Optional[float] = None,
+                    lsh_rows: Optional[int] = None) -> Dict:
+    """
+    经结果缓存分析：缓存键与计分时的预处理相同，键相同的命令结果相同，
+    因此无论先后顺序，结果都与不经缓存时相同；返回时换回调用方的原始命令
+    """
+    from result_cache import normalize_command
+    from skill_registry import get_registry
+    
+    normalized = normalize_command(command)
+    version = (get_registry().version, index)
+    key = (mode, fuzzy, normalized, tuple(sorted(ngram_weights.items())) if ngram_weights else None,
+           lsh_recall, lsh_rows)
+    result = cache.get(key, version)
+    if result is None:
+        result = analyze_user_command(command, index, mode, fuzzy=fuzzy, ngram_weights=ngram_weights,
+                                      lsh_recall=lsh_recall, lsh_rows=lsh_rows)
+        cache.put(key, version, result)
+    
+    # 返回副本，调用方修改结果不影响缓存
+    return dict(result, original_command=command, matches=[dict(match) for match in result['matches']])
+
+def analyze_user_commands(commands: List[str], index: Optional[SkillIndex] = None,
+                          processes: Optional[int] = None, mode: str = 'weighted',
+                          fuzzy: bool = False, ngram_weights: Optional[Dict[int, float]] = None,
+                          lsh_recall: Optional[float] = None, lsh_rows: Optional[int] = None) -> List[Dict]:
+    """
+    批量分析用户命令
+    
+    整批命令先构成 命令×词条 稀疏矩阵，再与 词条×技能 权重矩阵相乘得到原始分数，
+    结果与逐条调用 analyze_user_command 完全一致
+    
+    Args:
+        commands: 用户命令列表
+        index: 预构建的技能索引，缺省时基于 load_available_skills() 构建
+        processes: 进程池大小；为None或1时在当前进程内计算。sharded 模式下为分片数，
+                   缺省沿用已有的分片匹配器（没有时按CPU核数）
+        mode: 评分模式；矩阵批量计算只用于 weighted 和 sharded，其余模式逐条计算
+        fuzzy: 是否启用拼写容错（逐条计算）
+        ngram_weights: ngram 模式下各长度n-gram的权重系数，见 analyze_user_command
+        lsh_recall, lsh_rows: lsh 模式的召回率和每个band的行数，见 analyze_user_command
+        
+    Returns:
+        与commands一一对应的分析结果列表
+    """
+    from batch_matcher import score_commands
+    
+    if index is None:
+        index = get_skill_index(load_available_skills())
+    
+    if mode == 'sharded':
+        return _analyze_sharded(commands, index, processes, fuzzy)
+    if mode != 'weighted' or fuzzy:
+        return [analyze_user_command(command, index, mode, fuzzy=fuzzy, ngram_weights=ngram_weights,
+                                     lsh_recall=lsh_recall, lsh_rows=lsh_rows)
+                for command in commands]
+    
+    commands_lower = [command.lower().strip() for command in commands]
+    batch_scores = score_commands(index, commands_lower, processes)
+    return [build_match_result(command, index, raw_scores)
+            for command, raw_scores in zip(commands, batch_scores)]
+
+@instrumented('build_match_result')
+def build_match_result(command: str, index: SkillIndex, raw_scores: Dict[int, float],
+                       hit_terms: Optional[Set[str]] = None,
+                       fuzzy_traces: Optional[Dict[int, List[Tuple[str, str, float]]]] = None) -> Dict:
+    """
+    根据原始分数生成分析结果
+    
+    Args:
+        command: 用户输入的命令文本
+        index: 计算原始分数所用的技能索引
+        raw_scores: 技能ID -> 原始分数
+        hit_terms: 计分时命中的词条，缺省时在需要生成推理说明时重新扫描命令
+        fuzzy_traces: 拼写容错命中的匹配轨迹（技能ID -> 轨迹），已计入raw_scores
+    """
+    command_lower = command.lower().strip()
+    has_chinese = bool(CHINESE_CHAR_PATTERN.search(command_lower))
+    top_matches = select_top_matches(raw_scores, has_chinese, exclude=index.excluded_skills(command_lower))
+    return render_top_matches(command, index, top_matches, hit_terms, fuzzy_traces)
+
+def render_top_matches(command: str, index: SkillIndex, top_matches: List[tuple],
+                       hit_terms: Optional[Set[str]] = None,
+                       fuzzy_traces: Optional[Dict[int, List[Tuple[str, str, float]]]] = None) -> Dict:
+    """
+    为选出的前k个匹配生成推理说明和分析结果
+    
+    Args:
+        top_matches: [(置信度, 技能ID)]，按置信度从高到低
+        hit_terms: 计分时命中的词条，缺省时在需要生成推理说明时重新扫描命令
+        fuzzy_traces: 拼写容错命中的匹配轨迹（技能ID -> 轨迹）
+    """
+    if top_matches and hit_terms is None:
+        hit_terms = index.find_terms(command.lower().strip())
+    
+    # 只为返回的匹配生成推理说明
     matches = []
+    for score, skill_id in top_matches:
+        skill = index.skills[skill_id]
+        trace = index.trace(skill_id, hit_terms)
+        if fuzzy_traces and skill_id in fuzzy_traces:
+            trace += fuzzy_traces[skill_id]
+        matches.append({
+            'skill_name': skill['name'],
+            'description': skill['description'],
+            'confidence': score,
+            'reasoning': render_reasoning(skill, trace)
+        })
+    
+    return {
+        'original_command': command,
+        'matches': matches,  # 前3个最佳匹配
+        'analysis_summary': generate_analysis_summary(command, matches)
+    }
+
+def select_top_matches(raw_scores: Dict[int, float], has_chinese: bool, k: int = 3,
+                       exclude: Optional[Set[int]] = None) -> List[tuple]:
+    """
+    按归一化后的置信度选出前k个匹配（同分时按技能顺序），不对全部匹配排序
+    
+    Args:
+        exclude: 命令命中其否定条款的技能ID，不参与排序
+    
+    Returns:
+        [(置信度, 技能ID)]，按置信度从高到低
+    """
+    candidates = []
+    for skill_id, raw_score in raw_scores.items():
+        if exclude and skill_id in exclude:
+            continue
+        score = normalize_score(raw_score, has_chinese)
+        if score > 0:
+            candidates.append((score, skill_id))
+    return heapq.nlargest(k, candidates, key=lambda item: (item[0], -item[1]))
+
+def _analyze_maxscore(command: str, index: SkillIndex, fuzzy: bool = False) -> Dict:
+    """MaxScore模式：与固定权重模式计分相同，上界不可能进入前3的技能不完整计分"""
+    from maxscore_index import get_maxscore_index
+    
+    command_lower = command.lower().strip()
+    hit_terms = index.find_terms(command_lower)
+    
+    fuzzy_traces = None
+    extra_scores = None
+    if fuzzy:
+        from fuzzy_index import get_fuzzy_index
+        fuzzy_traces = get_fuzzy_index(index).fuzzy_traces(command_lower, hit_terms)
+        extra_scores = {skill_id: sum(weight for _, _, weight in trace)
+                        for skill_id, trace in fuzzy_traces.items()}
+    
+    has_chinese = bool(CHINESE_CHAR_PATTERN.search(command_lower))
+    excluded = index.excluded_skills(command_lower)
+    top_matches = get_maxscore_index(index).top_k(hit_terms, has_chinese, 3, extra_scores, excluded)
+    return render_top_matches(command, index, top_matches, hit_terms, fuzzy_traces)
+
+def _analyze_sharded(commands: List[str], index: SkillIndex, shards: Optional[int] = None,
+                     fuzzy: bool = False) -> List[Dict]:
+    """分片模式：各分片工作进程并行计算本分片的前3个匹配，合并后与固定权重模式结果相同"""
+    from sharded_matcher import get_sharded_matcher
+    
+    commands_lower = [command.lower().strip() for command in commands]
+    fuzzy_traces = [None] * len(commands)
+    extra_scores = None
+    if fuzzy:
+        from fuzzy_index import get_fuzzy_index
+        fuzzy_index = get_fuzzy_index(index)
+        fuzzy_traces = [fuzzy_index.fuzzy_traces(command_lower, index.find_terms(command_lower))
+                        for command_lower in commands_lower]
+        extra_scores = [{skill_id: sum(weight for _, _, weight in trace) for skill_id, trace in traces.items()}
+                        for traces in fuzzy_traces]
+    
+    top_matches, hit_terms = get_sharded_matcher(index, shards).top_k_batch(commands_lower, 3, extra_scores)
+    return [render_top_matches(command, index, matches, terms, traces)
+            for command, matches, terms, traces in zip(commands, top_matches, hit_terms, fuzzy_traces)]
+
+def _analyze_ngram(command: str, index: SkillIndex, weights: Optional[Dict[int, float]] = None) -> Dict:
+    """中文n-gram模式：中文按n-gram倒排表计分，英文沿用原有词条"""
+    from cjk_ngram_index import get_ngram_index
+    
+    ngram_index = get_ngram_index(index, weights)
+    command_lower = command.lower().strip()
+    
+    matches = []
+    hit_terms = None
+    for skill_id, score in ngram_index.top_k(command_lower, 3, index.excluded_skills(command_lower)):
+        confidence = ngram_index.confidence(score)
+        if confidence <= 0:
+            continue
+        skill = index.skills[skill_id]
+        matched_ngrams = ngram_index.matched_ngrams(command_lower, skill_id)
+        if matched_ngrams:
+            reasoning = f"中文n-gram匹配: {', '.join(matched_ngrams[:3])}"
+        else:
+            if hit_terms is None:
+                hit_terms = index.find_terms(command_lower)
+            reasoning = render_reasoning(skill, index.trace(skill_id, hit_terms))
+        matches.append({
+            'skill_name': skill['name'],
+            'description': skill['description'],
+            'confidence': confidence,
+            'reasoning': reasoning
+        })
+    
+    return {
+        'original_command': command,
+        'matches': matches,
+        'analysis_summary': generate_analysis_summary(command, matches)
+    }
+
+def _analyze_lsh(command: str, index: SkillIndex, recall: Optional[float] = None,
+                 rows: Optional[int] = None) -> Dict:
+    """
+    LSH剪枝模式：只对候选技能计分；技能较少（不建LSH表）或候选中没有匹配时
+    改用倒排索引上的固定权重评分，结果与全量扫描相同
+    """
+    from lsh_index import get_lsh_index
+    
+    command_lower = command.lower().strip()
+    candidates = get_lsh_index(index, recall, rows).candidates(command_lower)
+    top_matches = None
+    if candidates is not None:
+        hit_terms = index.find_terms(command_lower)
+        top_matches = _score_skills(command_lower, index, candidates, hit_terms, index.excluded_skills(command_lower))
+    if not top_matches:
+        return analyze_user_command(command, index)
+    
+    return render_top_matches(command, index, top_matches, hit_terms)
+
+def _score_skills(command_lower: str, index: SkillIndex, skill_ids, hit_terms: Set[str],
+                  exclude: Optional[Set[int]] = None, k: int = 3) -> List[tuple]:
+    """
+    计算指定技能的匹配分数，返回前k个 [(置信度, 技能ID)]
     
-    # 为每个可用技能计算匹配分数
-    for skill in available_skills:
-        score = calculate_match_score(command_lower, skill)
+    只沿命中词条（hit_terms，find_terms 的结果）的倒排表累计候选技能的分数（与 calculate_match_score 的结果相同），
+    不逐个技能重新提取关键词；exclude 中的技能（命中否定条款）直接跳过
+    """
+    candidates = set(skill_ids)
+    if exclude:
+        candidates -= exclude
+    raw_scores: Dict[int, float] = {}
+    for skill_id, weight in index.always_postings:
+        if skill_id in candidates:
+            raw_scores[skill_id] = raw_scores.get(skill_id, 0.0) + weight
+    for term in hit_terms:
+        for skill_id, weight in index.postings[term]:
+            if skill_id in candidates:
+                raw_scores[skill_id] = raw_scores.get(skill_id, 0.0) + weight
+    
+    has_chinese = bool(CHINESE_CHAR_PATTERN.search(command_lower))
+    scored = []
+    for skill_id, raw_score in raw_scores.items():
+        score = normalize_score(raw_score, has_chinese)
         if score > 0:
-            matches.append({
-                'skill_name': skill['name'],
-                'description': skill['description'],
-                'confidence': score,
-                'reasoning': get_match_reasoning(command_lower, skill)
-            })
+            scored.append((score, skill_id))
+    return heapq.nlargest(k, scored, key=lambda item: (item[0], -item[1]))
+
+def _analyze_bm25(command: str, index: SkillIndex) -> Dict:
+    """BM25排序模式：返回结构与固定权重模式相同"""
+    from bm25_ranker import get_bm25_index
     
-    # 按置信度排序
-    matches.sort(key=lambda x: x['confidence'], reverse=True)
+    bm25 = get_bm25_index(index)
+    command_lower = command.lower().strip()
+    
+    matches = []
+    for skill_id, score in bm25.top_k(command_lower, 3, index.excluded_skills(command_lower)):
+        confidence = bm25.confidence(score)
+        if confidence <= 0:
+            continue
+        skill = index.skills[skill_id]
+        matched_terms = bm25.matched_terms(command_lower, skill_id)
+        matches.append({
+            'skill_name': skill['name'],
+            'description': skill['description'],
+            'confidence': confidence,
+            'reasoning': f"BM25匹配词项: {', '.join(matched_terms[:3])}"
+        })
     
     return {
         'original_command': command,
-        'matches': matches[:3],  # 返回前3个最佳匹配
+        'matches': matches,
         'analysis_summary': generate_analysis_summary(command, matches)
     }
 
-def calculate_match_score(command: str, skill: Dict) -> float:
-    """计算命令与技能的匹配分数"""
+@instrumented('calculate_match_score')
+def calculate_match_score(command: str, skill: Dict, index: Optional[SkillIndex] = None) -> float:
+    """
+    计算命令与技能的匹配分数
+    
+    Args:
+        command: 已小写化的命令文本
+        skill: 技能信息
+        index: 预构建的倒排索引；提供时直接查询索引，否则逐项提取关键词计分
+    """
+    has_chinese = bool(CHINESE_CHAR_PATTERN.search(command))
+    if index is not None:
+        return normalize_score(index.raw_score(command, skill), has_chinese)
+    
     score = 0.0
     description = skill['description'].lower()
     name = skill['name'].lower()
     
-    # 检测是否为中文命令
-    has_chinese = bool(re.search(r'[\u4e00-\u9fff]', command))
-    
     # 基于技能名称的直接匹配（高权重）
     if name in command:
         score += 5.0
@@ -122,7 +459,7 @@ def calculate_match_score(command: str, skill: Dict) -> float:
     keywords = extract_keywords(description)
     for keyword in keywords:
         if len(keyword) > 1 and keyword in command:  # 降低最小长度要求
-            if re.search(r'[\u4e00-\u9fff]', keyword):  # 中文关键词
+            if CHINESE_CHAR_PATTERN.search(keyword):  # 中文关键词
                 score += 3.0 if has_chinese else 2.0
             else:  # 英文关键词
                 score += 2.0
@@ -134,136 +471,62 @@ def calculate_match_score(command: str, skill: Dict) -> float:
             score += 3.0
     
     # 特定技能的特殊关键词匹配（增强中文支持）
-    special_keywords = {
-        'github': ['github', 'git', 'issue', 'pr', 'pull request', 'repository', 'repo', 'commit', 'branch', '代码', '仓库', '提交', '分支', 'bug', '错误', '问题', '开发', '编程'],
-        'weather': ['天气', 'temperature', 'forecast', 'rain', 'snow', 'wind', 'humidity', '气温', '预报', '下雨', '下雪', '温度', '气候', '冷', '热', '暖', '凉', '阴', '晴', '多云', '雷', '雨', '雪', '风', '湿度', '今天', '明天', '后天', '周末'],
-        'backup': ['backup', 'restore', 'recover', '备份', '恢复', '数据', 'archive', '存档', '数据备份', '文件备份', '重要', '保存', '存储', '保护', '复制', '镜像', '灾难恢复', '快照', '增量'],
-        'healthcheck': ['security', '安全', 'hardening', 'firewall', 'ssh', 'audit', 'risk', 'exposure', '防火墙', '审计', '风险', '加固', '漏洞', '检查', '状态', '健康', '扫描', '测试', '防护', '监控', '强化', '服务器', '系统', '网络', '主机', '渗透', '入侵', '恶意', '病毒', '木马', '后门', '权限', '访问控制', '加密', '证书', '日志', '告警', '威胁', '攻击', '防御', '隔离', '沙箱', '更新', '补丁', '升级', '配置', '策略', '合规', '标准', '最佳实践', '保护', '验证', '认证', '授权', '身份', '会话', '超时', '锁定', '失败', '重试', '限制', '速率', '带宽', '流量', '异常', '行为', '模式', '分析', '检测', '预防', '响应', '恢复', '备份', '容灾', '高可用', '负载', '压力', '性能', '资源', 'CPU', '内存', '磁盘', '网络', '连接', '端口', '服务', '进程', '用户', '组', '角色', '权限', 'ACL', 'RBAC', 'ABAC', '零信任', '最小权限', '纵深防御', '系统安全', '网络安全', '主机安全', '渗透测试'],
-        'sonoscli': ['sonos', 'speaker', 'music', 'audio', 'volume', 'play', 'pause', '音箱', '音乐', '音量', '播放', '暂停', '音响', '声音', '歌曲', '专辑', '艺术家', '流媒体'],
-        'concise-output': ['concise', '简洁', '简明', '输出', '格式化', '清晰', '精简', '简短', '摘要', '总结', '要点', '重点', '简化', '压缩'],
-        'find': ['find', 'locate', 'search', '查找', '搜索', '定位', '发现', '寻找', '查询', '检索'],
-        'multi-memory-manager': ['memory', '记忆', '存储', '记录', '历史', '日志', '备份', '管理', '组织', '分类'],
-        'skill-evolution-manager': ['skill', 'evolution', 'upgrade', 'update', 'manage', '技能', '进化', '升级', '更新', '管理', '自动化', '智能', '维护']
-    }
-    
-    if name in special_keywords:
-        for keyword in special_keywords[name]:
+    if name in SPECIAL_KEYWORDS:
+        for keyword in SPECIAL_KEYWORDS[name]:
             if keyword in command:
-                if re.search(r'[\u4e00-\u9fff]', keyword):  # 中文关键词
+                if CHINESE_CHAR_PATTERN.search(keyword):  # 中文关键词
                     score += 3.0 if has_chinese else 2.0
                 else:  # 英文关键词
                     score += 2.0
     
     # 动态归一化：基于实际最大可能分数
-    if score == 0:
-        return 0.0
-    
-    # 使用更合理的归一化方法
-    # 最大分数基于特殊关键词数量和权重
-    max_possible_score = 15.0  # 保守估计的最大分数
-    
-    # 如果检测到中文且有中文匹配，提高基础分数
-    if has_chinese and score < 3.0:
-        # 对于中文命令，即使只匹配一个关键词也应该有合理的基础分数
-        base_score = min(5.0, score * 2.0)  # 提高基础分数
-        normalized_score = min(10.0, base_score)
-    else:
-        normalized_score = min(10.0, (score / max_possible_score) * 10.0)
-    
-    return round(normalized_score, 2)
-
-def extract_keywords(description: str) -> List[str]:
-    """从技能描述中提取关键词"""
-    # 提取英文单词（包括带连字符的）
-    english_words = re.findall(r'\b[a-zA-Z][a-zA-Z\-]{2,}\b', description)
-    
-    # 提取中文词语（1个或更多字符，因为中文单字也有意义）
-    chinese_chars = re.findall(r'[\u4e00-\u9fff]', description)
-    chinese_words = re.findall(r'[\u4e00-\u9fff]{2,}', description)
-    
-    # 合并并去重
-    all_words = english_words + chinese_words + chinese_chars
-    
-    # 过滤常见停用词
-    stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'when', 'use', 'not', 'via', 'api', 'user', 'asks', 'about', 'any', 'location', 'this', 'that', 'these', 'those'}
-    keywords = [word for word in all_words if word.lower() not in stop_words]
-    return list(set(keywords))
-
-def extract_triggers(description: str) -> List[str]:
-    """从技能描述中提取触发词"""
-    triggers = []
-    
-    # 查找 "Use when" 相关的触发条件
-    if 'use when' in description:
-        use_when_part = description.split('use when')[-1]
-        # 提取括号内的内容
-        bracket_content = re.findall(r'\(([^)]+)\)', use_when_part)
-        for content in bracket_content:
-            # 分割条件
-            conditions = re.split(r'[,\n]', content)
-            for condition in conditions:
-                condition = condition.strip()
-                if condition and len(condition) > 1:  # 降低最小长度要求
-                    triggers.append(condition)
-    
-    # 查找中文触发条件
-    if '当' in description:
-        parts = description.split('当')
-        for part in parts[1:]:
-            if '时' in part:
-                when_content = part.split('时')[0].strip()
-                if when_content and len(when_content) > 1:
-                    triggers.append(when_content)
-            elif '使用' in part:
-                when_content = part.split('使用')[0].strip()
-                if when_content and len(when_content) > 1:
-                    triggers.append(when_content)
-    
-    return list(set(triggers))
+    return normalize_score(score, has_chinese)
 
 def get_match_reasoning(command: str, skill: Dict) -> str:
-    """生成匹配推理说明"""
-    description = skill['description'].lower()
-    name = skill['name']
+    """生成匹配推理说明（不使用索引时，现场计算单个技能的匹配轨迹）"""
+    trace = [(term, source, weight) for term, source, weight in extract_skill_terms(skill)
+             if term in command]
+    return render_reasoning(skill, trace)
+
+@instrumented('render_reasoning')
+def render_reasoning(skill: Dict, trace: List[Tuple[str, str, float]]) -> str:
+    """
+    由匹配轨迹生成推理说明
+    
+    Args:
+        skill: 技能信息
+        trace: 命中的 (词条, 来源, 权重)，见 SkillIndex.trace
+    """
+    matched = {'name': [], 'keyword': [], 'trigger': [], 'special': [], 'fuzzy': []}
+    for term, source, weight in sorted(trace, key=lambda item: item[2], reverse=True):
+        if term not in matched[source]:
+            matched[source].append(term)
     
     reasons = []
     
-    # 检查技能名称匹配
-    if name.lower() in command:
-        reasons.append(f"包含技能名称: {name}")
+    # 技能名称匹配
+    if matched['name']:
+        reasons.append(f"包含技能名称: {skill['name']}")
     
-    # 检查关键词匹配
-    keywords = extract_keywords(description)
-    matched_keywords = [kw for kw in keywords if len(kw) > 0 and kw in command]
-    if matched_keywords:
-        reasons.append(f"匹配关键词: {', '.join(matched_keywords[:3])}")
+    # 关键词匹配
+    if matched['keyword']:
+        reasons.append(f"匹配关键词: {', '.join(matched['keyword'][:3])}")
     
-    # 检查触发条件匹配
-    triggers = extract_triggers(description)
-    matched_triggers = [t for t in triggers if t in command]
-    if matched_triggers:
-        reasons.append(f"满足触发条件: {', '.join(matched_triggers[:2])}")
-    
-    # 检查特殊关键词匹配
-    special_keywords = {
-        'github': ['github', 'git', 'issue', 'pr', 'pull request', 'repository', 'repo', 'commit', 'branch', '代码', '仓库', '提交', '分支', 'bug', '错误', '问题', '开发', '编程'],
-        'weather': ['天气', 'temperature', 'forecast', 'rain', 'snow', 'wind', 'humidity', '气温', '预报', '下雨', '下雪', '温度', '气候', '冷', '热', '暖', '凉', '阴', '晴', '多云', '雷', '雨', '雪', '风', '湿度', '今天', '明天', '后天', '周末'],
-        'backup': ['backup', 'restore', 'recover', '备份', '恢复', '数据', 'archive', '存档', '数据备份', '文件备份', '重要', '保存', '存储', '安全', '保护', '复制', '镜像'],
-        'healthcheck': ['security', '安全', 'hardening', 'firewall', 'ssh', 'audit', 'risk', 'exposure', '防火墙', '审计', '风险', '加固', '漏洞', '检查', '状态', '健康', '扫描', '测试', '防护', '监控', '强化', '服务器', '系统', '网络', '主机', '渗透', '入侵', '恶意', '病毒', '木马', '后门', '权限', '访问控制', '加密', '证书', '日志', '告警', '威胁', '攻击', '防御', '隔离', '沙箱', '更新', '补丁', '升级', '配置', '策略', '合规', '标准', '最佳实践', '保护', '验证', '认证', '授权', '身份', '会话', '超时', '锁定', '失败', '重试', '限制', '速率', '带宽', '流量', '异常', '行为', '模式', '分析', '检测', '预防', '响应', '恢复', '备份', '容灾', '高可用', '负载', '压力', '性能', '资源', 'CPU', '内存', '磁盘', '网络', '连接', '端口', '服务', '进程', '用户', '组', '角色', '权限', 'ACL', 'RBAC', 'ABAC', '零信任', '最小权限', '纵深防御'],
-        'sonoscli': ['sonos', 'speaker', 'music', 'audio', 'volume', 'play', 'pause', '音箱', '音乐', '音量', '播放', '暂停', '音响', '声音', '歌曲', '专辑', '艺术家', '流媒体'],
-        'concise-output': ['concise', '简洁', '简明', '输出', '格式化', '清晰', '精简', '简短', '摘要', '总结', '要点', '重点', '简化', '压缩'],
-        'find': ['find', 'locate', 'search', '查找', '搜索', '定位', '发现', '寻找', '查询', '检索'],
-        'multi-memory-manager': ['memory', '记忆', '存储', '记录', '历史', '日志', '备份', '管理', '组织', '分类'],
-        'skill-evolution-manager': ['skill', 'evolution', 'upgrade', 'update', 'manage', '技能', '进化', '升级', '更新', '管理', '自动化', '智能', '维护']
-    }
+    # 触发条件匹配
+    if matched['trigger']:
+        reasons.append(f"满足触发条件: {', '.join(matched['trigger'][:2])}")
     
-    if name in special_keywords:
-        matched_special = [kw for kw in special_keywords[name] if kw in command]
-        if matched_special:
-            reasons.append(f"匹配特殊关键词: {', '.join(matched_special[:2])}")
+    # 特殊关键词匹配
+    if matched['special']:
+        reasons.append(f"匹配特殊关键词: {', '.join(matched['special'][:2])}")
+    
+    # 拼写容错匹配
+    if matched['fuzzy']:
+        reasons.append(f"拼写纠正: {', '.join(matched['fuzzy'][:2])}")
     
     return "; ".join(reasons) if reasons else "基于语义相似性匹配"
 
+@instrumented('generate_analysis_summary')
 def generate_analysis_summary(command: str, matches: List[Dict]) -> str:
     """生成分析摘要"""
     if not matches:
@@ -277,16 +540,159 @@ def generate_analysis_summary(command: str, matches: List[Dict]) -> str:
     else:
         return f"低置信度匹配到技能 '{best_match['skill_name']}' ({best_match['confidence']}/10)，建议人工确认"
 
+def load_default_index(model_path: Optional[str] = None, compact: bool = False,
+                       skill_dirs: Optional[List[str]] = None) -> SkillIndex:
+    """
+    加载命令行默认使用的技能索引
+    
+    存在编译产物时直接加载（只重新解析发生变化的技能）；否则指定了 skill_dirs 时经技能注册表
+    加载这些目录中的技能（load_skills.load_available_skills），未指定时基于 load_available_skills() 构建；
+    compact=True 时构建内存紧凑的 CompactSkillIndex（适合常驻服务和大规模技能目录）
+    """
+    import matcher_model
+    model_path = model_path or matcher_model.DEFAULT_MODEL_PATH
+    if os.path.exists(model_path):
+        return matcher_model.load_matcher(model_path, compact=compact)
+    if skill_dirs is not None:
+        import load_skills
+        skills = load_skills.load_available_skills(skill_dirs)
+    else:
+        skills = load_available_skills()
+    if compact:
+        from compact_catalog import CompactSkillIndex
+        return CompactSkillIndex(skills)
+    return get_skill_index(skills)
+
+def stream_jsonl(input_stream, output_stream, index: SkillIndex, mode: str = 'weighted',
+                 fuzzy: bool = False, debug: bool = False,
+                 ngram_weights: Optional[Dict[int, float]] = None, lsh_recall: Optional[float] = None,
+                 lsh_rows: Optional[int] = None) -> int:
+    """
+    流式分析：每行读入一条命令，每行输出一个紧凑的JSON结果并立即刷新
+    
+    输入行可以是JSON字符串、带 command 字段的JSON对象（id 字段原样带回），
+    也可以是纯文本命令；空行跳过，单行出错时输出 {"error": ...} 并继续
+    
+    Returns:
+        处理的命令数
+    """
+    count = 0
+    for line in input_stream:
+        line = line.strip()
+        if not line:
+            continue
+        
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                request = line
+            if isinstance(request, dict):
+                request_id = request.get('id')
+                if 'command' not in request:
+                    raise ValueError("请求缺少 command 字段")
+                command = request['command']
+            elif isinstance(request, str):
+                command = request
+            else:
+                raise ValueError("每行应为命令文本、JSON字符串或带 command 字段的JSON对象")
+            result = analyze_user_command(command, index, mode, fuzzy=fuzzy, debug=debug,
+                                          ngram_weights=ngram_weights, lsh_recall=lsh_recall, lsh_rows=lsh_rows)
+        except Exception as e:
+            result = {'error': str(e)}
+        
+        if request_id is not None:
+            result = dict(result, id=request_id)
+        output_stream.write(json.dumps(result, ensure_ascii=False, separators=(',', ':')) + '\n')
+        output_stream.flush()
+        count += 1
+    return count
+
+def _parse_ngram_weights(text: str) -> Dict[int, float]:
+    """解析 --ngram-weights 参数：逗号分隔的 长度=系数，如 1=0.5,2=1,3=1.5"""
+    import argparse
+    
+    weights = {}
+    for item in text.split(','):
+        size, separator, weight = item.partition('=')
+        try:
+            if not separator or int(size) < 1:
+                raise ValueError
+            weights[int(size)] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"无效的n-gram权重: {item!r}，应为 长度=系数，如 2=1.0")
+    return weights
+
 def main():
     """主函数 - 用于测试"""
-    import sys
-    
-    if len(sys.argv) < 2:
-        print("Usage: python analyze_command.py <command>")
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='智能命令分析器')
+    parser.add_argument('command', nargs='?', help='要分析的用户命令')
+    parser.add_argument('--compile', action='store_true',
+                        help='编译技能匹配模型（扫描技能目录并写入磁盘产物）')
+    parser.add_argument('--model', help='编译产物路径（默认 cache/compiled_matcher.json）')
+    parser.add_argument('--mode', default='weighted', choices=MATCH_MODES, help='评分模式')
+    parser.add_argument('--stdin-jsonl', action='store_true',
+                        help='从标准输入逐行读取命令，每行输出一个JSON结果')
+    parser.add_argument('--fuzzy', action='store_true', help='启用技能名称和英文关键词的拼写容错')
+    parser.add_argument('--debug', action='store_true', help='在结果中附上各阶段耗时')
+    parser.add_argument('--metrics-json', help='统计各阶段耗时直方图，结束时写入该JSON文件')
+    parser.add_argument('--ngram-weights', type=_parse_ngram_weights,
+                        help='ngram 模式下各长度n-gram的权重系数，如 1=0.5,2=1,3=1.5（系数为0的长度不参与计分）')
+    parser.add_argument('--lsh-recall', type=float,
+                        help='lsh 模式的目标召回率（越高候选越多，>=1 时全量扫描）')
+    parser.add_argument('--lsh-rows', type=int, help='lsh 模式每个band的行数（band数按召回率计算）')
+    args = parser.parse_args()
+    if args.ngram_weights is not None and args.mode != 'ngram':
+        parser.error("--ngram-weights 只用于 --mode ngram")
+    if (args.lsh_recall is not None or args.lsh_rows is not None) and args.mode != 'lsh':
+        parser.error("--lsh-recall / --lsh-rows 只用于 --mode lsh")
+    if args.lsh_recall is not None and args.lsh_recall <= 0:
+        parser.error("--lsh-recall 应大于0")
+    if args.lsh_rows is not None and args.lsh_rows < 1:
+        parser.error("--lsh-rows 应为正整数")
+    
+    if args.metrics_json:
+        matcher_metrics.enable()
+        try:
+            _run_cli(parser, args)
+        finally:
+            matcher_metrics.dump_json(args.metrics_json)
+    else:
+        _run_cli(parser, args)
+
+def _run_cli(parser, args):
+    """按命令行参数执行编译、单条分析或流式分析"""
+    import matcher_model
+    model_path = args.model or matcher_model.DEFAULT_MODEL_PATH
+    has_input = args.command or args.stdin_jsonl
+    
+    if args.compile:
+        index = matcher_model.compile_matcher(model_path)
+        # 流式模式下标准输出只输出结果行
+        print(f"已编译 {len(index.skills)} 个技能，{len(index.postings)} 个词条 -> {model_path}",
+              file=sys.stderr if args.stdin_jsonl else sys.stdout)
+        if not has_input:
+            return
+    elif not has_input:
+        parser.print_usage()
         sys.exit(1)
-    
-    command = sys.argv[1]
-    result = analyze_user_command(command)
+    else:
+        index = load_default_index(model_path)
+    
+    if args.stdin_jsonl:
+        try:
+            stream_jsonl(sys.stdin, sys.stdout, index, args.mode, args.fuzzy, args.debug, args.ngram_weights,
+                         args.lsh_recall, args.lsh_rows)
+        except (BrokenPipeError, KeyboardInterrupt):
+            pass
+        return
+    
+    result = analyze_user_command(args.command, index, args.mode, fuzzy=args.fuzzy, debug=args.debug,
+                                  ngram_weights=args.ngram_weights, lsh_recall=args.lsh_recall,
+                                  lsh_rows=args.lsh_rows)
     print(json.dumps(result, indent=2, ensure_ascii=False))
 
 if __name__ == "__main__":
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+批量命令匹配
+把一批命令的词条命中组织成 命令×词条 稀疏矩阵，与 词条×技能 权重矩阵相乘，
+一次得到整批命令对所有技能的原始分数。安装了NumPy时使用向量化计算，
+否则退回基于array的纯Python稀疏累加；超大批量可以分片到进程池
+"""
+
+from array import array
+from typing import Dict, List, Optional
+
+from skill_index import SkillIndex
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖
+    np = None
+
+# 单个向量化分块的稠密分数矩阵元素上限（约16MB的float64）
+MAX_CHUNK_CELLS = 2_000_000
+
+class BatchScorer:
+    """基于稀疏矩阵乘法的批量打分器"""
+
+    def __init__(self, index: SkillIndex):
+        self.index = index
+        self.num_skills = len(index.skills)
+        self.always_postings = index.always_postings
+
+        # 词条×技能 权重矩阵（CSR）：第t行为 skill_ids/weights[term_ptr[t]:term_ptr[t+1]]
+        self.term_ptr = array('q', [0])
+        self.skill_ids = array('q')
+        self.weights = array('d')
+        for term in index.terms:
+            for skill_id, weight in index.postings[term]:
+                self.skill_ids.append(skill_id)
+                self.weights.append(weight)
+            self.term_ptr.append(len(self.skill_ids))
+
+        if np is not None:
+            self.np_term_ptr = np.frombuffer(self.term_ptr, dtype=np.int64)
+            self.np_skill_ids = np.frombuffer(self.skill_ids, dtype=np.int64)
+            self.np_weights = np.frombuffer(self.weights, dtype=np.float64)
+
+    def command_term_matrix(self, commands: List[str]):
+        """
+        构建 命令×词条 稀疏矩阵（CSR，值恒为1）
+
+        Returns:
+            (row_ptr, term_ids)：第i条命令命中的词条为 term_ids[row_ptr[i]:row_ptr[i+1]]
+        """
+        row_ptr = array('q', [0])
+        term_ids = array('q')
+        for command in commands:
+            term_ids.extend(sorted(self.index.automaton.find_all(command)))
+            row_ptr.append(len(term_ids))
+        return row_ptr, term_ids
+
+    def raw_scores(self, commands: List[str]) -> List[Dict[int, float]]:
+        """
+        计算整批命令的原始分数
+
+        Args:
+            commands: 已小写化的命令列表
+
+        Returns:
+            与commands一一对应的 技能ID -> 原始分数
+        """
+        return self.scores_for_term_matrix(*self.command_term_matrix(commands))
+
+    def scores_for_term_matrix(self, row_ptr: array, term_ids: array) -> List[Dict[int, float]]:
+        """
+        由 命令×词条 稀疏矩阵（command_term_matrix 的结果）计算各行的原始分数
+
+        Returns:
+            与矩阵各行一一对应的 技能ID -> 原始分数
+        """
+        count = len(row_ptr) - 1
+        if np is not None and self.num_skills:
+            chunk_size = max(1, MAX_CHUNK_CELLS // self.num_skills)
+            results = []
+            for start in range(0, count, chunk_size):
+                end = min(start + chunk_size, count)
+                base = row_ptr[start]
+                chunk_ptr = array('q', (position - base for position in row_ptr[start:end + 1]))
+                results.extend(self._scores_numpy(chunk_ptr, term_ids[base:row_ptr[end]]))
+        else:
+            results = self._scores_python(row_ptr, term_ids)
+
+        if self.always_postings:
+            for scores in results:
+                for skill_id, weight in self.always_postings:
+                    scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        return results
+
+    def _scores_python(self, row_ptr: array, term_ids: array) -> List[Dict[int, float]]:
+        """纯Python稀疏矩阵乘法"""
+        term_ptr, skill_ids, weights = self.term_ptr, self.skill_ids, self.weights
+
+        results = []
+        for row in range(len(row_ptr) - 1):
+            scores: Dict[int, float] = {}
+            for term_id in term_ids[row_ptr[row]:row_ptr[row + 1]]:
+                for position in range(term_ptr[term_id], term_ptr[term_id + 1]):
+                    skill_id = skill_ids[position]
+                    scores[skill_id] = scores.get(skill_id, 0.0) + weights[position]
+            results.append(scores)
+        return results
+
+    def _scores_numpy(self, row_ptr: array, term_ids: array) -> List[Dict[int, float]]:
+        """NumPy向量化稀疏矩阵乘法，输出为稠密的 命令×技能 分块"""
+        count = len(row_ptr) - 1
+        rows = np.repeat(np.arange(count, dtype=np.int64),
+                         np.diff(np.frombuffer(row_ptr, dtype=np.int64)))
+        terms = np.frombuffer(term_ids, dtype=np.int64)
+
+        # 展开每个 (命令, 词条) 命中对应的倒排表区间
+        starts = self.np_term_ptr[terms]
+        lengths = self.np_term_ptr[terms + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total, dtype=np.int64)
+
+        cells = np.repeat(rows, lengths) * self.num_skills + self.np_skill_ids[offsets]
+        dense = np.bincount(cells, weights=self.np_weights[offsets],
+                            minlength=count * self.num_skills)
+        dense = dense.reshape(count, self.num_skills)
+
+        results = []
+        for row in range(count):
+            hit_skills = np.flatnonzero(dense[row])
+            results.append({int(skill_id): float(dense[row, skill_id]) for skill_id in hit_skills})
+        return results
+
+# 最近一次使用的打分器，同一索引的多次批量调用复用同一份权重矩阵
+_scorer_cache: Optional[BatchScorer] = None
+
+def get_batch_scorer(index: SkillIndex) -> BatchScorer:
+    """获取（必要时构建）索引对应的批量打分器"""
+    global _scorer_cache
+    if _scorer_cache is None or _scorer_cache.index is not index:
+        _scorer_cache = BatchScorer(index)
+    return _scorer_cache
+
+# 进程池工作进程内的打分器
+_worker_scorer: Optional[BatchScorer] = None
+
+def _init_worker(index: SkillIndex):
+    """进程池初始化：每个工作进程只构建一次打分器"""
+    global _worker_scorer
+    _worker_scorer = BatchScorer(index)
+
+def _score_chunk(commands: List[str]) -> List[Dict[int, float]]:
+    return _worker_scorer.raw_scores(commands)
+
+def score_commands(index: SkillIndex, commands: List[str],
+                   processes: Optional[int] = None) -> List[Dict[int, float]]:
+    """
+    批量计算命令的原始分数
+
+    Args:
+        index: 技能索引
+        commands: 已小写化的命令列表
+        processes: 进程池大小；为None或1时在当前进程内计算
+
+    Returns:
+        与commands一一对应的 技能ID -> 原始分数
+    """
+    if not processes or processes <= 1 or len(commands) < 2:
+        return get_batch_scorer(index).raw_scores(commands)
+
+    from multiprocessing import Pool
+
+    chunk_size = (len(commands) + processes - 1) // processes
+    chunks = [commands[start:start + chunk_size] for start in range(0, len(commands), chunk_size)]
+    with Pool(processes, initializer=_init_worker, initargs=(index,)) as pool:
+        chunk_results = pool.map(_score_chunk, chunks)
+
+    return [scores for chunk in chunk_results for scores in chunk]
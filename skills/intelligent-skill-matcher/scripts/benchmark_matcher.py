@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+技能匹配器性能基准
+生成 10/100/1k/10k 个技能的合成SKILL.md目录，重放现有测试命令和生成的命令，
+按评分模式统计 p50/p99 延迟、吞吐量和峰值内存，结果以JSON输出。
+每个 (技能规模, 模式) 组合在独立子进程中运行，峰值内存互不影响
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from matcher_metrics import peak_rss_mb
+
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+DEFAULT_GENERATED_COMMANDS = 200
+DEFAULT_SEED = 42
+
+# legacy 为不使用索引、逐技能调用 calculate_match_score 的原始实现，作为对照
+LEGACY_MODE = 'legacy'
+
+ENGLISH_WORDS = [
+    'backup', 'restore', 'weather', 'forecast', 'security', 'audit', 'firewall', 'music',
+    'speaker', 'volume', 'search', 'locate', 'memory', 'history', 'deploy', 'release',
+    'database', 'query', 'schema', 'migration', 'network', 'latency', 'monitor', 'alert',
+    'calendar', 'meeting', 'email', 'message', 'translate', 'summary', 'document', 'report',
+    'image', 'video', 'upload', 'download', 'archive', 'compress', 'encrypt', 'certificate',
+    'docker', 'container', 'cluster', 'kubernetes', 'terraform', 'invoice', 'payment', 'budget',
+    'ticket', 'issue', 'review', 'commit', 'branch', 'pipeline', 'build', 'test',
+    'coverage', 'profile', 'benchmark', 'cache', 'queue', 'scheduler', 'cron', 'webhook',
+    'notebook', 'dataset', 'model', 'training', 'inference', 'prompt', 'agent', 'workflow',
+    'sensor', 'camera', 'printer', 'bluetooth', 'battery', 'storage', 'snapshot', 'sync'
+]
+
+CHINESE_WORDS = [
+    '备份', '恢复', '天气', '预报', '安全', '审计', '防火墙', '音乐', '音箱', '音量',
+    '搜索', '定位', '记忆', '历史', '部署', '发布', '数据库', '查询', '迁移', '网络',
+    '延迟', '监控', '告警', '日历', '会议', '邮件', '消息', '翻译', '摘要', '文档',
+    '报告', '图片', '视频', '上传', '下载', '归档', '压缩', '加密', '证书', '容器',
+    '集群', '发票', '支付', '预算', '工单', '评审', '提交', '分支', '流水线', '构建',
+    '测试', '覆盖率', '性能', '缓存', '队列', '调度', '定时', '笔记', '数据集', '模型',
+    '训练', '推理', '提示词', '代理', '工作流', '传感器', '摄像头', '打印机', '蓝牙', '电池'
+]
+
+CHINESE_FILLERS = ['帮我', '请', '我想', '能不能', '需要', '马上', '今天', '看看']
+
+def generate_skill(skill_id: int, rng: random.Random) -> Dict:
+    """生成一个合成技能，描述格式与真实SKILL.md一致（英文说明 + Use when 触发条件 + 中文说明）"""
+    name_words = rng.sample(ENGLISH_WORDS, 2)
+    name = f"{name_words[0]}-{name_words[1]}-{skill_id}"
+
+    summary = ' '.join(rng.sample(ENGLISH_WORDS, rng.randint(5, 9)))
+    conditions = [' '.join(rng.sample(ENGLISH_WORDS, 2)) for _ in range(rng.randint(1, 3))]
+    chinese_topic = ''.join(rng.sample(CHINESE_WORDS, 2))
+    chinese_action = '、'.join(rng.sample(CHINESE_WORDS, 3))
+
+    description = (
+        f"{summary.capitalize()}. "
+        f"Use when: ({', '.join(conditions)}). "
+        f"当用户需要{chinese_topic}时使用，支持{chinese_action}。"
+    )
+    return {'name': name, 'description': description}
+
+def write_catalog(root: str, num_skills: int, seed: int = DEFAULT_SEED) -> List[Dict]:
+    """在root下写入num_skills个技能目录，每个包含一个SKILL.md"""
+    rng = random.Random(seed)
+    skills = []
+    for skill_id in range(num_skills):
+        skill = generate_skill(skill_id, rng)
+        skill_dir = os.path.join(root, skill['name'])
+        os.makedirs(skill_dir, exist_ok=True)
+        with open(os.path.join(skill_dir, 'SKILL.md'), 'w', encoding='utf-8') as f:
+            f.write(f"---\nname: {skill['name']}\ndescription: {skill['description']}\n---\n\n")
+            f.write(f"# {skill['name']}\n\n{skill['description']}\n")
+        skills.append(skill)
+    return skills
+
+def generate_commands(count: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """生成中英文混合的命令：中文命令由口语前缀和领域词组成，英文命令由领域词组成"""
+    rng = random.Random(seed + 1)
+    commands = []
+    for i in range(count):
+        if i % 2 == 0:
+            words = rng.sample(CHINESE_WORDS, rng.randint(1, 3))
+            commands.append(rng.choice(CHINESE_FILLERS) + '的'.join(words))
+        else:
+            commands.append(' '.join(rng.sample(ENGLISH_WORDS, rng.randint(2, 5))))
+    return commands
+
+def replay_commands(generated: int, seed: int = DEFAULT_SEED) -> List[str]:
+    """重放的命令集：现有测试用例 + 生成的命令"""
+    from test_improved_matcher import TEST_CASES
+
+    english_cases = [
+        "check pr status or ci", "get weather forecast for tokyo", "backup and restore my files",
+        "security audit of firewall", "play music on sonos speaker", "make output concise"
+    ]
+    return list(TEST_CASES) + english_cases + generate_commands(generated, seed)
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法求分位数，sorted_values须已升序排列"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def run_worker(catalog_dir: str, mode: str, commands: List[str]) -> Dict:
+    """在当前（子）进程中测量一个模式：加载、构建索引并逐条计时"""
+    from analyze_command import (analyze_user_command, calculate_match_score,
+                                 generate_analysis_summary, get_match_reasoning)
+    from load_skills import load_available_skills
+    from skill_index import get_skill_index
+
+    start = time.perf_counter()
+    skills = load_available_skills([catalog_dir])
+    load_seconds = time.perf_counter() - start
+
+    if mode == LEGACY_MODE:
+        def analyze(command):
+            command_lower = command.lower().strip()
+            matches = []
+            for skill in skills:
+                score = calculate_match_score(command_lower, skill)
+                if score > 0:
+                    matches.append({
+                        'skill_name': skill['name'],
+                        'description': skill['description'],
+                        'confidence': score,
+                        'reasoning': get_match_reasoning(command_lower, skill)
+                    })
+            matches.sort(key=lambda x: x['confidence'], reverse=True)
+            return {
+                'original_command': command,
+                'matches': matches[:3],
+                'analysis_summary': generate_analysis_summary(command, matches)
+            }
+        build_seconds = 0.0
+    else:
+        start = time.perf_counter()
+        index = get_skill_index(skills)
+        # 首次调用会构建该模式的附加索引（如BM25、n-gram），计入构建时间
+        analyze_user_command(commands[0], index, mode)
+        build_seconds = time.perf_counter() - start
+
+        def analyze(command):
+            return analyze_user_command(command, index, mode)
+
+    latencies = []
+    total_start = time.perf_counter()
+    for command in commands:
+        start = time.perf_counter()
+        analyze(command)
+        latencies.append(time.perf_counter() - start)
+    total_seconds = time.perf_counter() - total_start
+
+    latencies.sort()
+    return {
+        'skills': len(skills),
+        'mode': mode,
+        'commands': len(commands),
+        'load_ms': round(load_seconds * 1000, 3),
+        'build_ms': round(build_seconds * 1000, 3),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 4),
+        'throughput_qps': round(len(commands) / total_seconds, 1) if total_seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 2)
+    }
+
+def run_in_subprocess(catalog_dir: str, mode: str, generated: int, seed: int) -> Dict:
+    """在独立子进程中运行一个模式，返回其JSON结果"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker',
+         '--catalog-dir', catalog_dir, '--mode', mode,
+         '--generated', str(generated), '--seed', str(seed)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error_lines = completed.stderr.strip().splitlines() or ['未知错误']
+        return {'mode': mode, 'error': error_lines[-1]}
+    return json.loads(completed.stdout)
+
+def run_benchmark(sizes: List[int], modes: List[str], generated: int = DEFAULT_GENERATED_COMMANDS,
+                  seed: int = DEFAULT_SEED, catalog_root: str = None) -> Dict:
+    """
+    对每个技能规模生成合成目录，并在子进程中逐个模式测量
+
+    Args:
+        sizes: 合成技能数量列表
+        modes: 要测量的模式
+        generated: 额外生成的命令数
+        seed: 随机种子，相同种子生成相同的目录和命令
+        catalog_root: 保存合成目录的位置，缺省时使用临时目录并在结束后删除
+    """
+    try:
+        import numpy  # noqa: F401
+        has_numpy = True
+    except ImportError:
+        has_numpy = False
+
+    # 报告中的 skills 为实际加载的技能数，包含 load_skills 补充的内置技能
+    report = {
+        'python': sys.version.split()[0],
+        'numpy': has_numpy,
+        'seed': seed,
+        'commands': len(replay_commands(generated, seed)),
+        'results': []
+    }
+
+    with tempfile.TemporaryDirectory(prefix='skill-matcher-bench-') as temp_root:
+        root = catalog_root or temp_root
+        for size in sizes:
+            catalog_dir = os.path.join(root, f'catalog-{size}')
+            if not os.path.isdir(catalog_dir):
+                write_catalog(catalog_dir, size, seed)
+            for mode in modes:
+                result = run_in_subprocess(catalog_dir, mode, generated, seed)
+                result['catalog_size'] = size
+                report['results'].append(result)
+                print(f"  {size:>6} 技能 {mode:<10} "
+                      f"p50={result.get('p50_ms')}ms p99={result.get('p99_ms')}ms "
+                      f"qps={result.get('throughput_qps')} rss={result.get('peak_rss_mb')}MB",
+                      file=sys.stderr, flush=True)
+    return report
+
+def main():
+    import argparse
+    from analyze_command import MATCH_MODES
+
+    all_modes = list(MATCH_MODES) + [LEGACY_MODE]
+
+    parser = argparse.ArgumentParser(description='技能匹配器性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='合成技能数量')
+    parser.add_argument('--modes', nargs='+', default=all_modes, choices=all_modes, help='要测量的模式')
+    parser.add_argument('--generated', type=int, default=DEFAULT_GENERATED_COMMANDS, help='额外生成的命令数')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--catalog-dir', help='合成技能目录的保存位置（--worker 时为要测量的目录）')
+    parser.add_argument('--output', help='JSON报告输出文件，缺省输出到标准输出')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_worker(args.catalog_dir, args.mode, replay_commands(args.generated, args.seed))
+        print(json.dumps(result))
+        return
+
+    report = run_benchmark(args.sizes, args.modes, args.generated, args.seed, args.catalog_dir)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
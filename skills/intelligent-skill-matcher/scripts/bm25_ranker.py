@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+BM25 技能排序
+以技能名称、描述、触发词和特殊关键词为文档字段，预先计算IDF和文档长度归一化，
+把每个 (词项, 技能) 的BM25贡献直接存入倒排表；查询时只累加命中词项的贡献，
+再用堆选出前k个，不需要对全部匹配排序
+"""
+
+import heapq
+import math
+from typing import Dict, List, Optional, Set, Tuple
+
+from skill_index import SkillIndex
+from skill_terms import SPECIAL_KEYWORDS, extract_triggers, tokenize
+
+# BM25参数
+K1 = 1.2
+B = 0.75
+
+# 字段权重：字段内的词频乘以该倍数，相当于把字段重复若干次
+FIELD_BOOSTS = {
+    'name': 3,
+    'trigger': 2,
+    'special': 2,
+    'description': 1
+}
+
+# BM25分数映射到0-10分时，得分等于该值的技能记为5分
+HALF_CONFIDENCE_SCORE = 4.0
+
+class BM25Index:
+    """技能BM25索引"""
+
+    def __init__(self, skills: List[Dict], k1: float = K1, b: float = B):
+        self.skills = list(skills)
+        self.k1 = k1
+        self.b = b
+
+        # 每个技能的加权词频和文档长度
+        doc_term_freqs: List[Dict[str, int]] = []
+        doc_lengths: List[int] = []
+        for skill in self.skills:
+            term_freqs: Dict[str, int] = {}
+            for field, text in self._skill_fields(skill):
+                for token in tokenize(text):
+                    term_freqs[token] = term_freqs.get(token, 0) + FIELD_BOOSTS[field]
+            doc_term_freqs.append(term_freqs)
+            doc_lengths.append(sum(term_freqs.values()))
+
+        num_docs = len(self.skills)
+        avg_length = (sum(doc_lengths) / num_docs) if num_docs else 0.0
+
+        document_freqs: Dict[str, int] = {}
+        for term_freqs in doc_term_freqs:
+            for term in term_freqs:
+                document_freqs[term] = document_freqs.get(term, 0) + 1
+
+        # 预计算IDF与文档长度归一化
+        self.idf = {
+            term: math.log(1.0 + (num_docs - df + 0.5) / (df + 0.5))
+            for term, df in document_freqs.items()
+        }
+        self.length_norms = [
+            k1 * (1.0 - b + b * (length / avg_length if avg_length else 0.0))
+            for length in doc_lengths
+        ]
+
+        # 词项 -> [(技能ID, BM25贡献)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for skill_id, term_freqs in enumerate(doc_term_freqs):
+            norm = self.length_norms[skill_id]
+            for term, tf in term_freqs.items():
+                impact = self.idf[term] * tf * (k1 + 1.0) / (tf + norm)
+                self.postings.setdefault(term, []).append((skill_id, impact))
+
+    @staticmethod
+    def _skill_fields(skill: Dict) -> List[Tuple[str, str]]:
+        """技能的各个文档字段"""
+        description = skill['description'].lower()
+        name = skill['name'].lower()
+        fields = [('name', name), ('description', description)]
+        fields.extend(('trigger', trigger) for trigger in extract_triggers(description))
+        fields.extend(('special', keyword) for keyword in SPECIAL_KEYWORDS.get(name, []))
+        return fields
+
+    def scores(self, command: str) -> Dict[int, float]:
+        """计算命令对各技能的BM25分数（查询词项去重）"""
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(command)):
+            for skill_id, impact in self.postings.get(term, ()):
+                scores[skill_id] = scores.get(skill_id, 0.0) + impact
+        return scores
+
+    def top_k(self, command: str, k: int = 3, exclude: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """用堆选出分数最高的k个技能，同分时按技能顺序；exclude 中的技能不参与"""
+        scores = self.scores(command)
+        items = scores.items()
+        if exclude:
+            items = [(skill_id, score) for skill_id, score in items if skill_id not in exclude]
+        return heapq.nlargest(k, items, key=lambda item: (item[1], -item[0]))
+
+    def matched_terms(self, command: str, skill_id: int) -> List[str]:
+        """命令与技能共同的词项，按贡献从高到低"""
+        contributions = []
+        for term in set(tokenize(command)):
+            for posting_skill_id, impact in self.postings.get(term, ()):
+                if posting_skill_id == skill_id:
+                    contributions.append((impact, term))
+        return [term for impact, term in sorted(contributions, reverse=True)]
+
+    @staticmethod
+    def confidence(score: float) -> float:
+        """把无上界的BM25分数平滑映射到0-10分"""
+        return round(10.0 * score / (score + HALF_CONFIDENCE_SCORE), 2)
+
+# 最近一次使用的BM25索引，随技能索引一起复用
+_bm25_cache: Optional[Tuple[SkillIndex, BM25Index]] = None
+
+def get_bm25_index(index: SkillIndex) -> BM25Index:
+    """获取（必要时构建）技能索引对应的BM25索引"""
+    global _bm25_cache
+    if _bm25_cache is None or _bm25_cache[0] is not index:
+        _bm25_cache = (index, BM25Index(index.skills))
+    return _bm25_cache[1]
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+冷启动回归检查
+用 python -X importtime 测量各命令行入口模块的导入耗时，并检查只在特定模式下
+才需要的子模块（其他评分模式、编译产物、yaml 等）没有被提前导入；同时测量单条命令
+分析的端到端耗时。任何一项超出预算时以非0状态退出，可以放进CI或提交前检查
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+SKILLS_ROOT = os.path.dirname(os.path.dirname(current_dir))
+
+DEFAULT_RUNS = 5
+
+# 入口模块 -> (所在目录, 导入耗时预算（毫秒，含其导入的标准库）, 不应在导入时加载的模块)
+IMPORT_BUDGETS: Dict[str, Tuple[str, float, List[str]]] = {
+    'analyze_command': (
+        current_dir, 60.0,
+        ['bm25_ranker', 'cjk_ngram_index', 'lsh_index', 'fuzzy_index', 'batch_matcher', 'result_cache',
+         'maxscore_index', 'sharded_matcher', 'matcher_model', 'compact_catalog', 'load_skills', 'numpy',
+         'argparse', 'hashlib']
+    ),
+    'memory_manager': (
+        os.path.join(SKILLS_ROOT, 'multi-memory-manager'), 40.0,
+        ['core_memory', 'working_context', 'logic_history', 'operation_log', 'task_recovery', 'memory_store',
+         'log_segments', 'group_commit', 'sqlite3', 'uuid']
+    ),
+    'evolution_manager': (
+        os.path.join(SKILLS_ROOT, 'skill-evolution-manager'), 60.0,
+        ['yaml', 'hashlib']
+    ),
+}
+
+# 单条命令分析（含解释器启动）的端到端预算（毫秒）
+CLI_BUDGET_MS = 100.0
+CLI_COMMAND = ['analyze_command.py', '帮我检查PR状态']
+
+def _child_env() -> Dict[str, str]:
+    """子进程环境：允许写入字节码缓存，测量的是部署后的常规启动而不是首次编译"""
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        模块名 -> (自身耗时, 累计耗时)，单位微秒
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        modules[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return modules
+
+def measure_import(module: str, directory: str, runs: int = DEFAULT_RUNS) -> Dict:
+    """多次测量模块的导入耗时，取中位数；第一次运行只用于生成字节码缓存"""
+    env = _child_env()
+    args = [sys.executable, '-X', 'importtime', '-c', f'import {module}']
+    subprocess.run(args, cwd=directory, env=env, capture_output=True)
+
+    totals = []
+    modules: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        completed = subprocess.run(args, cwd=directory, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            error_lines = completed.stderr.strip().splitlines() or ['未知错误']
+            return {'module': module, 'error': error_lines[-1]}
+        modules = parse_importtime(completed.stderr)
+        if module not in modules:
+            return {'module': module, 'error': '未找到导入记录'}
+        totals.append(modules[module][1] / 1000)
+
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:5]
+    return {
+        'module': module,
+        'import_ms': round(statistics.median(totals), 2),
+        'imported': sorted(modules),
+        'slowest_self_ms': {name: round(self_us / 1000, 2) for name, (self_us, _) in slowest}
+    }
+
+def measure_cli(runs: int = DEFAULT_RUNS) -> Dict:
+    """多次测量单条命令分析的端到端耗时（含解释器启动），取中位数"""
+    env = _child_env()
+    args = [sys.executable] + CLI_COMMAND
+    subprocess.run(args, cwd=current_dir, env=env, capture_output=True)
+
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = subprocess.run(args, cwd=current_dir, env=env, capture_output=True)
+        durations.append(time.perf_counter() - start)
+        if completed.returncode != 0:
+            return {'error': completed.stderr.decode('utf-8', 'replace').strip().splitlines()[-1:]}
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], env=env, capture_output=True)
+    interpreter_ms = (time.perf_counter() - start) * 1000
+    return {
+        'command': ' '.join(CLI_COMMAND),
+        'wall_ms': round(statistics.median(durations) * 1000, 2),
+        'interpreter_ms': round(interpreter_ms, 2)
+    }
+
+def run_checks(runs: int = DEFAULT_RUNS, budget_scale: float = 1.0,
+               modules: Optional[List[str]] = None) -> Dict:
+    """
+    执行全部检查
+
+    Args:
+        runs: 每项测量的次数
+        budget_scale: 预算缩放系数（较慢的CI机器上可以放宽）
+        modules: 只检查这些入口模块，默认全部
+
+    Returns:
+        报告，'failures' 为超出预算或提前导入的说明列表
+    """
+    report: Dict = {'imports': [], 'failures': []}
+    for module, (directory, budget_ms, lazy_modules) in IMPORT_BUDGETS.items():
+        if modules and module not in modules:
+            continue
+        result = measure_import(module, directory, runs)
+        result['budget_ms'] = budget_ms * budget_scale
+        imported = set(result.pop('imported', []))
+        result['eager_imports'] = [name for name in lazy_modules if name in imported]
+        report['imports'].append(result)
+
+        if 'error' in result:
+            report['failures'].append(f"{module}: 导入失败 ({result['error']})")
+            continue
+        if result['import_ms'] > result['budget_ms']:
+            report['failures'].append(
+                f"{module}: 导入耗时 {result['import_ms']}ms 超出预算 {result['budget_ms']}ms")
+        if result['eager_imports']:
+            report['failures'].append(f"{module}: 导入时提前加载了 {', '.join(result['eager_imports'])}")
+
+    if not modules or 'analyze_command' in modules:
+        cli = measure_cli(runs)
+        cli['budget_ms'] = CLI_BUDGET_MS * budget_scale
+        report['cli'] = cli
+        if 'error' in cli:
+            report['failures'].append(f"单条命令分析失败 ({cli['error']})")
+        elif cli['wall_ms'] > cli['budget_ms']:
+            report['failures'].append(f"单条命令分析耗时 {cli['wall_ms']}ms 超出预算 {cli['budget_ms']}ms")
+
+    return report
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='检查命令行入口的导入耗时与冷启动耗时')
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help='每项测量的次数（取中位数）')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='预算缩放系数')
+    parser.add_argument('--module', action='append', choices=list(IMPORT_BUDGETS),
+                        help='只检查指定入口模块（可重复）')
+    args = parser.parse_args()
+
+    report = run_checks(args.runs, args.budget_scale, args.module)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if report['failures']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
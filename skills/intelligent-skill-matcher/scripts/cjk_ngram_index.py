@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+中文n-gram索引
+把技能元数据中的中文词条（名称、关键词、触发词、特殊关键词）拆成字符二元组/三元组，
+建立 n-gram -> [(技能ID, 权重)] 倒排表。中文命令只拆分一次，按n-gram查倒排表累加分数，
+不再对每个中文关键词做子串判断；各长度n-gram的权重可配置，单字命中不会压过短语命中。
+英文词条仍按原有的倒排索引匹配
+"""
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+from skill_index import SkillIndex
+from skill_terms import CHINESE_RUN_PATTERN, contains_chinese, iter_ngrams
+
+# 各长度n-gram的权重系数，乘以词条来源的权重（名称/关键词/触发词/特殊关键词）。
+# 单字只来自本身就是单字的词条（如 雨、风），不从长词中拆出
+DEFAULT_NGRAM_WEIGHTS = {
+    1: 0.5,
+    2: 1.0,
+    3: 1.5
+}
+
+# 只是较长词条片段的n-gram（如“文件备份”中的“文件”）再乘以该系数，
+# 使完整命中一个短词条的分数高于命中长词条的一部分
+FRAGMENT_WEIGHT = 0.5
+
+# 原始分数映射到0-10分时，得分等于该值的技能记为5分
+HALF_CONFIDENCE_SCORE = 4.5
+
+class CJKNgramIndex:
+    """技能元数据的中文n-gram倒排索引"""
+
+    def __init__(self, index: SkillIndex, weights: Optional[Dict[int, float]] = None,
+                 fragment_weight: float = FRAGMENT_WEIGHT):
+        """
+        Args:
+            index: 技能倒排索引（提供技能列表与英文词条）
+            weights: n-gram长度 -> 权重系数，缺省为 DEFAULT_NGRAM_WEIGHTS；系数为0的长度不建索引
+            fragment_weight: 词条片段的折扣系数
+        """
+        self.index = index
+        self.weights = dict(DEFAULT_NGRAM_WEIGHTS if weights is None else weights)
+        self.fragment_weight = fragment_weight
+        sizes = sorted(n for n, weight in self.weights.items() if weight > 0)
+
+        # n-gram -> [(技能ID, 权重)]；同一技能内取各词条中的最大权重，避免长词表重复计分
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for skill_id in range(len(index.skills)):
+            gram_weights: Dict[str, float] = {}
+            for term, source, source_weight in index.skill_terms[skill_id]:
+                for run in CHINESE_RUN_PATTERN.findall(term):
+                    for gram in iter_ngrams(run, sizes):
+                        weight = source_weight * self.weights[len(gram)]
+                        if gram != term:
+                            weight *= fragment_weight
+                        if weight > gram_weights.get(gram, 0.0):
+                            gram_weights[gram] = weight
+            for gram, weight in gram_weights.items():
+                self.postings.setdefault(gram, []).append((skill_id, weight))
+
+        # 命令中的n-gram需要覆盖索引中出现过的所有长度（含单字）
+        self.query_sizes = sorted(set(sizes) | {1})
+
+    def command_ngrams(self, command: str) -> Set[str]:
+        """把命令中的中文一次性拆成所有可能出现在索引中的n-gram"""
+        grams = set()
+        for run in CHINESE_RUN_PATTERN.findall(command):
+            for n in self.query_sizes:
+                grams.update(run[i:i + n] for i in range(len(run) - n + 1))
+        return grams
+
+    def raw_scores(self, command: str) -> Dict[int, float]:
+        """
+        计算命令对各技能的原始分数：中文部分按n-gram倒排表累加，
+        英文部分沿用技能索引中不含中文的词条
+
+        Args:
+            command: 已小写化的命令文本
+        """
+        scores: Dict[int, float] = {}
+        for skill_id, weight in self.index.always_postings:
+            scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        for term in self.index.find_terms(command):
+            if contains_chinese(term):
+                continue
+            for skill_id, weight in self.index.postings[term]:
+                scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        for gram in self.command_ngrams(command):
+            for skill_id, weight in self.postings.get(gram, ()):
+                scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        return scores
+
+    def top_k(self, command: str, k: int = 3, exclude: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """用堆选出原始分数最高的k个技能，同分时按技能顺序；exclude 中的技能不参与"""
+        scores = self.raw_scores(command)
+        items = scores.items()
+        if exclude:
+            items = [(skill_id, score) for skill_id, score in items if skill_id not in exclude]
+        return heapq.nlargest(k, items, key=lambda item: (item[1], -item[0]))
+
+    @staticmethod
+    def confidence(score: float) -> float:
+        """
+        把原始分数单调映射到0-10分
+
+        n-gram分数带小数权重，不适用固定权重模式的 normalize_score
+        （其中文低分段会放大分数，映射不单调）
+        """
+        return round(10.0 * score / (score + HALF_CONFIDENCE_SCORE), 2)
+
+    def matched_ngrams(self, command: str, skill_id: int) -> List[str]:
+        """命令与技能共同的中文n-gram，按权重从高到低"""
+        matched = []
+        for gram in self.command_ngrams(command):
+            for posting_skill_id, weight in self.postings.get(gram, ()):
+                if posting_skill_id == skill_id:
+                    matched.append((weight, gram))
+        return [gram for weight, gram in sorted(matched, reverse=True)]
+
+# 最近一次使用的n-gram索引，随技能索引一起复用
+_ngram_cache: Optional[Tuple[SkillIndex, Tuple, CJKNgramIndex]] = None
+
+def get_ngram_index(index: SkillIndex, weights: Optional[Dict[int, float]] = None,
+                    fragment_weight: float = FRAGMENT_WEIGHT) -> CJKNgramIndex:
+    """获取（必要时构建）技能索引对应的中文n-gram索引"""
+    global _ngram_cache
+    key = (tuple(sorted((DEFAULT_NGRAM_WEIGHTS if weights is None else weights).items())), fragment_weight)
+    if _ngram_cache is None or _ngram_cache[0] is not index or _ngram_cache[1] != key:
+        _ngram_cache = (index, key, CJKNgramIndex(index, weights, fragment_weight))
+    return _ngram_cache[2]
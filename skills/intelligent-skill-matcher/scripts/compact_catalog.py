@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+紧凑技能目录
+上万个技能时，每个技能一个dict、每个词条一个 (词条, 来源, 权重) 元组、
+倒排表里每个命中一个 (技能ID, 权重) 元组，对象头的开销远大于数据本身。
+CompactSkillIndex 与 SkillIndex 接口一致，但：
+
+- 技能记录为 __slots__ 对象，名称经 sys.intern 驻留
+- 词条驻留后编号，倒排表与每个技能的词条表按CSR方式存入 array('I')/array('d')
+- 多模式自动机为 aho_corasick.CompactAhoCorasick：转移表、失败指针和输出存入字符串和 array，
+  不再每个状态一个dict
+- postings / skill_terms 以只读视图提供，批量计分、n-gram、拼写容错等按原方式访问
+
+直接运行时生成合成技能目录，在子进程中分别构建两种索引并对比常驻内存（RSS）
+"""
+
+import os
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from aho_corasick import CompactAhoCorasick
+from matcher_metrics import current_rss_mb, instrumented
+from skill_index import SkillIndex
+from skill_terms import extract_skill_terms
+
+# 词条来源 <-> 编码（array('B')）
+TERM_SOURCES = ('name', 'keyword', 'trigger', 'special', 'fuzzy')
+SOURCE_CODES = {source: code for code, source in enumerate(TERM_SOURCES)}
+
+DEFAULT_REPORT_SIZES = [1000, 10000]
+
+class SkillRecord:
+    """技能记录；支持 record['name'] / record.get('path') 等与dict相同的读取方式"""
+
+    __slots__ = ('name', 'description', 'path')
+
+    def __init__(self, name: str, description: str, path: Optional[str] = None):
+        self.name = sys.intern(name)
+        self.description = description
+        self.path = path
+
+    @classmethod
+    def from_dict(cls, skill: Dict) -> 'SkillRecord':
+        return cls(skill['name'], skill['description'], skill.get('path'))
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__ or (key == 'path' and self.path is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and (key != 'path' or self.path is not None)
+
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+    def keys(self) -> List[str]:
+        return [key for key in self.__slots__ if key in self]
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"SkillRecord({self.to_dict()!r})"
+
+class _PostingsView(Mapping):
+    """词条 -> [(技能ID, 权重)] 的只读视图，按需从CSR数组还原"""
+
+    def __init__(self, index: 'CompactSkillIndex'):
+        self.index = index
+
+    def __getitem__(self, term: str) -> List[Tuple[int, float]]:
+        index = self.index
+        term_id = index.term_ids[term]
+        start, end = index.posting_ptr[term_id], index.posting_ptr[term_id + 1]
+        return list(zip(index.posting_skills[start:end], index.posting_weights[start:end]))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index.terms)
+
+    def __len__(self) -> int:
+        return len(self.index.terms)
+
+    def __contains__(self, term) -> bool:
+        return term in self.index.term_ids
+
+class _SkillTermsView(Sequence):
+    """技能ID -> [(词条, 来源, 权重)] 的只读视图"""
+
+    def __init__(self, index: 'CompactSkillIndex'):
+        self.index = index
+
+    def __getitem__(self, skill_id: int) -> List[Tuple[str, str, float]]:
+        index = self.index
+        if skill_id < 0:
+            skill_id += len(self)
+        if not 0 <= skill_id < len(self):
+            raise IndexError(skill_id)
+        start, end = index.skill_term_ptr[skill_id], index.skill_term_ptr[skill_id + 1]
+        vocabulary = index.vocabulary
+        return [(vocabulary[term_id], TERM_SOURCES[source], weight)
+                for term_id, source, weight in zip(index.skill_term_ids[start:end],
+                                                   index.skill_term_sources[start:end],
+                                                   index.skill_term_weights[start:end])]
+
+    def __len__(self) -> int:
+        return len(self.index.skill_term_ptr) - 1
+
+class CompactSkillIndex(SkillIndex):
+    """内存紧凑的技能倒排索引，查询结果与 SkillIndex 完全一致"""
+
+    def __init__(self, skills: List[Dict], skill_terms: Optional[List[List[Tuple[str, str, float]]]] = None):
+        """
+        Args:
+            skills: 技能列表（dict或SkillRecord）
+            skill_terms: 与skills一一对应的预提取词条，缺省时现场提取
+        """
+        self.skills: List[SkillRecord] = [
+            skill if isinstance(skill, SkillRecord) else SkillRecord.from_dict(skill) for skill in skills
+        ]
+        self.skill_ids = {skill.name: skill_id for skill_id, skill in enumerate(self.skills)}
+
+        # 词表：vocabulary[term_id] 为驻留后的词条；前 len(self.terms) 个为有倒排表的非空词条
+        self.term_ids: Dict[str, int] = {}
+        self.vocabulary: List[str] = []
+
+        # 每个技能的词条表（CSR）：skill_term_ptr[i]:skill_term_ptr[i+1] 为技能i的词条
+        self.skill_term_ptr = array('I', [0])
+        self.skill_term_ids = array('I')
+        self.skill_term_sources = array('B')
+        self.skill_term_weights = array('d')
+
+        # 构建期间的临时倒排表：词条ID -> ([技能ID], [权重])
+        building: Dict[int, Tuple[array, array]] = {}
+        self.always_postings: List[Tuple[int, float]] = []
+
+        for skill_id, skill in enumerate(self.skills):
+            terms = skill_terms[skill_id] if skill_terms is not None else extract_skill_terms(skill)
+            term_weights: Dict[int, float] = {}
+            for term, source, weight in terms:
+                term_id = self._intern_term(term)
+                self.skill_term_ids.append(term_id)
+                self.skill_term_sources.append(SOURCE_CODES[source])
+                self.skill_term_weights.append(weight)
+                term_weights[term_id] = term_weights.get(term_id, 0.0) + weight
+            self.skill_term_ptr.append(len(self.skill_term_ids))
+            for term_id, weight in term_weights.items():
+                if self.vocabulary[term_id]:
+                    skill_list, weight_list = building.setdefault(term_id, (array('I'), array('d')))
+                    skill_list.append(skill_id)
+                    weight_list.append(weight)
+                else:
+                    self.always_postings.append((skill_id, weight))
+
+        # 重新编号：有倒排表的词条按首次出现顺序排在前面，与自动机模式ID一致
+        order = sorted(building)
+        remap = {old_id: new_id for new_id, old_id in enumerate(order)}
+        extra = [term_id for term_id in range(len(self.vocabulary)) if term_id not in building]
+        for new_id, old_id in enumerate(extra, len(order)):
+            remap[old_id] = new_id
+        self.vocabulary = [self.vocabulary[old_id] for old_id in order + extra]
+        self.term_ids = {term: term_id for term_id, term in enumerate(self.vocabulary)}
+        self.skill_term_ids = array('I', (remap[term_id] for term_id in self.skill_term_ids))
+        self.terms = self.vocabulary[:len(order)]
+
+        # 倒排表（CSR）：posting_ptr[t]:posting_ptr[t+1] 为词条t的 (技能ID, 权重)
+        self.posting_ptr = array('I', [0])
+        self.posting_skills = array('I')
+        self.posting_weights = array('d')
+        for old_id in order:
+            skill_list, weight_list = building.pop(old_id)
+            self.posting_skills.extend(skill_list)
+            self.posting_weights.extend(weight_list)
+            self.posting_ptr.append(len(self.posting_skills))
+
+        self.postings = _PostingsView(self)
+        self.skill_terms = _SkillTermsView(self)
+        self.automaton = CompactAhoCorasick(self.terms)
+        self._build_exclusions()
+
+    def _intern_term(self, term: str) -> int:
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            term_id = self.term_ids[term] = len(self.vocabulary)
+            self.vocabulary.append(sys.intern(term))
+        return term_id
+
+    @instrumented('score_terms')
+    def scores_for_terms(self, hit_terms: Set[str]) -> Dict[int, float]:
+        """根据已命中的词条集合累计各技能的原始分数"""
+        scores: Dict[int, float] = {}
+        for skill_id, weight in self.always_postings:
+            scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        ptr, posting_skills, posting_weights = self.posting_ptr, self.posting_skills, self.posting_weights
+        for term in hit_terms:
+            term_id = self.term_ids[term]
+            for position in range(ptr[term_id], ptr[term_id + 1]):
+                skill_id = posting_skills[position]
+                scores[skill_id] = scores.get(skill_id, 0.0) + posting_weights[position]
+        return scores
+
+def measure_index_memory(catalog_dir: str, representation: str) -> Dict:
+    """在当前（子）进程中加载技能并构建指定表示的索引，返回构建前后的RSS"""
+    import gc
+    import time
+    from load_skills import load_available_skills
+
+    gc.collect()
+    baseline = current_rss_mb()
+    start = time.perf_counter()
+    skills = load_available_skills([catalog_dir])
+    if representation == 'compact':
+        index = CompactSkillIndex(skills)
+    else:
+        index = SkillIndex(skills)
+    build_seconds = time.perf_counter() - start
+    # 只保留索引本身（daemon中加载后的技能列表同样只由索引持有）
+    del skills
+    gc.collect()
+
+    return {
+        'representation': representation,
+        'skills': len(index.skills),
+        'terms': len(index.terms),
+        'build_ms': round(build_seconds * 1000, 3),
+        'rss_mb': round(current_rss_mb() - baseline, 2)
+    }
+
+def memory_report(sizes: List[int], seed: int, catalog_root: Optional[str] = None) -> Dict:
+    """对每个规模在独立子进程中分别测量dict表示与紧凑表示的内存占用"""
+    import json
+    import shutil
+    import subprocess
+    import tempfile
+    from benchmark_matcher import write_catalog
+
+    temp_root = None if catalog_root else tempfile.mkdtemp(prefix='skill-compact-')
+    root = catalog_root or temp_root
+    results = []
+    try:
+        for size in sizes:
+            catalog_dir = os.path.join(root, f'catalog-{size}')
+            if not os.path.isdir(catalog_dir):
+                write_catalog(catalog_dir, size, seed)
+            row = {'catalog_size': size}
+            for representation in ('dict', 'compact'):
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--worker',
+                     '--catalog-dir', catalog_dir, '--representation', representation],
+                    capture_output=True, text=True
+                )
+                if completed.returncode != 0:
+                    error_lines = completed.stderr.strip().splitlines() or ['未知错误']
+                    row[representation] = {'error': error_lines[-1]}
+                else:
+                    row[representation] = json.loads(completed.stdout)
+            if 'rss_mb' in row['dict'] and 'rss_mb' in row['compact'] and row['dict']['rss_mb'] > 0:
+                row['saved_ratio'] = round(1 - row['compact']['rss_mb'] / row['dict']['rss_mb'], 4)
+            print(f"[{size} skills] dict={row['dict'].get('rss_mb')}MB "
+                  f"compact={row['compact'].get('rss_mb')}MB", file=sys.stderr, flush=True)
+            results.append(row)
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+    return {'python': sys.version.split()[0], 'seed': seed, 'results': results}
+
+def main():
+    import argparse
+    import json
+    from benchmark_matcher import DEFAULT_SEED
+
+    parser = argparse.ArgumentParser(description='对比dict表示与紧凑表示的技能索引内存占用（RSS）')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_REPORT_SIZES, help='合成技能数量')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--catalog-dir', help='合成技能目录的保存位置（--worker 时为要测量的目录）')
+    parser.add_argument('--output', help='把JSON报告写入文件')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--representation', choices=['dict', 'compact'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(measure_index_memory(args.catalog_dir, args.representation)))
+        return
+
+    report = memory_report(args.sizes, args.seed, args.catalog_dir)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+拼写容错索引
+对技能名称和主要英文关键词预先计算删除字典（SymSpell）：每个词删去至多2个字符
+得到的所有变体 -> 原词。查询时只需生成命令词的删除变体并查表，再用
+Damerau-Levenshtein（OSA）距离校验候选，不必对全部词表逐个计算编辑距离。
+命中的词按编辑距离打折后计入分数，"githbu"、"sonso"、"backpu" 也能匹配
+"""
+
+import re
+from typing import Dict, List, Set, Tuple
+
+from skill_index import SkillIndex
+
+# 编辑距离 -> 权重系数（乘以原词条权重）
+FUZZY_WEIGHTS = {
+    1: 0.6,
+    2: 0.3
+}
+
+MAX_EDIT_DISTANCE = 2
+
+# 参与容错的词最短长度；更短的词编辑1次就可能变成另一个常见词
+MIN_FUZZY_LENGTH = 4
+
+# 词长度达到该值时才允许编辑距离2
+MIN_LENGTH_FOR_DISTANCE_2 = 6
+
+# 容错索引覆盖的词条来源：技能名称、描述关键词和特殊关键词
+FUZZY_SOURCES = ('name', 'keyword', 'special')
+
+WORD_PATTERN = re.compile(r'[a-z0-9][a-z0-9\-]*')
+
+def max_distance_for(word: str) -> int:
+    """按词长度允许的最大编辑距离"""
+    if len(word) < MIN_FUZZY_LENGTH:
+        return 0
+    if len(word) < MIN_LENGTH_FOR_DISTANCE_2:
+        return 1
+    return MAX_EDIT_DISTANCE
+
+def generate_deletes(word: str, max_distance: int) -> Set[str]:
+    """删去至多max_distance个字符得到的全部变体（含原词）"""
+    deletes = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for candidate in frontier:
+            for i in range(len(candidate)):
+                next_frontier.add(candidate[:i] + candidate[i + 1:])
+        deletes |= next_frontier
+        frontier = next_frontier
+    return deletes
+
+def edit_distance(source: str, target: str, max_distance: int) -> int:
+    """
+    OSA编辑距离（插入、删除、替换、相邻字符交换各计1次）
+
+    Returns:
+        距离；超过max_distance时返回 max_distance + 1
+    """
+    if abs(len(source) - len(target)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(target) + 1))
+    for i in range(1, len(source) + 1):
+        current = [i] + [0] * len(target)
+        row_min = current[0]
+        for j in range(1, len(target) + 1):
+            cost = 0 if source[i - 1] == target[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (i > 1 and j > 1 and source[i - 1] == target[j - 2]
+                    and source[i - 2] == target[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+            row_min = min(row_min, current[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+
+    distance = previous[len(target)]
+    return distance if distance <= max_distance else max_distance + 1
+
+class FuzzyTermIndex:
+    """技能名称与英文关键词的SymSpell删除字典"""
+
+    def __init__(self, index: SkillIndex):
+        self.index = index
+
+        # 可容错的词：单个英文词（允许连字符，如技能名 multi-memory-manager）
+        self.words: Set[str] = set()
+        for terms in index.skill_terms:
+            for term, source, weight in terms:
+                if (source in FUZZY_SOURCES and len(term) >= MIN_FUZZY_LENGTH
+                        and WORD_PATTERN.fullmatch(term)):
+                    self.words.add(term)
+
+        # 删除变体 -> 原词
+        self.deletes: Dict[str, List[str]] = {}
+        for word in sorted(self.words):
+            for variant in generate_deletes(word, max_distance_for(word)):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def lookup(self, token: str) -> List[Tuple[str, int]]:
+        """
+        查找与token编辑距离最小（且不超过允许距离）的词
+
+        要求首字母相同：拼写错误很少出现在首字母，这一限制能排除大量误匹配
+        （如 main -> rain）
+
+        Returns:
+            [(词, 距离)]，按词排序；token本身就是词表中的词时返回空列表
+        """
+        max_distance = max_distance_for(token)
+        if max_distance == 0 or token in self.words:
+            return []
+
+        best_distance = max_distance + 1
+        best_words: List[str] = []
+        seen = set()
+        for variant in generate_deletes(token, max_distance):
+            for word in self.deletes.get(variant, ()):
+                if word in seen or word[0] != token[0]:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, min(max_distance, max_distance_for(word)))
+                if distance < best_distance:
+                    best_distance = distance
+                    best_words = [word]
+                elif distance == best_distance:
+                    best_words.append(word)
+
+        if best_distance > max_distance:
+            return []
+        return [(word, best_distance) for word in sorted(best_words)]
+
+    def fuzzy_traces(self, command: str, hit_terms: Set[str]) -> Dict[int, List[Tuple[str, str, float]]]:
+        """
+        命令中拼写有误的词对各技能的容错匹配轨迹
+
+        Args:
+            command: 已小写化的命令文本
+            hit_terms: 精确命中的词条；已精确命中的词不再重复计分
+
+        Returns:
+            技能ID -> [("原词→纠正词", "fuzzy", 折扣后的权重)]
+        """
+        corrections: Dict[str, Tuple[str, int]] = {}
+        for token in set(WORD_PATTERN.findall(command)):
+            for word, distance in self.lookup(token):
+                if word in hit_terms:
+                    continue
+                # 多个拼写错误指向同一个词时只计一次，取距离最小的
+                if word not in corrections or distance < corrections[word][1]:
+                    corrections[word] = (token, distance)
+
+        traces: Dict[int, List[Tuple[str, str, float]]] = {}
+        for word in sorted(corrections):
+            token, distance = corrections[word]
+            for skill_id, weight in self.index.postings[word]:
+                traces.setdefault(skill_id, []).append(
+                    (f"{token}→{word}", 'fuzzy', weight * FUZZY_WEIGHTS[distance]))
+        return traces
+
+# 最近一次使用的容错索引，随技能索引一起复用
+_fuzzy_cache = None
+
+def get_fuzzy_index(index: SkillIndex) -> FuzzyTermIndex:
+    """获取（必要时构建）技能索引对应的拼写容错索引"""
+    global _fuzzy_cache
+    if _fuzzy_cache is None or _fuzzy_cache.index is not index:
+        _fuzzy_cache = FuzzyTermIndex(index)
+    return _fuzzy_cache
@@ -6,67 +6,92 @@
 
 import os
 import re
-from typing import List, Dict
+from typing import Dict, List, Optional
 
-def load_available_skills() -> List[Dict]:
+from matcher_metrics import instrumented
+from skill_registry import SkillEntry, get_registry
+
+# 定义要搜索的技能目录
+SKILL_DIRS = [
+    "/home/kousoyu/.openclaw/workspace/skills/",
+    "/home/kousoyu/.npm-global/lib/node_modules/openclaw/skills/",
+    "/home/kousoyu/.agents/skills/"
+]
+
+# frontmatter字段（每个SKILL.md解析一次，预编译避免重复查找正则缓存）
+NAME_FIELD_PATTERN = re.compile(r'name:\s*(.+)', re.IGNORECASE)
+DESCRIPTION_FIELD_PATTERN = re.compile(r'description:\s*(.+)', re.IGNORECASE)
+
+# 一些关键的内置技能（技能目录中没找到时补充）
+BUILT_IN_SKILLS = {
+    'github': 'GitHub operations via `gh` CLI: issues, PRs, CI runs, code review, API queries. Use when: (1) checking PR status or CI, (2) creating/commenting on issues, (3) listing/filtering PRs or issues, (4) viewing run logs.',
+    'weather': 'Get current weather and forecasts via wttr.in or Open-Meteo. Use when: user asks about weather, temperature, or forecasts for any location. NOT for: historical weather data, severe weather alerts, or detailed meteorological analysis. No API key needed.',
+    'backup': 'Advanced backup and restore system with intelligent scheduling, multiple storage backends, encryption, and AI-powered retention policies. Supports cloud storage, local backups, incremental snapshots, and automated recovery testing.',
+    'healthcheck': 'Host security hardening and risk-tolerance configuration for OpenClaw deployments. Use when a user asks for security audits, firewall/SSH/update hardening, risk posture, exposure review, OpenClaw cron scheduling for periodic checks, or version status checks on a machine running OpenClaw (laptop, workstation, Pi, VPS).',
+    'sonoscli': 'Control Sonos speakers (discover/status/play/volume/group).',
+    'concise-output': 'Optimize text output to be concise, clear, and well-formatted. Use when user requests responses that are non-redundant, focused on key points, easy to understand, appropriately detailed without being verbose, and visually clean with good formatting.',
+    'find': 'Locate anything with progressive search expansion, multi-source validation, and iterative refinement until found.',
+    'multi-memory-manager': 'Multi-module memory management system with different retention policies for core instructions, working context, and session history.',
+    'skill-evolution-manager': '智能技能进化管理系统：自动分类、审计和升级OpenClaw技能，按功能分组（安全与审计、文件管理、通信协作等），执行严格的代码审计，支持24小时周期性自我升级，优先级低于当前任务。'
+}
+
+@instrumented('load_available_skills')
+def load_available_skills(skill_dirs: Optional[List[str]] = None) -> List[Dict]:
     """
     从多个目录加载所有可用技能
     
+    Args:
+        skill_dirs: 要扫描的技能目录，默认为 SKILL_DIRS
+        
     Returns:
-        技能列表，每个技能包含name和description
+        技能列表，每个技能包含name、description和path（内置技能无path）
     """
     skills = []
     
-    # 定义要搜索的技能目录
-    skill_dirs = [
-        "/home/kousoyu/.openclaw/workspace/skills/",
-        "/home/kousoyu/.npm-global/lib/node_modules/openclaw/skills/",
-        "/home/kousoyu/.agents/skills/"
-    ]
-    
-    # 从每个目录加载技能
-    for skill_dir in skill_dirs:
-        if os.path.exists(skill_dir):
-            for item in os.listdir(skill_dir):
-                item_path = os.path.join(skill_dir, item)
-                if os.path.isdir(item_path):
-                    # 尝试读取SKILL.md文件
-                    skill_md_path = os.path.join(item_path, "SKILL.md")
-                    if os.path.exists(skill_md_path):
-                        try:
-                            with open(skill_md_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            # 提取YAML frontmatter中的name和description
-                            name, description = extract_skill_metadata(content)
-                            if name and description:
-                                skills.append({
-                                    'name': name,
-                                    'description': description
-                                })
-                        except Exception as e:
-                            # 如果解析失败，使用目录名作为技能名
-                            skills.append({
-                                'name': item,
-                                'description': f"Skill from directory: {item}"
-                            })
+    # 从每个目录加载技能：注册表只重新读取新增或变化的SKILL.md
+    for entry in get_registry().entries(skill_dirs or SKILL_DIRS):
+        skill = entry.parse('load_skills', skill_from_entry)
+        if skill:
+            skills.append(dict(skill))
     
-    # 添加一些关键的内置技能（如果上面没找到）
-    built_in_skills = {
-        'github': 'GitHub operations via `gh` CLI: issues, PRs, CI runs, code review, API queries. Use when: (1) checking PR status or CI, (2) creating/commenting on issues, (3) listing/filtering PRs or issues, (4) viewing run logs.',
-        'weather': 'Get current weather and forecasts via wttr.in or Open-Meteo. Use when: user asks about weather, temperature, or forecasts for any location. NOT for: historical weather data, severe weather alerts, or detailed meteorological analysis. No API key needed.',
-        'backup': 'Advanced backup and restore system with intelligent scheduling, multiple storage backends, encryption, and AI-powered retention policies. Supports cloud storage, local backups, incremental snapshots, and automated recovery testing.',
-        'healthcheck': 'Host security hardening and risk-tolerance configuration for OpenClaw deployments. Use when a user asks for security audits, firewall/SSH/update hardening, risk posture, exposure review, OpenClaw cron scheduling for periodic checks, or version status checks on a machine running OpenClaw (laptop, workstation, Pi, VPS).',
-        'sonoscli': 'Control Sonos speakers (discover/status/play/volume/group).',
-        'concise-output': 'Optimize text output to be concise, clear, and well-formatted. Use when user requests responses that are non-redundant, focused on key points, easy to understand, appropriately detailed without being verbose, and visually clean with good formatting.',
-        'find': 'Locate anything with progressive search expansion, multi-source validation, and iterative refinement until found.',
-        'multi-memory-manager': 'Multi-module memory management system with different retention policies for core instructions, working context, and session history.',
-        'skill-evolution-manager': '智能技能进化管理系统：自动分类、审计和升级OpenClaw技能，按功能分组（安全与审计、文件管理、通信协作等），执行严格的代码审计，支持24小时周期性自我升级，优先级低于当前任务。'
+    return merge_skills(skills)
+
+def parse_skill_content(item: str, skill_md_path: str, content: str) -> Optional[Dict]:
+    """从SKILL.md内容中解析技能，缺少name或description时返回None"""
+    # 提取YAML frontmatter中的name和description
+    name, description = extract_skill_metadata(content)
+    if name and description:
+        return {
+            'name': name,
+            'description': description,
+            'path': skill_md_path
+        }
+    return None
+
+def _directory_skill(item: str, skill_md_path: str) -> Dict:
+    """SKILL.md无法读取时以目录名作为技能名"""
+    return {
+        'name': item,
+        'description': f"Skill from directory: {item}",
+        'path': skill_md_path
     }
+
+def skill_from_entry(entry: SkillEntry) -> Optional[Dict]:
+    """注册表条目的解析函数（结果由注册表缓存，使用方需复制后再修改）"""
+    if entry.header is None:
+        return _directory_skill(entry.item, entry.path)
+    try:
+        return parse_skill_content(entry.item, entry.path, entry.header)
+    except Exception:
+        return _directory_skill(entry.item, entry.path)
+
+def merge_skills(skills: List[Dict]) -> List[Dict]:
+    """补充内置技能并按名称去重（先出现的优先）"""
+    skills = list(skills)
     
     # 检查是否已经加载了这些内置技能
     existing_names = {skill['name'].lower() for skill in skills}
-    for name, description in built_in_skills.items():
+    for name, description in BUILT_IN_SKILLS.items():
         if name.lower() not in existing_names:
             skills.append({
                 'name': name,
@@ -95,12 +120,12 @@ def extract_skill_metadata(content: str) -> tuple[str, str]:
         if len(parts) >= 3:
             yaml_content = parts[1]
             # 提取name
-            name_match = re.search(r'name:\s*(.+)', yaml_content, re.IGNORECASE)
+            name_match = NAME_FIELD_PATTERN.search(yaml_content)
             if name_match:
                 name = name_match.group(1).strip().strip('"\'')
             
             # 提取description
-            desc_match = re.search(r'description:\s*(.+)', yaml_content, re.IGNORECASE)
+            desc_match = DESCRIPTION_FIELD_PATTERN.search(yaml_content)
             if desc_match:
                 description = desc_match.group(1).strip().strip('"\'')
     
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+MinHash/LSH候选剪枝
+为每个技能的特征集合（名称、描述、触发词、特殊关键词切分出的词项）计算MinHash签名，
+按band分桶建立LSH表。命令先计算自己的签名，取与之在任一band上碰撞的技能作为候选，
+只对候选调用完整的 calculate_match_score。recall 参数控制band数量（召回率与速度的权衡），
+技能较少、recall=1 或候选中没有任何匹配时改用倒排索引上的固定权重评分（结果与全量扫描相同）
+"""
+
+import math
+import zlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from matcher_metrics import instrumented
+from skill_index import SkillIndex
+from skill_terms import SPECIAL_KEYWORDS, extract_triggers, tokenize
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖
+    np = None
+
+# 默认目标召回率：与命令只共享一个词项、Jaccard相似度为 REFERENCE_SIMILARITY 的技能
+# 被选为候选的概率
+DEFAULT_RECALL = 0.9
+REFERENCE_SIMILARITY = 0.05
+
+# 每个band的行数；短命令与长描述的Jaccard相似度很低，多行band几乎不会碰撞
+DEFAULT_ROWS = 1
+MAX_PERMUTATIONS = 512
+
+# 技能数少于该值时剪枝没有收益，直接全量扫描
+MIN_CATALOG_SIZE = 200
+
+# 哈希参数：h(x) = (a * x + b) mod P，P为梅森素数 2^31-1，乘积不超过int64
+HASH_PRIME = (1 << 31) - 1
+DEFAULT_SEED = 1
+
+def bands_for_recall(recall: float, rows: int = DEFAULT_ROWS,
+                     similarity: float = REFERENCE_SIMILARITY) -> int:
+    """
+    达到目标召回率所需的band数
+
+    相似度为s的技能在b个band（每band r行）中至少碰撞一次的概率为 1-(1-s^r)^b
+    """
+    collision = similarity ** rows
+    bands = math.ceil(math.log(1.0 - recall) / math.log(1.0 - collision))
+    return max(1, min(bands, MAX_PERMUTATIONS // rows))
+
+def skill_features(skill: Dict) -> Set[str]:
+    """技能的特征集合：名称、描述、触发词和特殊关键词的词项"""
+    description = skill['description'].lower()
+    name = skill['name'].lower()
+    texts = [name, description] + extract_triggers(description) + SPECIAL_KEYWORDS.get(name, [])
+    features = set()
+    for text in texts:
+        features.update(tokenize(text))
+    return features
+
+def feature_hash(feature: str) -> int:
+    """跨进程稳定的特征哈希（不受PYTHONHASHSEED影响）"""
+    return zlib.crc32(feature.encode('utf-8')) & HASH_PRIME
+
+class MinHashLSH:
+    """技能特征集合的MinHash LSH索引"""
+
+    def __init__(self, index: SkillIndex, recall: float = DEFAULT_RECALL, rows: int = DEFAULT_ROWS,
+                 seed: int = DEFAULT_SEED):
+        self.index = index
+        self.recall = recall
+        self.rows = rows
+        self.full_scan_only = recall >= 1.0 or len(index.skills) < MIN_CATALOG_SIZE
+        self.bands = 0 if self.full_scan_only else bands_for_recall(recall, rows)
+        num_perm = self.bands * rows
+
+        # 线性哈希族的参数，同一seed生成相同的签名
+        state = seed
+        self.hash_a: List[int] = []
+        self.hash_b: List[int] = []
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            self.hash_a.append(1 + (state >> 33) % (HASH_PRIME - 1))
+            state = (state * 6364136223846793005 + 1442695040888963407) % (1 << 64)
+            self.hash_b.append((state >> 33) % HASH_PRIME)
+        if np is not None:
+            self.np_hash_a = np.array(self.hash_a, dtype=np.int64)
+            self.np_hash_b = np.array(self.hash_b, dtype=np.int64)
+
+        # band序号 -> {band签名: [技能ID]}
+        self.tables: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(self.bands)]
+        if not self.full_scan_only:
+            for skill_id, skill in enumerate(index.skills):
+                signature = self.signature(skill_features(skill))
+                if signature is None:
+                    continue
+                for band, key in enumerate(self._band_keys(signature)):
+                    self.tables[band].setdefault(key, []).append(skill_id)
+
+    def signature(self, features: Set[str]) -> Optional[List[int]]:
+        """特征集合的MinHash签名；空集合返回None"""
+        if not features:
+            return None
+        hashes = [feature_hash(feature) for feature in features]
+        if np is not None:
+            values = np.array(hashes, dtype=np.int64)
+            matrix = (np.outer(values, self.np_hash_a) + self.np_hash_b) % HASH_PRIME
+            return matrix.min(axis=0).tolist()
+        return [min((a * value + b) % HASH_PRIME for value in hashes)
+                for a, b in zip(self.hash_a, self.hash_b)]
+
+    def _band_keys(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    @instrumented('lsh_candidates')
+    def candidates(self, command: str) -> Optional[Set[int]]:
+        """
+        命令的候选技能
+
+        Returns:
+            候选技能ID集合；需要全量扫描时返回None
+        """
+        if self.full_scan_only:
+            return None
+        signature = self.signature(set(tokenize(command)))
+        if signature is None:
+            return set()
+        candidates: Set[int] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self.tables[band].get(key, ()))
+        return candidates
+
+# 最近一次使用的LSH索引，随技能索引一起复用
+_lsh_cache: Optional[Tuple[SkillIndex, Tuple, MinHashLSH]] = None
+
+def get_lsh_index(index: SkillIndex, recall: Optional[float] = None,
+                  rows: Optional[int] = None) -> MinHashLSH:
+    """
+    获取（必要时构建）技能索引对应的LSH索引
+
+    recall/rows 为None时沿用该技能索引已构建的LSH索引（没有时按默认参数构建），
+    因此可以先用指定参数构建一次，之后的 analyze_user_command(mode='lsh') 都会使用它
+    """
+    global _lsh_cache
+    if _lsh_cache is not None and _lsh_cache[0] is index:
+        cached_recall, cached_rows = _lsh_cache[1]
+        if recall in (None, cached_recall) and rows in (None, cached_rows):
+            return _lsh_cache[2]
+    key = (DEFAULT_RECALL if recall is None else recall, DEFAULT_ROWS if rows is None else rows)
+    _lsh_cache = (index, key, MinHashLSH(index, *key))
+    return _lsh_cache[2]
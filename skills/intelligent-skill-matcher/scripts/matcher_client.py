@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+技能匹配服务客户端
+优先通过Unix域套接字请求常驻的 matcher_daemon；服务未运行或无响应时
+退回当前进程内匹配，调用方无需关心服务是否在线
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import Dict, List, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SOCKET_PATH = os.environ.get(
+    'SKILL_MATCHER_SOCKET',
+    os.path.join(os.path.dirname(current_dir), 'cache', 'matcher.sock')
+)
+
+# 等待服务应答的超时时间（秒）
+DEFAULT_TIMEOUT = 2.0
+
+def request_daemon(request: Dict, socket_path: str = DEFAULT_SOCKET_PATH,
+                   timeout: float = DEFAULT_TIMEOUT) -> Optional[Dict]:
+    """
+    向匹配服务发送一个请求
+
+    Returns:
+        服务的应答；服务未运行、超时或应答无效时返回None
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+
+            buffer = b''
+            while not buffer.endswith(b'\n'):
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                buffer += chunk
+        response = json.loads(buffer)
+    except (OSError, ValueError):
+        return None
+
+    return response if response.get('ok') else None
+
+def _local_analyze(commands: List[str]) -> List[Dict]:
+    """进程内匹配（服务不可用时的回退路径），与服务一样加载所监视技能目录中的技能"""
+    if current_dir not in sys.path:
+        sys.path.append(current_dir)
+    import load_skills
+    from analyze_command import analyze_user_commands, load_default_index
+    return analyze_user_commands(commands, load_default_index(skill_dirs=load_skills.SKILL_DIRS))
+
+def analyze(command: str, socket_path: str = DEFAULT_SOCKET_PATH,
+            timeout: float = DEFAULT_TIMEOUT) -> Dict:
+    """分析单条命令，结果结构与 analyze_user_command 相同"""
+    response = request_daemon({'command': command}, socket_path, timeout)
+    if response is not None:
+        return response['result']
+    return _local_analyze([command])[0]
+
+def analyze_many(commands: List[str], socket_path: str = DEFAULT_SOCKET_PATH,
+                 timeout: float = DEFAULT_TIMEOUT) -> List[Dict]:
+    """批量分析命令，结果结构与 analyze_user_commands 相同"""
+    response = request_daemon({'commands': commands}, socket_path, timeout)
+    if response is not None:
+        return response['results']
+    return _local_analyze(commands)
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python matcher_client.py <command>")
+        sys.exit(1)
+
+    result = analyze(sys.argv[1])
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
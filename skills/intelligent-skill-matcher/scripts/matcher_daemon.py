@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+常驻技能匹配服务
+在内存中保持编译好的技能索引，通过本地Unix域套接字应答JSON请求，
+避免每次路由决策都付出解释器启动、模块导入和技能加载的开销；
+技能目录发生变化时自动重新加载索引
+
+协议：每个请求和响应都是一行JSON
+    {"command": "..."}          -> {"ok": true, "result": {...}}
+    {"commands": ["...", ...]}  -> {"ok": true, "results": [...]}
+    请求中加 "fuzzy": true 启用拼写容错，"debug": true 附上各阶段耗时
+    {"op": "ping"}              -> {"ok": true, "skills": 9, "generation": 1}
+    {"op": "reload"}            -> {"ok": true, "skills": 9, "generation": 2}
+    {"op": "stats"}             -> {"ok": true, "cache": {"hits": 3, "misses": 1, ...}}
+    {"op": "metrics"}           -> {"ok": true, "stages": {...}}（需以 SKILL_MATCHER_METRICS=1 启动）
+"""
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Dict, Optional
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+from analyze_command import analyze_user_command, analyze_user_commands, load_default_index
+import load_skills
+import matcher_metrics
+from matcher_client import DEFAULT_SOCKET_PATH
+from result_cache import DEFAULT_MAX_SIZE, DEFAULT_TTL, ResultCache
+from skill_registry import get_registry
+
+# 检查技能目录变化的间隔（秒）
+DEFAULT_POLL_INTERVAL = 2.0
+
+def skill_dirs_version() -> int:
+    """技能目录的注册表版本：SKILL.md的增删改都会使版本递增（有inotify时无事件即不扫描）"""
+    return get_registry().refresh(load_skills.SKILL_DIRS)
+
+class MatcherState:
+    """服务端持有的技能索引，重新加载时整体替换"""
+
+    def __init__(self, model_path: Optional[str] = None, cache_size: int = DEFAULT_MAX_SIZE,
+                 cache_ttl: float = DEFAULT_TTL, compact: bool = False):
+        self.model_path = model_path
+        self.compact = compact
+        self.cache = ResultCache(cache_size, cache_ttl)
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.registry_version = None
+        self.index = None
+        self.reload()
+
+    def reload(self):
+        """重新加载技能索引"""
+        with self.lock:
+            registry_version = skill_dirs_version()
+            # 没有编译产物时也从所监视的技能目录加载，目录变化后重新加载的才是实际的技能
+            self.index = load_default_index(self.model_path, self.compact, load_skills.SKILL_DIRS)
+            self.registry_version = registry_version
+            self.generation += 1
+
+    def reload_if_changed(self) -> bool:
+        """技能目录有变化时重新加载，返回是否重新加载"""
+        if skill_dirs_version() != self.registry_version:
+            self.reload()
+            return True
+        return False
+
+    def handle(self, request: Dict) -> Dict:
+        """处理一个JSON请求"""
+        index = self.index
+        op = request.get('op', 'analyze')
+
+        if op == 'ping':
+            return {'ok': True, 'skills': len(index.skills), 'generation': self.generation}
+        if op == 'reload':
+            self.reload()
+            return {'ok': True, 'skills': len(self.index.skills), 'generation': self.generation}
+        if op == 'stats':
+            return {'ok': True, 'cache': self.cache.stats(), 'generation': self.generation}
+        if op == 'metrics':
+            return {'ok': True, 'enabled': matcher_metrics.is_enabled(), 'stages': matcher_metrics.snapshot()}
+        if op != 'analyze':
+            return {'ok': False, 'error': f"未知操作: {op}"}
+
+        fuzzy = bool(request.get('fuzzy'))
+        debug = bool(request.get('debug'))
+        if 'commands' in request:
+            return {'ok': True, 'results': analyze_user_commands(request['commands'], index, fuzzy=fuzzy)}
+        if 'command' in request:
+            return {'ok': True, 'result': analyze_user_command(request['command'], index, cache=self.cache,
+                                                               fuzzy=fuzzy, debug=debug)}
+        return {'ok': False, 'error': "请求缺少 command 或 commands 字段"}
+
+class MatcherRequestHandler(socketserver.StreamRequestHandler):
+    """按行读取JSON请求并逐行应答，同一连接可以发送多个请求"""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.state.handle(json.loads(line))
+            except Exception as e:
+                response = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+class MatcherServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """多线程Unix域套接字服务"""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, state: MatcherState):
+        self.state = state
+        super().__init__(socket_path, MatcherRequestHandler)
+
+def _remove_stale_socket(socket_path: str):
+    """启动前清理残留的套接字文件；已有服务在运行时拒绝启动"""
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"技能匹配服务已在运行: {socket_path}")
+    finally:
+        probe.close()
+
+def _watch_skill_dirs(state: MatcherState, interval: float, stop_event: threading.Event):
+    """后台检查技能注册表版本，技能目录发生变化时重新加载"""
+    while not stop_event.wait(interval):
+        try:
+            if state.reload_if_changed():
+                print(f"🔄 技能目录已变化，索引已重新加载 (第{state.generation}代)", flush=True)
+        except Exception as e:
+            print(f"⚠️ 重新加载技能索引失败: {e}", flush=True)
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, model_path: Optional[str] = None,
+          poll_interval: float = DEFAULT_POLL_INTERVAL, cache_size: int = DEFAULT_MAX_SIZE,
+          cache_ttl: float = DEFAULT_TTL, compact: bool = False):
+    """启动技能匹配服务，直到收到SIGINT/SIGTERM"""
+    os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+    _remove_stale_socket(socket_path)
+
+    state = MatcherState(model_path, cache_size, cache_ttl, compact)
+    server = MatcherServer(socket_path, state)
+    os.chmod(socket_path, 0o600)
+
+    stop_event = threading.Event()
+    watcher = threading.Thread(target=_watch_skill_dirs, args=(state, poll_interval, stop_event), daemon=True)
+    watcher.start()
+
+    def _shutdown(signum, frame):
+        stop_event.set()
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _shutdown)
+    signal.signal(signal.SIGINT, _shutdown)
+
+    print(f"✅ 技能匹配服务已启动: {socket_path} ({len(state.index.skills)} 个技能)", flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        stop_event.set()
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        print("技能匹配服务已停止", flush=True)
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='常驻技能匹配服务')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET_PATH, help='Unix域套接字路径')
+    parser.add_argument('--model', help='编译产物路径（默认 cache/compiled_matcher.json）')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help='检查技能目录变化的间隔（秒）')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_MAX_SIZE,
+                        help='结果缓存的最大条目数（0为不缓存）')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL,
+                        help='结果缓存的存活时间（秒，0为不过期）')
+    parser.add_argument('--compact', action='store_true',
+                        help='使用内存紧凑的技能索引（大规模技能目录时减少常驻内存）')
+    args = parser.parse_args()
+
+    serve(args.socket, args.model, args.poll, args.cache_size, args.cache_ttl, args.compact)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+匹配流程分阶段耗时统计
+用 @instrumented(阶段名) 包装技能加载、关键词/触发词提取、计分和摘要生成等函数，
+启用后把每次调用的耗时记入该阶段的直方图，可导出为JSON；
+analyze_user_command(debug=True) 还会把本次调用各阶段的耗时放进结果的 debug 字段。
+默认关闭，关闭时每次调用只多一次标志判断。阶段耗时包含其内部调用的其他阶段。
+另提供进程常驻内存（RSS）的读取，供各基准脚本使用
+"""
+
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+# 直方图桶上界（毫秒），最后一个桶收集更慢的调用
+BUCKET_BOUNDS_MS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+# 设置该环境变量为非空值时，导入即启用统计
+METRICS_ENV_VAR = 'SKILL_MATCHER_METRICS'
+
+class Histogram:
+    """单个阶段的耗时直方图"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+
+    def record(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.min_ms = elapsed_ms if self.min_ms is None else min(self.min_ms, elapsed_ms)
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_MS, elapsed_ms)] += 1
+
+    def quantile(self, q: float) -> float:
+        """按桶估算分位数（返回所在桶的上界，最后一个桶返回最大值）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= target:
+                return BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        bounds = [f"<={bound}" for bound in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}"]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 4),
+            'mean_ms': round(self.total_ms / self.count, 4) if self.count else 0.0,
+            'min_ms': round(self.min_ms or 0.0, 4),
+            'max_ms': round(self.max_ms, 4),
+            'p50_ms': self.quantile(0.5),
+            'p99_ms': self.quantile(0.99),
+            'buckets': {bound: count for bound, count in zip(bounds, self.buckets) if count}
+        }
+
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_enabled = bool(os.environ.get(METRICS_ENV_VAR))
+# 正在进行的 collect() 数量；大于0时即使未启用直方图也要计时
+_active_collectors = 0
+_local = threading.local()
+
+def enable():
+    """启用直方图统计"""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """停用直方图统计（已记录的数据保留）"""
+    global _enabled
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def reset():
+    """清空全部直方图"""
+    with _lock:
+        _histograms.clear()
+
+def record(stage: str, elapsed_ms: float):
+    """记录一次阶段耗时"""
+    if _enabled:
+        with _lock:
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = Histogram()
+            histogram.record(elapsed_ms)
+
+    collectors: List[Dict] = getattr(_local, 'collectors', None)
+    if collectors:
+        for stages in collectors:
+            stats = stages.setdefault(stage, {'calls': 0, 'total_ms': 0.0})
+            stats['calls'] += 1
+            stats['total_ms'] += elapsed_ms
+
+def instrumented(stage: str) -> Callable:
+    """函数装饰器：统计启用或有 collect() 进行时记录每次调用的耗时"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled and not _active_collectors:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+@contextmanager
+def collect() -> Iterator[Dict]:
+    """
+    收集当前线程在with块内各阶段的耗时
+
+    产出的字典在退出时填好：'stages' 为 阶段名 -> {'calls': 次数, 'total_ms': 总耗时}，
+    'total_ms' 为整个块的耗时
+    """
+    global _active_collectors
+    stages: Dict = {}
+    collectors = getattr(_local, 'collectors', None)
+    if collectors is None:
+        collectors = _local.collectors = []
+    collectors.append(stages)
+    with _lock:
+        _active_collectors += 1
+
+    start = time.perf_counter()
+    result: Dict = {}
+    try:
+        yield result
+    finally:
+        total_ms = (time.perf_counter() - start) * 1000
+        collectors.pop()
+        with _lock:
+            _active_collectors -= 1
+        result['stages'] = {
+            stage: {'calls': stats['calls'], 'total_ms': round(stats['total_ms'], 4)}
+            for stage, stats in stages.items()
+        }
+        result['total_ms'] = round(total_ms, 4)
+
+def snapshot() -> Dict:
+    """全部阶段直方图的快照"""
+    with _lock:
+        return {stage: histogram.to_dict() for stage, histogram in sorted(_histograms.items())}
+
+def dump_json(path: Optional[str] = None) -> str:
+    """把直方图导出为JSON字符串，给出path时同时写入文件"""
+    output = json.dumps({'enabled': _enabled, 'stages': snapshot()}, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return output
+
+def peak_rss_mb() -> float:
+    """当前进程的峰值常驻内存（MB）"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def current_rss_mb() -> float:
+    """当前进程的常驻内存（MB）；没有 /proc 时退回峰值常驻内存"""
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+技能匹配模型编译与加载
+把 load_skills.load_available_skills 得到的技能预先展开为词条（关键词、触发词、
+特殊关键词及权重），写入带版本号的磁盘产物。加载时按SKILL.md的mtime/大小
+逐个技能校验，变化时再比对内容哈希，只重新提取真正改动过的技能
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import load_skills
+import skill_terms
+from skill_index import SkillIndex
+from skill_registry import SkillEntry, get_registry
+
+# 产物格式版本，结构变化时递增
+MATCHER_MODEL_VERSION = 1
+
+DEFAULT_MODEL_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'cache',
+    'compiled_matcher.json'
+)
+
+def rules_fingerprint() -> str:
+    """匹配规则指纹：词条提取规则或内置技能表变化时整个产物失效"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    for module in (skill_terms, load_skills):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def file_sha256(path: str) -> str:
+    """计算文件内容哈希"""
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _compile_skill_entry(entry: SkillEntry, sha256: str) -> Dict:
+    """按 load_available_skills 的方式解析注册表中的技能并提取词条，生成产物中的技能记录"""
+    skill = entry.parse('load_skills', load_skills.skill_from_entry)
+    return {
+        'item': entry.item,
+        'path': entry.path,
+        'mtime_ns': entry.mtime_ns,
+        'size': entry.size,
+        'sha256': sha256,
+        'skill': dict(skill) if skill else None,
+        'terms': skill_terms.extract_skill_terms(skill) if skill else []
+    }
+
+def _refresh_records(cached_records: Dict[str, Dict],
+                     skill_dirs: Optional[List[str]] = None) -> Tuple[List[Dict], int]:
+    """
+    按技能目录的当前状态刷新技能记录
+
+    Returns:
+        (最新记录列表, 重新解析的技能数)；新增、修改、删除都会反映在记录列表中
+    """
+    records = []
+    recompiled = 0
+
+    # 与 load_available_skills 共用进程内的技能注册表，目录只扫描一次
+    for entry in get_registry().entries(skill_dirs or load_skills.SKILL_DIRS):
+        record = cached_records.get(entry.path)
+        if record and record['mtime_ns'] == entry.mtime_ns and record['size'] == entry.size:
+            records.append(record)
+            continue
+
+        # mtime或大小变化：内容哈希不变时只更新元数据，否则重新解析
+        try:
+            sha256 = file_sha256(entry.path)
+        except OSError:
+            continue
+        if record and record['sha256'] == sha256:
+            record = dict(record, mtime_ns=entry.mtime_ns, size=entry.size)
+        else:
+            record = _compile_skill_entry(entry, sha256)
+            recompiled += 1
+        records.append(record)
+
+    return records, recompiled
+
+def _compile_built_in_terms() -> Dict[str, List]:
+    """提取内置技能的词条"""
+    return {
+        name: skill_terms.extract_skill_terms({'name': name, 'description': description})
+        for name, description in load_skills.BUILT_IN_SKILLS.items()
+    }
+
+def _build_index(records: List[Dict], built_in_terms: Dict[str, List], compact: bool = False) -> SkillIndex:
+    """按 load_available_skills 的合并规则组装技能列表并构建索引（compact=True 时构建紧凑索引）"""
+    terms_by_path = {record['path']: record['terms'] for record in records if record['skill']}
+    skills = load_skills.merge_skills([record['skill'] for record in records if record['skill']])
+
+    terms = []
+    for skill in skills:
+        if skill.get('path') in terms_by_path:
+            terms.append(terms_by_path[skill['path']])
+        else:
+            terms.append(built_in_terms[skill['name']])
+
+    if compact:
+        from compact_catalog import CompactSkillIndex
+        return CompactSkillIndex(skills, terms)
+    return SkillIndex(skills, terms)
+
+def _write_model(model_path: str, records: List[Dict], built_in_terms: Dict[str, List], fingerprint: str):
+    """原子写入编译产物"""
+    model = {
+        'version': MATCHER_MODEL_VERSION,
+        'rules_fingerprint': fingerprint,
+        'built_in_terms': built_in_terms,
+        'skills': records
+    }
+
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    tmp_path = f"{model_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(model, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, model_path)
+
+def _read_model(model_path: str, fingerprint: str) -> Optional[Dict]:
+    """读取编译产物，版本或规则指纹不匹配时返回None"""
+    try:
+        with open(model_path, 'r', encoding='utf-8') as f:
+            model = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if model.get('version') != MATCHER_MODEL_VERSION or model.get('rules_fingerprint') != fingerprint:
+        return None
+    return model
+
+def compile_matcher(model_path: str = DEFAULT_MODEL_PATH,
+                    skill_dirs: Optional[List[str]] = None, compact: bool = False) -> SkillIndex:
+    """
+    全量编译技能匹配模型并写入磁盘
+
+    Args:
+        model_path: 产物路径
+        skill_dirs: 要扫描的技能目录，默认为 load_skills.SKILL_DIRS
+        compact: 是否返回紧凑索引（compact_catalog.CompactSkillIndex）
+
+    Returns:
+        编译得到的技能索引
+    """
+    records, _ = _refresh_records({}, skill_dirs)
+    built_in_terms = _compile_built_in_terms()
+    _write_model(model_path, records, built_in_terms, rules_fingerprint())
+    return _build_index(records, built_in_terms, compact)
+
+def load_matcher(model_path: str = DEFAULT_MODEL_PATH,
+                 skill_dirs: Optional[List[str]] = None, compact: bool = False) -> SkillIndex:
+    """
+    加载技能匹配模型
+
+    产物不存在或版本不兼容时全量编译；否则只重新解析发生变化的技能，
+    有变化时回写产物
+
+    Args:
+        model_path: 产物路径
+        skill_dirs: 要扫描的技能目录，默认为 load_skills.SKILL_DIRS
+        compact: 是否返回紧凑索引（compact_catalog.CompactSkillIndex）
+
+    Returns:
+        与当前技能目录一致的技能索引
+    """
+    fingerprint = rules_fingerprint()
+    model = _read_model(model_path, fingerprint)
+    if model is None:
+        return compile_matcher(model_path, skill_dirs, compact)
+
+    cached_records = {record['path']: record for record in model['skills']}
+    records, recompiled = _refresh_records(cached_records, skill_dirs)
+
+    changed = recompiled > 0 or [
+        (record['path'], record['mtime_ns'], record['size']) for record in records
+    ] != [
+        (record['path'], record['mtime_ns'], record['size']) for record in model['skills']
+    ]
+    if changed:
+        _write_model(model_path, records, model['built_in_terms'], fingerprint)
+
+    return _build_index(records, model['built_in_terms'], compact)
+
+def main():
+    """编译技能匹配模型"""
+    index = compile_matcher()
+    print(f"已编译 {len(index.skills)} 个技能，{len(index.postings)} 个词条 -> {DEFAULT_MODEL_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+MaxScore前k检索
+固定权重模式只返回前3个匹配，却要对所有命中词条的技能累计分数。这里为每个词条的
+倒排表预先记录最大权重，检索时：
+
+- 短倒排表（技能名称、特殊关键词等）中的技能先完整计分，得到第k名的初始阈值
+- 倒排表按最大权重升序排列，最大权重之和的上界都进不了前k的那部分列表为“非必要列表”，
+  只出现在非必要列表中的技能不会被访问，这些（通常很长的）列表也不会被遍历
+- 其余候选技能先累计必要列表的分数，再按最大权重从大到小在非必要列表中二分查找，
+  上界已不可能超过当前第k名时立即放弃
+
+归一化分数在中文命令下不是原始分数的单调函数（低于3分时翻倍），上界取
+[0, 原始分数上界] 区间内归一化分数的最大值；剪枝按 (置信度, -技能ID) 比较，
+同分时的顺序也与逐技能完整计分一致，结果完全相同
+"""
+
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from matcher_metrics import instrumented
+from skill_index import SkillIndex
+from skill_terms import normalize_score
+
+# 中文命令原始分数低于该值时按翻倍规则归一化，翻倍后的上限（5分）在此处取到
+CHINESE_BOOST_PEAK = 2.5
+
+# 上界计算的浮点余量，避免不同累加顺序的舍入误差导致误剪枝
+BOUND_EPSILON = 1e-9
+
+# 长度不超过该值的倒排表中的技能作为种子，先完整计分以确定初始阈值
+SEED_LIST_LENGTH = 32
+
+# 倒排表：(按升序排列的技能ID, 对应权重, 最大权重)
+PostingList = Tuple[array, List[float], float]
+
+def score_upper_bound(raw_bound: float, has_chinese: bool) -> float:
+    """原始分数不超过raw_bound时可能取得的最大归一化分数"""
+    raw_bound += BOUND_EPSILON
+    bound = normalize_score(raw_bound, has_chinese)
+    if has_chinese:
+        bound = max(bound, normalize_score(min(raw_bound, CHINESE_BOOST_PEAK), has_chinese))
+    return bound
+
+def make_posting_list(postings) -> PostingList:
+    """把 [(技能ID, 权重)] 转换为检索用的倒排表，技能ID须已升序"""
+    skill_ids = array('I', (skill_id for skill_id, _ in postings))
+    weights = [weight for _, weight in postings]
+    return skill_ids, weights, max(weights, default=0.0)
+
+def _offer(heap: List[Tuple[float, int]], k: int, score: float, skill_id: int):
+    """把完整计分的技能放入前k堆（键为 (置信度, -技能ID)，同分时技能ID小的优先）"""
+    if score <= 0:
+        return
+    key = (score, -skill_id)
+    if len(heap) < k:
+        heapq.heappush(heap, key)
+    elif key > heap[0]:
+        heapq.heapreplace(heap, key)
+
+def max_score_top_k(lists: List[PostingList], has_chinese: bool, k: int = 3,
+                    extra: Optional[PostingList] = None,
+                    exclude: Optional[Set[int]] = None) -> List[Tuple[float, int]]:
+    """
+    MaxScore检索前k个技能
+
+    1. 种子：短倒排表（多为技能名称、特殊关键词）中的技能先完整计分，得到第k名的初始阈值
+    2. 划分：按最大权重升序，累计上界低于阈值的前缀列表为非必要列表
+    3. 逐词条累计必要列表的分数，候选技能再按最大权重从大到小查非必要列表，
+       上界进不了前k时放弃
+
+    Args:
+        lists: 命中词条的倒排表（权重须为正）
+        has_chinese: 命令是否包含中文（决定归一化规则）
+        k: 返回数量
+        extra: 附加分数（如拼写容错）的倒排表，单独累计后加到原始分数上，与完整计分的累加顺序一致
+        exclude: 命中否定条款的技能ID，既不计分也不进入前k
+
+    Returns:
+        [(置信度, 技能ID)]，按置信度从高到低、同分按技能ID，与 select_top_matches 一致
+    """
+    lists = [posting for posting in lists if posting[0]]
+    if extra is not None and extra[0]:
+        lists.append(extra)
+    # 最大权重相同时长列表排在前面，优先成为非必要列表
+    lists.sort(key=lambda posting: (posting[2], -len(posting[0])))
+    count = len(lists)
+
+    # prefix[i] 为前i个（最大权重最小的）列表的最大权重之和
+    prefix = [0.0]
+    for _, _, max_weight in lists:
+        prefix.append(prefix[-1] + max_weight)
+
+    def lookup(position: int, skill_id: int) -> float:
+        skill_ids, weights, _ = lists[position]
+        found = bisect_left(skill_ids, skill_id)
+        if found < len(skill_ids) and skill_ids[found] == skill_id:
+            return weights[found]
+        return 0.0
+
+    # 同一次检索中原始分数的取值很少（权重多为整数），上界按原始分数缓存
+    bounds: Dict[float, float] = {}
+
+    def upper_bound(raw_bound: float) -> float:
+        bound = bounds.get(raw_bound)
+        if bound is None:
+            bound = bounds[raw_bound] = score_upper_bound(raw_bound, has_chinese)
+        return bound
+
+    heap: List[Tuple[float, int]] = []
+
+    # 1. 种子技能完整计分
+    seeds: Set[int] = set()
+    for skill_ids, _, _ in lists:
+        if len(skill_ids) <= SEED_LIST_LENGTH:
+            seeds.update(skill_ids)
+    if exclude:
+        seeds -= exclude
+    for skill_id in sorted(seeds):
+        base = 0.0
+        bonus = 0.0
+        for i in range(count):
+            if lists[i] is extra:
+                bonus += lookup(i, skill_id)
+            else:
+                base += lookup(i, skill_id)
+        _offer(heap, k, normalize_score(base + bonus if bonus else base, has_chinese), skill_id)
+
+    # 2. 只出现在非必要列表中的技能，上界严格低于第k名，不会进入前k
+    first_essential = 0
+    if len(heap) == k:
+        threshold = heap[0][0]
+        while (first_essential < count
+               and upper_bound(prefix[first_essential + 1]) < threshold):
+            first_essential += 1
+
+    # 3. 逐词条累计必要列表
+    base_scores: Dict[int, float] = {}
+    bonus_scores: Dict[int, float] = {}
+    for i in range(first_essential, count):
+        skill_ids, weights, _ = lists[i]
+        scores = bonus_scores if lists[i] is extra else base_scores
+        for skill_id, weight in zip(skill_ids, weights):
+            scores[skill_id] = scores.get(skill_id, 0.0) + weight
+
+    # 4. 候选技能补上非必要列表的分数，随时按上界剪枝
+    rest = prefix[first_essential]
+    candidates = base_scores.keys() | bonus_scores.keys() if bonus_scores else base_scores.keys()
+    for skill_id in candidates:
+        if skill_id in seeds or (exclude and skill_id in exclude):
+            continue
+        base = base_scores.get(skill_id, 0.0)
+        bonus = bonus_scores.get(skill_id, 0.0)
+        if len(heap) == k and (upper_bound(base + bonus + rest), -skill_id) < heap[0]:
+            continue
+        pruned = False
+        for i in range(first_essential - 1, -1, -1):
+            if (i < first_essential - 1 and len(heap) == k
+                    and (upper_bound(base + bonus + prefix[i + 1]), -skill_id) < heap[0]):
+                pruned = True
+                break
+            if lists[i] is extra:
+                bonus += lookup(i, skill_id)
+            else:
+                base += lookup(i, skill_id)
+        if not pruned:
+            _offer(heap, k, normalize_score(base + bonus if bonus else base, has_chinese), skill_id)
+
+    return [(score, -negative_id) for score, negative_id in sorted(heap, reverse=True)]
+
+class MaxScoreIndex:
+    """技能倒排表的MaxScore检索结构：每个词条的倒排表及其最大权重"""
+
+    def __init__(self, index: SkillIndex):
+        self.index = index
+        self.lists: Dict[str, PostingList] = {term: make_posting_list(index.postings[term])
+                                              for term in index.terms}
+        self.always = make_posting_list(index.always_postings)
+
+    @instrumented('maxscore_top_k')
+    def top_k(self, hit_terms: Set[str], has_chinese: bool, k: int = 3,
+              extra_scores: Optional[Dict[int, float]] = None,
+              exclude: Optional[Set[int]] = None) -> List[Tuple[float, int]]:
+        """
+        按命中词条检索前k个技能
+
+        Args:
+            hit_terms: 命令中出现的索引词条（find_terms 的结果）
+            has_chinese: 命令是否包含中文
+            k: 返回数量
+            extra_scores: 技能ID -> 附加原始分数（如拼写容错）
+            exclude: 命中否定条款、不参与排序的技能ID
+
+        Returns:
+            [(置信度, 技能ID)]，与 select_top_matches(index.scores_for_terms(hit_terms), exclude=exclude) 相同
+        """
+        lists = [self.lists[term] for term in hit_terms]
+        lists.append(self.always)
+        extra = None
+        if extra_scores:
+            extra = make_posting_list(sorted(extra_scores.items()))
+        return max_score_top_k(lists, has_chinese, k, extra, exclude)
+
+# 最近一次使用的MaxScore索引，随技能索引一起复用
+_maxscore_cache: Optional[MaxScoreIndex] = None
+
+def get_maxscore_index(index: SkillIndex) -> MaxScoreIndex:
+    """获取（必要时构建）技能索引对应的MaxScore检索结构"""
+    global _maxscore_cache
+    if _maxscore_cache is None or _maxscore_cache.index is not index:
+        _maxscore_cache = MaxScoreIndex(index)
+    return _maxscore_cache
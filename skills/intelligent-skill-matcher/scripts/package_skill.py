@@ -26,7 +26,15 @@ def package_skill():
     files_to_copy = [
         "SKILL.md",
         "scripts/analyze_command.py",
+        "scripts/skill_terms.py",
+        "scripts/skill_index.py",
+        "scripts/aho_corasick.py",
+        "scripts/batch_matcher.py",
+        "scripts/matcher_daemon.py",
+        "scripts/matcher_client.py",
+        "scripts/matcher_model.py",
         "scripts/load_skills.py",
+        "scripts/skill_registry.py",
         "scripts/init_skill.py",
         "scripts/test_skill_matcher.py",
         "references/skill_matching_rules.md",
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+匹配结果缓存
+代理会反复发送相同的路由请求（“今天天气怎么样”“check PR status”），
+以评分时看到的命令文本为键缓存分析结果：LRU淘汰 + TTL过期，技能注册表版本或技能索引
+变化时整体失效，并统计命中/未命中次数
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 300.0  # 秒
+
+def normalize_command(command: str) -> str:
+    """
+    命令的缓存键：与各评分模式的预处理相同（小写、去掉首尾空白），
+    键相同的命令计分结果必然相同，缓存命中与否不影响返回的匹配
+    """
+    return command.lower().strip()
+
+class ResultCache:
+    """线程安全的LRU+TTL缓存"""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size: 最多缓存的条目数，超出时淘汰最久未使用的条目
+            ttl: 条目的存活时间（秒），<=0 表示不过期
+            clock: 时钟函数
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()  # 键 -> (写入时间, 结果)
+        self.version: Any = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, version: Any) -> Optional[Dict]:
+        """
+        查询缓存
+
+        Args:
+            key: 缓存键
+            version: 当前的技能版本标识；与缓存中的不同时清空全部条目
+        """
+        with self.lock:
+            self._check_version(version)
+            item = self.entries.get(key)
+            if item is not None and self.ttl > 0 and self.clock() - item[0] > self.ttl:
+                del self.entries[key]
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key: Hashable, version: Any, result: Dict):
+        """写入缓存"""
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self._check_version(version)
+            self.entries[key] = (self.clock(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """清空缓存（计数器保留）"""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict:
+        """命中统计"""
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'invalidations': self.invalidations
+            }
+
+    def _check_version(self, version: Any):
+        """版本变化时整体失效（调用方持有锁）"""
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self.version = version
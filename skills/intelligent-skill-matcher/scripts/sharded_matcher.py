@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+分片并行匹配
+把技能按ID连续划分为N个分片，每个分片的 词条×技能 权重矩阵（CSR）放进一块共享内存，
+由一个常驻工作进程直接映射使用，不复制倒排表。协调进程单遍扫描命令得到命中词条，
+把整批命令的 命令×词条 矩阵发给所有分片，各分片用 BatchScorer 的稀疏矩阵乘法计分，
+按 (置信度, -技能ID) 选出本分片前k个，协调进程再合并为全局前k，结果与 weighted 模式完全一致。
+
+用于离线评估超大技能目录时把计分分摊到多核；单条命令的进程间通信开销高于计分本身，
+技能较少时应使用其他模式。直接运行本脚本输出分片数与吞吐量的扩展性报告
+"""
+
+import atexit
+import heapq
+import os
+import sys
+from array import array
+from bisect import bisect_right
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Set, Tuple
+
+from batch_matcher import BatchScorer
+from skill_index import SkillIndex
+from skill_terms import CHINESE_CHAR_PATTERN, normalize_score
+
+try:
+    import numpy as np
+except ImportError:  # NumPy为可选依赖
+    np = None
+
+# 共享内存中数组元素的字节数（term_ptr、skill_ids 为int64，weights 为float64）
+ITEM_SIZE = 8
+
+# 分片描述：(共享内存名, 词条数, 倒排项数, 首个技能ID, 技能数, 空词条的 [(局部技能ID, 权重)])
+ShardSpec = Tuple[str, int, int, int, int, List[Tuple[int, float]]]
+
+class ShardScorer(BatchScorer):
+    """工作进程中的分片打分器：权重矩阵直接映射共享内存，技能ID为分片内的局部ID"""
+
+    def __init__(self, spec: ShardSpec):
+        name, num_terms, num_postings, self.offset, self.num_skills, self.always_postings = spec
+        self.index = None
+        self.shm = shared_memory.SharedMemory(name=name)
+
+        ptr_end = (num_terms + 1) * ITEM_SIZE
+        ids_end = ptr_end + num_postings * ITEM_SIZE
+        buffer = self.shm.buf
+        self.term_ptr = buffer[:ptr_end].cast('q')
+        self.skill_ids = buffer[ptr_end:ids_end].cast('q')
+        self.weights = buffer[ids_end:ids_end + num_postings * ITEM_SIZE].cast('d')
+        if np is not None:
+            self.np_term_ptr = np.frombuffer(self.term_ptr, dtype=np.int64)
+            self.np_skill_ids = np.frombuffer(self.skill_ids, dtype=np.int64)
+            self.np_weights = np.frombuffer(self.weights, dtype=np.float64)
+
+    def top_k(self, row_ptr: array, term_ids: array, has_chinese: List[bool], k: int,
+              extra_scores: Optional[Dict[int, Dict[int, float]]] = None,
+              excluded: Optional[Dict[int, Set[int]]] = None) -> List[List[Tuple[float, int]]]:
+        """
+        本分片内每条命令的前k个技能
+
+        Args:
+            row_ptr, term_ids: 命令×词条 稀疏矩阵
+            has_chinese: 各命令是否包含中文
+            k: 每条命令返回的数量
+            extra_scores: 命令序号 -> {局部技能ID: 附加原始分数}（拼写容错）
+            excluded: 命令序号 -> 命中否定条款的局部技能ID
+
+        Returns:
+            各命令的 [(置信度, -全局技能ID)]，与 select_top_matches 的排序键一致
+        """
+        offset = self.offset
+        results = []
+        for row, scores in enumerate(self.scores_for_term_matrix(row_ptr, term_ids)):
+            extra = extra_scores.get(row) if extra_scores else None
+            if extra:
+                for skill_id, weight in extra.items():
+                    scores[skill_id] = scores.get(skill_id, 0.0) + weight
+            exclude = excluded.get(row) if excluded else None
+            chinese = has_chinese[row]
+            candidates = []
+            for skill_id, raw_score in scores.items():
+                if exclude and skill_id in exclude:
+                    continue
+                score = normalize_score(raw_score, chinese)
+                if score > 0:
+                    candidates.append((score, -(skill_id + offset)))
+            results.append(heapq.nlargest(k, candidates))
+        return results
+
+    def close(self):
+        """释放共享内存映射（不删除共享内存，由协调进程负责）"""
+        if np is not None:
+            del self.np_term_ptr, self.np_skill_ids, self.np_weights
+        for view in (self.term_ptr, self.skill_ids, self.weights):
+            view.release()
+        self.shm.close()
+
+def _shard_worker(connection, spec: ShardSpec):
+    """分片工作进程：循环接收整批命令的计分请求，收到None或协调进程退出时结束"""
+    scorer = ShardScorer(spec)
+    try:
+        while True:
+            try:
+                request = connection.recv()
+            except EOFError:
+                break
+            if request is None:
+                break
+            try:
+                connection.send(scorer.top_k(*request))
+            except Exception as error:
+                connection.send(error)
+    finally:
+        scorer.close()
+        connection.close()
+
+class ShardedMatcher:
+    """分片并行匹配的协调端：管理共享内存分片和工作进程，合并各分片的前k结果"""
+
+    def __init__(self, index: SkillIndex, shards: Optional[int] = None):
+        """
+        Args:
+            index: 技能索引
+            shards: 分片（工作进程）数量，缺省为CPU核数，不超过技能数
+        """
+        import multiprocessing
+
+        self.index = index
+        num_skills = len(index.skills)
+        shards = max(1, min(shards or os.cpu_count() or 1, num_skills or 1))
+        self.shards = shards
+        # 第i个分片负责技能ID [bounds[i], bounds[i+1])
+        self.bounds = [num_skills * i // shards for i in range(shards + 1)]
+
+        self._segments: List[shared_memory.SharedMemory] = []
+        self._connections = []
+        self._processes = []
+        try:
+            for spec in self._build_shards():
+                parent_connection, child_connection = multiprocessing.Pipe()
+                process = multiprocessing.Process(target=_shard_worker, args=(child_connection, spec),
+                                                  daemon=True)
+                process.start()
+                child_connection.close()
+                self._connections.append(parent_connection)
+                self._processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def _build_shards(self) -> List[ShardSpec]:
+        """把倒排表按技能ID切分到各分片，写入各自的共享内存"""
+        index, bounds = self.index, self.bounds
+        shard_ptrs = [array('q', [0]) for _ in range(self.shards)]
+        shard_ids = [array('q') for _ in range(self.shards)]
+        shard_weights = [array('d') for _ in range(self.shards)]
+        for term in index.terms:
+            for skill_id, weight in index.postings[term]:
+                shard = bisect_right(bounds, skill_id) - 1
+                shard_ids[shard].append(skill_id - bounds[shard])
+                shard_weights[shard].append(weight)
+            for shard in range(self.shards):
+                shard_ptrs[shard].append(len(shard_ids[shard]))
+
+        specs = []
+        for shard in range(self.shards):
+            lower = bounds[shard]
+            payload = [shard_ptrs[shard], shard_ids[shard], shard_weights[shard]]
+            size = sum(len(values) for values in payload) * ITEM_SIZE
+            segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            self._segments.append(segment)
+            position = 0
+            for values in payload:
+                data = memoryview(values).cast('B')
+                segment.buf[position:position + len(data)] = data
+                position += len(data)
+            always = [(skill_id - lower, weight) for skill_id, weight in index.always_postings
+                      if lower <= skill_id < bounds[shard + 1]]
+            specs.append((segment.name, len(index.terms), len(shard_ids[shard]), lower,
+                          bounds[shard + 1] - lower, always))
+        return specs
+
+    def _split_by_shard(self, per_command: List[Optional[Dict]], to_items) -> List[Optional[Dict]]:
+        """把各命令按全局技能ID给出的数据拆到各分片，技能ID换成局部ID；没有数据的分片为None"""
+        bounds = self.bounds
+        split: List[Optional[Dict]] = [None] * self.shards
+        for row, values in enumerate(per_command):
+            if not values:
+                continue
+            for skill_id, value in to_items(values):
+                shard = bisect_right(bounds, skill_id) - 1
+                if split[shard] is None:
+                    split[shard] = {}
+                split[shard].setdefault(row, {})[skill_id - bounds[shard]] = value
+        return split
+
+    def top_k_batch(self, commands: List[str], k: int = 3,
+                    extra_scores: Optional[List[Optional[Dict[int, float]]]] = None
+                    ) -> Tuple[List[List[Tuple[float, int]]], List[Set[str]]]:
+        """
+        并行计算整批命令的前k个技能
+
+        Args:
+            commands: 已小写化的命令列表
+            k: 每条命令返回的数量
+            extra_scores: 与commands一一对应的 技能ID -> 附加原始分数（拼写容错），可为None
+
+        Returns:
+            (各命令的 [(置信度, 技能ID)]，各命令命中的词条集合)
+        """
+        index = self.index
+        row_ptr = array('q', [0])
+        term_ids = array('q')
+        hit_terms = []
+        for command in commands:
+            found = sorted(index.automaton.find_all(command))
+            term_ids.extend(found)
+            row_ptr.append(len(term_ids))
+            hit_terms.append({index.terms[term_id] for term_id in found})
+        has_chinese = [bool(CHINESE_CHAR_PATTERN.search(command)) for command in commands]
+
+        excluded = self._split_by_shard([index.excluded_skills(command) for command in commands],
+                                        lambda skill_ids: ((skill_id, True) for skill_id in skill_ids))
+        extras = self._split_by_shard(extra_scores or [None] * len(commands), lambda scores: scores.items())
+
+        # 先把请求发给所有分片，再依次收集，各分片同时计分
+        for shard, connection in enumerate(self._connections):
+            shard_excluded = excluded[shard]
+            if shard_excluded is not None:
+                shard_excluded = {row: set(skill_ids) for row, skill_ids in shard_excluded.items()}
+            connection.send((row_ptr, term_ids, has_chinese, k, extras[shard], shard_excluded))
+        shard_results = []
+        for connection in self._connections:
+            try:
+                result = connection.recv()
+            except EOFError:
+                raise RuntimeError('分片工作进程异常退出') from None
+            if isinstance(result, Exception):
+                raise result
+            shard_results.append(result)
+
+        merged = []
+        for row in range(len(commands)):
+            candidates = [key for result in shard_results for key in result[row]]
+            merged.append([(score, -negative_id) for score, negative_id in heapq.nlargest(k, candidates)])
+        return merged, hit_terms
+
+    def top_k(self, command: str, k: int = 3,
+              extra_scores: Optional[Dict[int, float]] = None) -> Tuple[List[Tuple[float, int]], Set[str]]:
+        """单条命令的前k个技能及命中词条，见 top_k_batch"""
+        top_matches, hit_terms = self.top_k_batch([command], k, [extra_scores])
+        return top_matches[0], hit_terms[0]
+
+    def close(self):
+        """结束工作进程并删除共享内存"""
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            connection.close()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._connections, self._processes, self._segments = [], [], []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# 最近一次使用的分片匹配器，随技能索引一起复用，进程退出时关闭
+_sharded_cache: Optional[ShardedMatcher] = None
+
+def _close_cached():
+    global _sharded_cache
+    if _sharded_cache is not None:
+        _sharded_cache.close()
+        _sharded_cache = None
+
+def get_sharded_matcher(index: SkillIndex, shards: Optional[int] = None) -> ShardedMatcher:
+    """
+    获取（必要时构建）技能索引对应的分片匹配器
+
+    shards 为None时沿用该技能索引已有的分片匹配器（没有时按CPU核数构建）
+    """
+    global _sharded_cache
+    cached = _sharded_cache
+    if cached is not None and cached.index is index:
+        if shards is None or min(shards, len(index.skills) or 1) == cached.shards:
+            return cached
+    if cached is None:
+        atexit.register(_close_cached)
+    else:
+        cached.close()
+    _sharded_cache = ShardedMatcher(index, shards)
+    return _sharded_cache
+
+def scaling_report(catalog_dir: str, shard_counts: List[int], commands: List[str], repeat: int = 3) -> Dict:
+    """
+    测量不同分片数下整批命令计分的吞吐量
+
+    每个分片数取 repeat 次中最快的一次，加速比和并行效率以1个分片为基准，
+    并核对各分片数的结果与1个分片完全一致
+    """
+    import time
+    from load_skills import load_available_skills
+    from skill_index import get_skill_index
+
+    index = get_skill_index(load_available_skills([catalog_dir]))
+    commands_lower = [command.lower().strip() for command in commands]
+
+    results = []
+    reference = None
+    base_seconds = None
+    for shards in shard_counts:
+        with ShardedMatcher(index, shards) as matcher:
+            matcher.top_k_batch(commands_lower[:1])
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                top_matches, _ = matcher.top_k_batch(commands_lower)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            if reference is None:
+                reference = top_matches
+                base_seconds = best
+            speedup = base_seconds / best if best else None
+            results.append({
+                'shards': matcher.shards,
+                'seconds': round(best, 4),
+                'throughput_qps': round(len(commands) / best, 1) if best else None,
+                'speedup': round(speedup, 2) if speedup else None,
+                'efficiency': round(speedup / matcher.shards, 2) if speedup else None,
+                'consistent': top_matches == reference
+            })
+        print(f"  {matcher.shards:>3} 分片 {results[-1]['seconds']}s "
+              f"qps={results[-1]['throughput_qps']} 加速比={results[-1]['speedup']}",
+              file=sys.stderr, flush=True)
+
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np is not None,
+        'cpu_count': os.cpu_count(),
+        'skills': len(index.skills),
+        'commands': len(commands),
+        'results': results
+    }
+
+def main():
+    import argparse
+    import json
+    import shutil
+    import tempfile
+    from benchmark_matcher import DEFAULT_SEED, generate_commands, write_catalog
+
+    cpu_count = os.cpu_count() or 1
+    default_shards = sorted({1, 2, 4, 8, cpu_count} & set(range(1, cpu_count + 1)))
+
+    parser = argparse.ArgumentParser(description='分片并行匹配的扩展性基准')
+    parser.add_argument('--size', type=int, default=50000, help='合成技能数量')
+    parser.add_argument('--shards', type=int, nargs='+', default=default_shards, help='要测量的分片数')
+    parser.add_argument('--commands', type=int, default=2000, help='生成的命令数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个分片数的重复次数（取最快）')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--catalog-dir', help='合成技能目录的保存位置，缺省使用临时目录')
+    parser.add_argument('--output', help='JSON报告输出文件，缺省输出到标准输出')
+    args = parser.parse_args()
+
+    temp_root = None if args.catalog_dir else tempfile.mkdtemp(prefix='skill-sharded-')
+    catalog_dir = args.catalog_dir or os.path.join(temp_root, f'catalog-{args.size}')
+    try:
+        if not os.path.isdir(catalog_dir):
+            write_catalog(catalog_dir, args.size, args.seed)
+        report = scaling_report(catalog_dir, args.shards, generate_commands(args.commands, args.seed), args.repeat)
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
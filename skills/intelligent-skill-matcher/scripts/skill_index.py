@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+技能倒排索引
+预先把所有技能的匹配词条展开为 词条 -> [(技能ID, 权重)] 的倒排表，
+查询时用 Aho-Corasick 自动机单遍扫描命令，只访问命令中实际出现的词条，
+而不是逐个技能重新提取关键词
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from aho_corasick import AhoCorasick
+from matcher_metrics import instrumented
+from skill_terms import (CHINESE_CHAR_PATTERN, ENGLISH_WORD_PATTERN, EXCLUSION_MIN_TERMS,
+                         extract_exclusions, extract_skill_terms)
+
+class SkillIndex:
+    """技能倒排索引"""
+
+    def __init__(self, skills: List[Dict], skill_terms: Optional[List[List[Tuple[str, str, float]]]] = None):
+        """
+        Args:
+            skills: 技能列表
+            skill_terms: 与skills一一对应的预提取词条（如编译产物中保存的），缺省时现场提取
+        """
+        self.skills = list(skills)
+        self.skill_ids = {skill['name']: skill_id for skill_id, skill in enumerate(self.skills)}
+        # 每个技能的 (词条, 来源, 权重) 列表，用于生成匹配轨迹
+        self.skill_terms: List[List[Tuple[str, str, float]]] = []
+
+        # 词条 -> [(技能ID, 权重)]，同一技能内重复出现的词条权重累加
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        # 空词条（如空技能名）对任何命令都成立
+        self.always_postings: List[Tuple[int, float]] = []
+
+        for skill_id, skill in enumerate(self.skills):
+            term_weights: Dict[str, float] = {}
+            terms = skill_terms[skill_id] if skill_terms is not None else extract_skill_terms(skill)
+            self.skill_terms.append(terms)
+            for term, source, weight in terms:
+                term_weights[term] = term_weights.get(term, 0.0) + weight
+            for term, weight in term_weights.items():
+                if term:
+                    self.postings.setdefault(term, []).append((skill_id, weight))
+                else:
+                    self.always_postings.append((skill_id, weight))
+
+        # 对全部词条构建多模式自动机，模式ID与 self.terms 下标一致
+        self.terms = list(self.postings)
+        self.automaton = AhoCorasick(self.terms)
+        self._build_exclusions()
+
+    def _build_exclusions(self):
+        """
+        否定条款索引：区分词 -> [(技能ID, 条款序号)]
+
+        英文区分词按命令中的单词匹配，中文区分词按子串匹配
+        """
+        self.exclusion_terms: Dict[str, List[Tuple[int, int]]] = {}
+        self.chinese_exclusion_terms: List[str] = []
+        # (技能ID, 条款序号) -> 需要命中的区分词数量
+        self.exclusion_required: Dict[Tuple[int, int], int] = {}
+        for skill_id, skill in enumerate(self.skills):
+            for clause_id, terms in enumerate(extract_exclusions(skill['description'])):
+                self.exclusion_required[(skill_id, clause_id)] = min(len(terms), EXCLUSION_MIN_TERMS)
+                for term in terms:
+                    if term not in self.exclusion_terms and CHINESE_CHAR_PATTERN.search(term):
+                        self.chinese_exclusion_terms.append(term)
+                    self.exclusion_terms.setdefault(term, []).append((skill_id, clause_id))
+
+    @instrumented('excluded_skills')
+    def excluded_skills(self, command: str) -> Set[int]:
+        """
+        命令命中其否定条款（NOT for）的技能，这些技能不参与计分和排序
+
+        Args:
+            command: 已小写化的命令文本
+        """
+        if not self.exclusion_terms:
+            return set()
+        hits: Dict[Tuple[int, int], int] = {}
+        matched = [word for word in set(ENGLISH_WORD_PATTERN.findall(command)) if word in self.exclusion_terms]
+        matched += [term for term in self.chinese_exclusion_terms if term in command]
+        for term in matched:
+            for clause in self.exclusion_terms[term]:
+                hits[clause] = hits.get(clause, 0) + 1
+        return {skill_id for (skill_id, clause_id), count in hits.items()
+                if count >= self.exclusion_required[(skill_id, clause_id)]}
+
+    @instrumented('find_terms')
+    def find_terms(self, command: str) -> Set[str]:
+        """单遍扫描命令，找出其中出现的所有索引词条（子串匹配语义）"""
+        return {self.terms[term_id] for term_id in self.automaton.find_all(command)}
+
+    def raw_scores(self, command: str) -> Dict[int, float]:
+        """
+        计算命令对各技能的原始累计分数
+
+        Args:
+            command: 已小写化的命令文本
+
+        Returns:
+            技能ID -> 原始分数，只包含至少命中一个词条的技能
+        """
+        return self.scores_for_terms(self.find_terms(command))
+
+    @instrumented('score_terms')
+    def scores_for_terms(self, hit_terms: Set[str]) -> Dict[int, float]:
+        """根据已命中的词条集合累计各技能的原始分数"""
+        scores: Dict[int, float] = {}
+        for skill_id, weight in self.always_postings:
+            scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        for term in hit_terms:
+            for skill_id, weight in self.postings[term]:
+                scores[skill_id] = scores.get(skill_id, 0.0) + weight
+        return scores
+
+    def trace(self, skill_id: int, hit_terms: Set[str]) -> List[Tuple[str, str, float]]:
+        """
+        技能的匹配轨迹：命中的 (词条, 来源, 权重)，按计分时的顺序排列
+
+        Args:
+            skill_id: 技能ID
+            hit_terms: 计分时命中的词条集合（find_terms 的结果）
+        """
+        return [(term, source, weight) for term, source, weight in self.skill_terms[skill_id]
+                if not term or term in hit_terms]
+
+    def skill_raw_score(self, skill_id: int, hit_terms: Set[str]) -> float:
+        """单个技能的原始分数：只遍历该技能自己的词条，不为其他技能计分"""
+        return sum(weight for _, _, weight in self.trace(skill_id, hit_terms))
+
+    def raw_score(self, command: str, skill: Dict) -> float:
+        """计算命令对单个技能的原始分数"""
+        skill_id = self.skill_ids.get(skill['name'])
+        if skill_id is None:
+            return 0.0
+        return self.skill_raw_score(skill_id, self.find_terms(command))
+
+# 进程内索引缓存：技能列表不变时复用同一个索引
+_index_cache: Dict[Tuple, SkillIndex] = {}
+
+def skills_fingerprint(skills: List[Dict]) -> Tuple:
+    """技能列表的指纹，名称或描述变化都会导致索引重建"""
+    return tuple((skill['name'], skill['description']) for skill in skills)
+
+@instrumented('get_skill_index')
+def get_skill_index(skills: List[Dict]) -> SkillIndex:
+    """获取（必要时构建）技能列表对应的倒排索引"""
+    key = skills_fingerprint(skills)
+    index = _index_cache.get(key)
+    if index is None:
+        _index_cache.clear()
+        index = SkillIndex(skills)
+        _index_cache[key] = index
+    return index
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+增量技能注册表
+按 (路径, mtime, 大小) 缓存每个SKILL.md的frontmatter及各使用方的解析结果。
+刷新时用 os.scandir 扫描技能目录，只重新读取新增或变化的技能；Linux上可用
+inotify时，没有文件事件就完全跳过扫描。同一进程内的 load_skills、
+SkillEvolutionManager、SkillIntegrator 共用一个注册表，技能目录只扫描一次
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+class SkillEntry:
+    """单个技能的SKILL.md缓存条目，文件变化时整体替换"""
+
+    def __init__(self, item: str, skill_path: str, path: str, mtime_ns: int, size: int):
+        self.item = item              # 技能目录名
+        self.skill_path = skill_path  # 技能目录路径
+        self.path = path              # SKILL.md路径
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.header: Optional[str] = None  # frontmatter部分（无frontmatter时为全文），读取失败为None
+        self.error: Optional[str] = None
+        self._parsed: Dict[str, Any] = {}
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self.header = extract_header(f.read())
+        except Exception as e:
+            self.error = str(e)
+
+    def parse(self, key: str, parser: Callable[['SkillEntry'], Any]) -> Any:
+        """
+        获取某个使用方的解析结果，同一条目只解析一次
+
+        Args:
+            key: 使用方标识，不同使用方的解析结果互不影响
+            parser: 解析函数，接收条目本身
+        """
+        if key not in self._parsed:
+            self._parsed[key] = parser(self)
+        return self._parsed[key]
+
+def extract_header(content: str) -> str:
+    """截取SKILL.md的frontmatter（含首尾的---），没有frontmatter时保留全文"""
+    if content.startswith('---'):
+        end_marker = content.find('\n---', 3)
+        if end_marker != -1:
+            return content[:end_marker + 4]
+    return content
+
+class _InotifyWatcher:
+    """基于ctypes的最小inotify封装，只用来判断“自上次检查后是否有文件事件”"""
+
+    # IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    # IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+    WATCH_MASK = 0x002 | 0x004 | 0x008 | 0x040 | 0x080 | 0x100 | 0x200 | 0x400 | 0x800
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._get_errno = ctypes.get_errno
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(self._get_errno(), "inotify_init1 失败")
+
+    def watch(self, path: str):
+        """监听目录；重复添加同一路径是幂等的"""
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.WATCH_MASK) < 0:
+            raise OSError(self._get_errno(), f"inotify_add_watch 失败: {path}")
+
+    def has_events(self) -> bool:
+        """读空事件队列，返回期间是否有任何事件（包括队列溢出）"""
+        has_events = False
+        while True:
+            try:
+                if not os.read(self.fd, 65536):
+                    break
+                has_events = True
+            except BlockingIOError:
+                break
+        return has_events
+
+class SkillRegistry:
+    """技能注册表"""
+
+    def __init__(self, use_inotify: bool = True):
+        self.lock = threading.RLock()
+        # 技能根目录 -> 按扫描顺序排列的条目
+        self.dir_entries: Dict[str, List[SkillEntry]] = {}
+        # 上次扫描时不存在的根目录，无法监听，每次刷新都要重新检查
+        self.missing_dirs = set()
+        # 任何技能新增、变化或删除时递增
+        self.version = 0
+
+        self.watcher = None
+        if use_inotify:
+            try:
+                self.watcher = _InotifyWatcher()
+            except (OSError, AttributeError):
+                self.watcher = None
+
+    @staticmethod
+    def normalize_dir(skill_dir: str) -> str:
+        """统一目录写法，~ 展开后的同一目录只扫描一次"""
+        return os.path.realpath(os.path.expanduser(skill_dir))
+
+    def refresh(self, skill_dirs: List[str]) -> int:
+        """
+        刷新指定的技能目录
+
+        Returns:
+            刷新后的注册表版本号
+        """
+        with self.lock:
+            dirs = [self.normalize_dir(skill_dir) for skill_dir in skill_dirs]
+            unknown = [skill_dir for skill_dir in dirs if skill_dir not in self.dir_entries]
+            changed_on_disk = self.watcher is None or self.watcher.has_events()
+
+            if changed_on_disk:
+                rescan = set(self.dir_entries) | set(dirs)
+            else:
+                rescan = set(unknown) | (self.missing_dirs & set(dirs))
+
+            for skill_dir in rescan:
+                if self._scan_dir(skill_dir):
+                    self.version += 1
+            return self.version
+
+    def entries(self, skill_dirs: List[str]) -> List[SkillEntry]:
+        """刷新并返回指定目录下的全部技能条目（按目录顺序、目录内按扫描顺序）"""
+        with self.lock:
+            self.refresh(skill_dirs)
+            result = []
+            seen_dirs = set()
+            for skill_dir in skill_dirs:
+                skill_dir = self.normalize_dir(skill_dir)
+                if skill_dir not in seen_dirs:
+                    seen_dirs.add(skill_dir)
+                    result.extend(self.dir_entries.get(skill_dir, []))
+            return result
+
+    def _scan_dir(self, skill_dir: str) -> bool:
+        """用 os.scandir 扫描一个技能根目录，返回是否有变化"""
+        old_entries = {entry.path: entry for entry in self.dir_entries.get(skill_dir, [])}
+        new_entries = []
+        changed = False
+
+        try:
+            iterator = os.scandir(skill_dir)
+        except OSError:
+            self.missing_dirs.add(skill_dir)
+            changed = bool(old_entries)
+            self.dir_entries[skill_dir] = []
+            return changed
+
+        self.missing_dirs.discard(skill_dir)
+        self._watch(skill_dir)
+        with iterator:
+            for dir_entry in iterator:
+                try:
+                    if not dir_entry.is_dir():
+                        continue
+                    skill_md_path = os.path.join(dir_entry.path, "SKILL.md")
+                    self._watch(dir_entry.path)
+                    stat_result = os.stat(skill_md_path)
+                except OSError:
+                    continue
+
+                entry = old_entries.get(skill_md_path)
+                if (entry is None or entry.mtime_ns != stat_result.st_mtime_ns
+                        or entry.size != stat_result.st_size):
+                    entry = SkillEntry(dir_entry.name, dir_entry.path, skill_md_path,
+                                       stat_result.st_mtime_ns, stat_result.st_size)
+                    changed = True
+                new_entries.append(entry)
+
+        if len(new_entries) != len(old_entries):
+            changed = True
+        self.dir_entries[skill_dir] = new_entries
+        return changed
+
+    def _watch(self, path: str):
+        """把目录加入inotify监听；监听失败（如达到系统上限）时退回每次扫描"""
+        if self.watcher is None:
+            return
+        try:
+            self.watcher.watch(path)
+        except OSError:
+            self.watcher = None
+
+# 进程内共享的注册表
+_registry: Optional[SkillRegistry] = None
+
+def get_registry() -> SkillRegistry:
+    """获取进程内共享的技能注册表"""
+    global _registry
+    if _registry is None:
+        _registry = SkillRegistry()
+    return _registry
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+技能匹配词条规则
+集中定义关键词/触发词提取、特殊关键词表和各来源的计分权重，
+供逐技能评分与倒排索引共用，保证两者得分一致
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+from matcher_metrics import instrumented
+
+# 各匹配来源的权重
+NAME_WEIGHT = 5.0
+CHINESE_KEYWORD_WEIGHT = 3.0
+ENGLISH_KEYWORD_WEIGHT = 2.0
+TRIGGER_WEIGHT = 3.0
+
+# 归一化参数
+MAX_POSSIBLE_SCORE = 15.0  # 保守估计的最大分数
+
+# 预编译的提取规则，避免每次调用（或循环中每个词）重新查找正则缓存
+CHINESE_CHAR_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+CHINESE_WORD_PATTERN = re.compile(r'[\u4e00-\u9fff]{2,}')
+ENGLISH_WORD_PATTERN = re.compile(r'\b[a-zA-Z][a-zA-Z\-]{2,}\b')
+BRACKET_PATTERN = re.compile(r'\(([^)]+)\)')
+CONDITION_SEPARATOR_PATTERN = re.compile(r'[,\n]')
+# 分词：英文字母数字串、连续汉字
+ENGLISH_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+CHINESE_RUN_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+
+# 否定条款（“NOT for: ...”、“不适用于...”）：其中的场景不应路由到该技能
+NOT_FOR_PATTERN = re.compile(r'\bnot for\b:?\s*(.+?)(?:\.(?=\s|$)|$)', re.DOTALL)
+CHINESE_NOT_FOR_PATTERN = re.compile(r'(?:不适用于|不用于)[:：]?\s*([^。\n]+)')
+PARENTHESIS_PATTERN = re.compile(r'\([^)]*\)|（[^）]*）')
+EXCLUSION_SEPARATOR_PATTERN = re.compile(r'[,;，；、]|\bor\b|或')
+
+# 命令至少包含否定条款中这么多个区分词（条款区分词更少时需全部包含）才排除该技能
+EXCLUSION_MIN_TERMS = 2
+
+# 提取关键词时过滤的常见停用词
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are',
+    'was', 'were', 'when', 'use', 'not', 'via', 'api', 'user', 'asks', 'about', 'any', 'location', 'this',
+    'that', 'these', 'those'
+})
+
+# 特定技能的特殊关键词（增强中文支持）
+SPECIAL_KEYWORDS = {
+    'github': ['github', 'git', 'issue', 'pr', 'pull request', 'repository', 'repo', 'commit', 'branch', '代码', '仓库', '提交', '分支', 'bug', '错误', '问题', '开发', '编程'],
+    'weather': ['天气', 'temperature', 'forecast', 'rain', 'snow', 'wind', 'humidity', '气温', '预报', '下雨', '下雪', '温度', '气候', '冷', '热', '暖', '凉', '阴', '晴', '多云', '雷', '雨', '雪', '风', '湿度', '今天', '明天', '后天', '周末'],
+    'backup': ['backup', 'restore', 'recover', '备份', '恢复', '数据', 'archive', '存档', '数据备份', '文件备份', '重要', '保存', '存储', '保护', '复制', '镜像', '灾难恢复', '快照', '增量'],
+    'healthcheck': ['security', '安全', 'hardening', 'firewall', 'ssh', 'audit', 'risk', 'exposure', '防火墙', '审计', '风险', '加固', '漏洞', '检查', '状态', '健康', '扫描', '测试', '防护', '监控', '强化', '服务器', '系统', '网络', '主机', '渗透', '入侵', '恶意', '病毒', '木马', '后门', '权限', '访问控制', '加密', '证书', '日志', '告警', '威胁', '攻击', '防御', '隔离', '沙箱', '更新', '补丁', '升级', '配置', '策略', '合规', '标准', '最佳实践', '保护', '验证', '认证', '授权', '身份', '会话', '超时', '锁定', '失败', '重试', '限制', '速率', '带宽', '流量', '异常', '行为', '模式', '分析', '检测', '预防', '响应', '恢复', '备份', '容灾', '高可用', '负载', '压力', '性能', '资源', 'CPU', '内存', '磁盘', '网络', '连接', '端口', '服务', '进程', '用户', '组', '角色', '权限', 'ACL', 'RBAC', 'ABAC', '零信任', '最小权限', '纵深防御', '系统安全', '网络安全', '主机安全', '渗透测试'],
+    'sonoscli': ['sonos', 'speaker', 'music', 'audio', 'volume', 'play', 'pause', '音箱', '音乐', '音量', '播放', '暂停', '音响', '声音', '歌曲', '专辑', '艺术家', '流媒体'],
+    'concise-output': ['concise', '简洁', '简明', '输出', '格式化', '清晰', '精简', '简短', '摘要', '总结', '要点', '重点', '简化', '压缩'],
+    'find': ['find', 'locate', 'search', '查找', '搜索', '定位', '发现', '寻找', '查询', '检索'],
+    'multi-memory-manager': ['memory', '记忆', '存储', '记录', '历史', '日志', '备份', '管理', '组织', '分类'],
+    'skill-evolution-manager': ['skill', 'evolution', 'upgrade', 'update', 'manage', '技能', '进化', '升级', '更新', '管理', '自动化', '智能', '维护']
+}
+
+@instrumented('extract_keywords')
+def extract_keywords(description: str) -> List[str]:
+    """从技能描述中提取关键词"""
+    # 提取英文单词（包括带连字符的）
+    english_words = ENGLISH_WORD_PATTERN.findall(description)
+    
+    # 提取中文词语（1个或更多字符，因为中文单字也有意义）
+    chinese_chars = CHINESE_CHAR_PATTERN.findall(description)
+    chinese_words = CHINESE_WORD_PATTERN.findall(description)
+    
+    # 合并并去重
+    all_words = english_words + chinese_words + chinese_chars
+    
+    # 过滤常见停用词
+    keywords = [word for word in all_words if word.lower() not in STOP_WORDS]
+    return list(set(keywords))
+
+@instrumented('extract_triggers')
+def extract_triggers(description: str) -> List[str]:
+    """从技能描述中提取触发词"""
+    triggers = []
+    
+    # 查找 "Use when" 相关的触发条件
+    if 'use when' in description:
+        use_when_part = description.split('use when')[-1]
+        # 提取括号内的内容
+        bracket_content = BRACKET_PATTERN.findall(use_when_part)
+        for content in bracket_content:
+            # 分割条件
+            conditions = CONDITION_SEPARATOR_PATTERN.split(content)
+            for condition in conditions:
+                condition = condition.strip()
+                if condition and len(condition) > 1:  # 降低最小长度要求
+                    triggers.append(condition)
+    
+    # 查找中文触发条件
+    if '当' in description:
+        parts = description.split('当')
+        for part in parts[1:]:
+            if '时' in part:
+                when_content = part.split('时')[0].strip()
+                if when_content and len(when_content) > 1:
+                    triggers.append(when_content)
+            elif '使用' in part:
+                when_content = part.split('使用')[0].strip()
+                if when_content and len(when_content) > 1:
+                    triggers.append(when_content)
+    
+    return list(set(triggers))
+
+def extract_exclusions(description: str) -> List[List[str]]:
+    """
+    从技能描述的否定条款中提取排除规则
+
+    每个条款（按逗号、or 分隔，忽略括号中的补充说明）取其区分词：不在描述其余部分
+    出现的英文单词和中文词语，如 weather 的 "historical weather data" 得到
+    ['historical', 'data']
+
+    Returns:
+        每个条款的区分词列表
+    """
+    description = description.lower()
+    clauses = NOT_FOR_PATTERN.findall(description) + CHINESE_NOT_FOR_PATTERN.findall(description)
+    if not clauses:
+        return []
+
+    positive_text = CHINESE_NOT_FOR_PATTERN.sub(' ', NOT_FOR_PATTERN.sub(' ', description))
+    positive_words = set(ENGLISH_WORD_PATTERN.findall(positive_text))
+
+    exclusions = []
+    for clause in clauses:
+        for part in EXCLUSION_SEPARATOR_PATTERN.split(PARENTHESIS_PATTERN.sub(' ', clause)):
+            terms = [word for word in ENGLISH_WORD_PATTERN.findall(part)
+                     if word not in STOP_WORDS and word not in positive_words]
+            terms += [word for word in CHINESE_WORD_PATTERN.findall(part) if word not in positive_text]
+            if terms:
+                exclusions.append(list(dict.fromkeys(terms)))
+    return exclusions
+
+def contains_chinese(text: str) -> bool:
+    """检测文本是否包含中文字符"""
+    return bool(CHINESE_CHAR_PATTERN.search(text))
+
+def iter_ngrams(run: str, sizes) -> List[str]:
+    """连续汉字切成指定长度的n-gram；单字只在整段只有一个字时产生"""
+    grams = []
+    for n in sizes:
+        if n == 1:
+            if len(run) == 1:
+                grams.append(run)
+            continue
+        grams.extend(run[i:i + n] for i in range(len(run) - n + 1))
+    return grams
+
+def tokenize(text: str) -> List[str]:
+    """
+    分词（BM25与LSH共用）：英文按字母数字切分；中文没有分词器，连续汉字切成字符二元组，
+    单个汉字保留为一元词项
+    """
+    text = text.lower()
+    tokens = ENGLISH_TOKEN_PATTERN.findall(text)
+    for run in CHINESE_RUN_PATTERN.findall(text):
+        tokens.extend(iter_ngrams(run, (1, 2)))
+    return tokens
+
+def keyword_weight(keyword: str) -> float:
+    """
+    关键词命中时的权重
+
+    中文关键词只有在命令包含中文时才可能命中，因此命中时总是取中文权重
+    """
+    if contains_chinese(keyword):
+        return CHINESE_KEYWORD_WEIGHT
+    return ENGLISH_KEYWORD_WEIGHT
+
+def extract_skill_terms(skill: Dict) -> List[Tuple[str, str, float]]:
+    """
+    提取技能的全部匹配词条
+
+    Returns:
+        (词条, 来源, 权重) 列表，来源为 name/keyword/trigger/special，
+        与 calculate_match_score 的计分规则一一对应
+    """
+    description = skill['description'].lower()
+    name = skill['name'].lower()
+
+    terms = [(name, 'name', NAME_WEIGHT)]
+    for keyword in extract_keywords(description):
+        if len(keyword) > 1:
+            terms.append((keyword, 'keyword', keyword_weight(keyword)))
+    for trigger in extract_triggers(description):
+        terms.append((trigger, 'trigger', TRIGGER_WEIGHT))
+    # 特殊关键词表中的重复项按原规则重复计分
+    for keyword in SPECIAL_KEYWORDS.get(name, []):
+        terms.append((keyword, 'special', keyword_weight(keyword)))
+
+    return terms
+
+def normalize_score(score: float, has_chinese: bool) -> float:
+    """将原始累计分数归一化到0-10分"""
+    if score == 0:
+        return 0.0
+
+    # 如果检测到中文且有中文匹配，提高基础分数
+    if has_chinese and score < 3.0:
+        # 对于中文命令，即使只匹配一个关键词也应该有合理的基础分数
+        base_score = min(5.0, score * 2.0)
+        normalized_score = min(10.0, base_score)
+    else:
+        normalized_score = min(10.0, (score / MAX_POSSIBLE_SCORE) * 10.0)
+
+    return round(normalized_score, 2)
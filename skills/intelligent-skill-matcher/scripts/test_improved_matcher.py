@@ -5,54 +5,55 @@
 
 import sys
 import os
+import time
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from analyze_command import analyze_user_command
+from analyze_command import MATCH_MODES, analyze_user_command
 
-def run_comprehensive_tests():
-    """运行全面的测试用例"""
-    test_cases = [
-        # 天气相关
-        "今天北京天气怎么样？",
-        "明天会不会下雨？",
-        "这周末气温如何？",
-        "查看上海的天气预报",
-        
-        # GitHub相关
-        "帮我创建一个新的GitHub issue",
-        "修复这个GitHub仓库的bug",
-        "查看PR的状态",
-        "提交代码到main分支",
-        
-        # 备份相关
-        "备份我的重要文件",
-        "设置自动备份策略",
-        "恢复昨天的数据",
-        "创建系统快照",
-        
-        # 安全相关
-        "检查系统安全状态",
-        "强化我的服务器安全",
-        "扫描漏洞",
-        "审计防火墙配置",
-        
-        # 音频相关
-        "播放音乐到我的Sonos音箱",
-        "调高音量",
-        "暂停播放",
-        "播放周杰伦的歌",
-        
-        # 其他
-        "创建一个新技能来处理数据分析",
-        "查找丢失的文件",
-        "简化这段文字的输出",
-        "管理我的记忆存储"
-    ]
+TEST_CASES = [
+    # 天气相关
+    "今天北京天气怎么样？",
+    "明天会不会下雨？",
+    "这周末气温如何？",
+    "查看上海的天气预报",
+    
+    # GitHub相关
+    "帮我创建一个新的GitHub issue",
+    "修复这个GitHub仓库的bug",
+    "查看PR的状态",
+    "提交代码到main分支",
+    
+    # 备份相关
+    "备份我的重要文件",
+    "设置自动备份策略",
+    "恢复昨天的数据",
+    "创建系统快照",
     
-    print("=== 改进的智能技能匹配器全面测试 ===\n")
+    # 安全相关
+    "检查系统安全状态",
+    "强化我的服务器安全",
+    "扫描漏洞",
+    "审计防火墙配置",
     
-    for i, command in enumerate(test_cases, 1):
-        result = analyze_user_command(command)
+    # 音频相关
+    "播放音乐到我的Sonos音箱",
+    "调高音量",
+    "暂停播放",
+    "播放周杰伦的歌",
+    
+    # 其他
+    "创建一个新技能来处理数据分析",
+    "查找丢失的文件",
+    "简化这段文字的输出",
+    "管理我的记忆存储"
+]
+
+def run_comprehensive_tests(mode: str = 'weighted'):
+    """运行全面的测试用例"""
+    print(f"=== 改进的智能技能匹配器全面测试 (评分模式: {mode}) ===\n")
+    
+    for i, command in enumerate(TEST_CASES, 1):
+        result = analyze_user_command(command, mode=mode)
         best_match = result['matches'][0] if result['matches'] else None
         
         print(f"测试 {i}: {command}")
@@ -63,5 +64,46 @@ def run_comprehensive_tests():
             print("  未找到匹配的技能")
         print(f"  摘要: {result['analysis_summary']}\n")
 
+def compare_modes(modes=MATCH_MODES):
+    """在同一组测试用例上对比各评分模式的最佳匹配与耗时"""
+    print("=== 评分模式对比 ===\n")
+    
+    elapsed = {mode: 0.0 for mode in modes}
+    differences = 0
+    for i, command in enumerate(TEST_CASES, 1):
+        best_matches = {}
+        for mode in modes:
+            start = time.perf_counter()
+            result = analyze_user_command(command, mode=mode)
+            elapsed[mode] += time.perf_counter() - start
+            best_match = result['matches'][0] if result['matches'] else None
+            best_matches[mode] = best_match
+        
+        names = {match['skill_name'] if match else None for match in best_matches.values()}
+        if len(names) > 1:
+            differences += 1
+        
+        print(f"测试 {i}: {command}{'' if len(names) == 1 else '  [结果不同]'}")
+        for mode, match in best_matches.items():
+            if match:
+                print(f"  {mode:<10} {match['skill_name']} (置信度: {match['confidence']}/10)")
+            else:
+                print(f"  {mode:<10} 未找到匹配的技能")
+        print()
+    
+    print(f"最佳匹配不同的用例: {differences}/{len(TEST_CASES)}")
+    for mode in modes:
+        print(f"  {mode:<10} 总耗时 {elapsed[mode] * 1000:.2f}ms")
+
 if __name__ == "__main__":
-    run_comprehensive_tests()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='智能技能匹配器测试')
+    parser.add_argument('--mode', default='weighted', choices=MATCH_MODES, help='评分模式')
+    parser.add_argument('--compare', action='store_true', help='对比所有评分模式')
+    args = parser.parse_args()
+    
+    if args.compare:
+        compare_modes()
+    else:
+        run_comprehensive_tests(args.mode)
\ No newline at end of file
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻匹配服务测试：没有编译产物时服务所监视目录中的技能，目录变化后重新加载；
+服务不可用时客户端的回退结果与服务相同
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import load_skills
+import matcher_client
+import matcher_model
+from matcher_daemon import MatcherState
+
+def _write_skill(skill_dir, name, description):
+    os.makedirs(skill_dir / name)
+    (skill_dir / name / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n---\n", encoding='utf-8')
+
+def test_daemon_serves_watched_skill_dirs_without_model(tmp_path, monkeypatch):
+    skill_dir = tmp_path / "skills"
+    _write_skill(skill_dir, "invoice-parser", "Parse supplier invoices into ledger entries")
+    monkeypatch.setattr(load_skills, "SKILL_DIRS", [str(skill_dir) + "/"])
+
+    state = MatcherState(model_path=str(tmp_path / "missing_model.json"), cache_size=0)
+    assert "invoice-parser" in {skill['name'] for skill in state.index.skills}
+
+    _write_skill(skill_dir, "tide-tables", "Look up tide tables for harbours")
+    assert state.reload_if_changed()
+    assert "tide-tables" in {skill['name'] for skill in state.index.skills}
+    result = state.handle({'command': 'tide tables for the harbour'})
+    assert result['result']['matches'][0]['skill_name'] == "tide-tables"
+
+def test_client_fallback_matches_daemon(tmp_path, monkeypatch):
+    skill_dir = tmp_path / "skills"
+    _write_skill(skill_dir, "invoice-parser", "Parse supplier invoices into ledger entries")
+    _write_skill(skill_dir, "tide-tables", "Look up tide tables for harbours")
+    monkeypatch.setattr(load_skills, "SKILL_DIRS", [str(skill_dir) + "/"])
+    monkeypatch.setattr(matcher_model, "DEFAULT_MODEL_PATH", str(tmp_path / "missing_model.json"))
+
+    state = MatcherState(cache_size=0)
+    # 套接字不存在，客户端在当前进程内匹配
+    socket_path = str(tmp_path / "missing.sock")
+    commands = ["parse this supplier invoice", "tide tables for the harbour", "今天北京天气怎么样？"]
+    for command in commands:
+        assert matcher_client.analyze(command, socket_path) == state.handle({'command': command})['result']
+    assert matcher_client.analyze_many(commands, socket_path) == state.handle({'commands': commands})['results']
+    assert matcher_client.analyze(commands[0], socket_path)['matches'][0]['skill_name'] == "invoice-parser"
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匹配器一致性测试：各种加速路径（缓存、索引、分片等）的结果与直接计算的结果相同
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from analyze_command import MATCH_MODES, analyze_user_command, get_skill_index, load_available_skills
+
+COMMANDS = [
+    "今天北京天气怎么样？",
+    "帮我创建一个新的GitHub issue",
+    "备份我的重要文件",
+    "检查系统安全状态",
+    "播放音乐到我的Sonos音箱",
+    "创建一个新技能来处理数据分析",
+    "明天会不会下雨？",
+    "修复这个GitHub仓库的bug",
+    "设置自动备份策略",
+    "强化我的服务器安全",
+    "ＳＥＡＲＣＨ weather",
+    "Check PR status!!",
+    "  search   weather  ",
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return get_skill_index(load_available_skills())
+
+@pytest.mark.parametrize("mode", MATCH_MODES)
+def test_cached_result_matches_uncached(index, mode):
+    from result_cache import ResultCache
+
+    for command in COMMANDS:
+        expected = analyze_user_command(command, index, mode)
+        cache = ResultCache()
+        # 未命中时计算的结果和随后命中时返回的结果都与不经缓存时相同
+        assert analyze_user_command(command, index, mode, cache=cache) == expected
+        assert analyze_user_command(command, index, mode, cache=cache) == expected
+
+def test_cached_fuzzy_result_matches_uncached(index):
+    from result_cache import ResultCache
+
+    for command in COMMANDS:
+        expected = analyze_user_command(command, index, fuzzy=True)
+        assert analyze_user_command(command, index, cache=ResultCache(), fuzzy=True) == expected
+
+@pytest.mark.parametrize("mode", MATCH_MODES)
+def test_shared_cache_result_does_not_depend_on_order(index, mode):
+    from result_cache import ResultCache
+
+    variants = ["ＳＥＡＲＣＨ weather", "search weather", "Search Weather  ", "search weather!!", "SEARCH WEATHER"]
+    expected = [analyze_user_command(command, index, mode) for command in variants]
+    # 同一个缓存先后处理同一命令的多种写法：无论哪种写法先填充缓存，每种写法的结果都与不经缓存时相同
+    for order in (variants, variants[::-1]):
+        cache = ResultCache()
+        for command in order:
+            assert analyze_user_command(command, index, mode, cache=cache) == expected[variants.index(command)]
+    cache = ResultCache()
+    for command in variants + variants:
+        analyze_user_command(command, index, mode, cache=cache)
+    assert cache.stats()['hits'] > len(variants)
+
+def test_compiled_model_matches_loaded_skills(tmp_path):
+    import load_skills
+    import matcher_model
+
+    skill_dir = tmp_path / "skills"
+    for name, description in [("invoice-parser", "Parse supplier invoices"), ("weather", "Local forecasts")]:
+        (skill_dir / name).mkdir(parents=True)
+        (skill_dir / name / "SKILL.md").write_text(
+            f"---\nname: {name}\ndescription: {description}\n---\n", encoding='utf-8')
+    skill_dirs = [str(skill_dir)]
+    model_path = str(tmp_path / "compiled_matcher.json")
+
+    # 编译产物与 load_available_skills 经同一个注册表得到相同的技能列表
+    expected = load_skills.load_available_skills(skill_dirs)
+    assert matcher_model.compile_matcher(model_path, skill_dirs).skills == expected
+    assert matcher_model.load_matcher(model_path, skill_dirs).skills == expected
+
+def test_ngram_weights_reach_the_ngram_index(index):
+    from cjk_ngram_index import DEFAULT_NGRAM_WEIGHTS, CJKNgramIndex
+    from result_cache import ResultCache
+
+    command = "明天会不会下雨"
+    weights = {1: 0.0, 2: 1.0, 3: 3.0}
+    default = analyze_user_command(command, index, 'ngram')
+    assert analyze_user_command(command, index, 'ngram', ngram_weights=DEFAULT_NGRAM_WEIGHTS) == default
+
+    weighted = analyze_user_command(command, index, 'ngram', ngram_weights=weights)
+    ngram_index = CJKNgramIndex(index, weights)
+    skill_id, score = ngram_index.top_k(command, 1)[0]
+    assert weighted['matches'][0]['skill_name'] == index.skills[skill_id]['name']
+    assert weighted['matches'][0]['confidence'] == ngram_index.confidence(score)
+    assert weighted != default
+
+    # 不同权重的结果分别缓存
+    cache = ResultCache()
+    assert analyze_user_command(command, index, 'ngram', cache=cache) == default
+    assert analyze_user_command(command, index, 'ngram', cache=cache, ngram_weights=weights) == weighted
+
+@pytest.fixture(scope="module")
+def large_index():
+    import random
+
+    from benchmark_matcher import generate_skill
+    from skill_index import SkillIndex
+
+    rng = random.Random(42)
+    return SkillIndex([generate_skill(skill_id, rng) for skill_id in range(300)])
+
+@pytest.fixture(scope="module")
+def replayed_commands():
+    from benchmark_matcher import replay_commands
+
+    return replay_commands(200)
+
+def test_lsh_small_catalog_uses_weighted_path(index):
+    for command in COMMANDS:
+        assert analyze_user_command(command, index, 'lsh') == analyze_user_command(command, index)
+
+def test_lsh_recall_and_rows_reach_the_lsh_index(large_index, replayed_commands):
+    from lsh_index import get_lsh_index
+
+    for command in replayed_commands:
+        # recall=1 时不剪枝，结果与 weighted 相同
+        assert (analyze_user_command(command, large_index, 'lsh', lsh_recall=1.0)
+                == analyze_user_command(command, large_index))
+    assert get_lsh_index(large_index).full_scan_only
+
+    for command in replayed_commands:
+        pruned = analyze_user_command(command, large_index, 'lsh', lsh_recall=0.5, lsh_rows=2)
+        expected = analyze_user_command(command, large_index)
+        # 剪枝只会漏掉技能，不会改变分数
+        if pruned['matches']:
+            assert pruned['matches'][0]['confidence'] <= expected['matches'][0]['confidence']
+    lsh = get_lsh_index(large_index)
+    assert (lsh.recall, lsh.rows) == (0.5, 2) and not lsh.full_scan_only
+
+@pytest.fixture(scope="module")
+def benchmark_commands():
+    from benchmark_matcher import replay_commands
+
+    return replay_commands(3000)
+
+def test_maxscore_matches_weighted(index, large_index, benchmark_commands):
+    for skill_index in (index, large_index):
+        for command in benchmark_commands:
+            assert (analyze_user_command(command, skill_index, 'maxscore')
+                    == analyze_user_command(command, skill_index))
+    for command in benchmark_commands:
+        assert (analyze_user_command(command, index, 'maxscore', fuzzy=True)
+                == analyze_user_command(command, index, fuzzy=True))
+
+def test_sharded_matches_weighted(index, large_index, benchmark_commands):
+    import sharded_matcher
+    from analyze_command import analyze_user_commands
+
+    try:
+        for skill_index in (index, large_index):
+            expected = analyze_user_commands(benchmark_commands, skill_index)
+            assert expected == [analyze_user_command(command, skill_index) for command in benchmark_commands]
+            assert analyze_user_commands(benchmark_commands, skill_index, processes=2, mode='sharded') == expected
+        fuzzy = analyze_user_commands(benchmark_commands, index, processes=2, mode='sharded', fuzzy=True)
+        assert fuzzy == analyze_user_commands(benchmark_commands, index, fuzzy=True)
+    finally:
+        sharded_matcher._close_cached()
+
+def _full_scan(command, skills):
+    """不使用索引、逐技能调用 calculate_match_score 的原始实现（同 benchmark_matcher 的 legacy 模式）"""
+    from analyze_command import calculate_match_score, generate_analysis_summary, get_match_reasoning
+
+    command_lower = command.lower().strip()
+    matches = []
+    for skill in skills:
+        score = calculate_match_score(command_lower, skill)
+        if score > 0:
+            matches.append({
+                'skill_name': skill['name'],
+                'description': skill['description'],
+                'confidence': score,
+                'reasoning': get_match_reasoning(command_lower, skill)
+            })
+    matches.sort(key=lambda x: x['confidence'], reverse=True)
+    return {
+        'original_command': command,
+        'matches': matches[:3],
+        'analysis_summary': generate_analysis_summary(command, matches)
+    }
+
+def test_indexed_result_matches_full_scan(index, large_index, benchmark_commands, replayed_commands):
+    # 全量扫描很慢，大技能库只回放较少的命令
+    for skill_index, commands in ((index, benchmark_commands), (large_index, replayed_commands)):
+        for command in commands:
+            assert analyze_user_command(command, skill_index) == _full_scan(command, skill_index.skills)
+
+def test_indexed_skill_score_matches_full_scan(index, large_index, replayed_commands):
+    from analyze_command import calculate_match_score
+
+    for skill_index in (index, large_index):
+        for command in replayed_commands[:60]:
+            command_lower = command.lower().strip()
+            for skill in skill_index.skills:
+                assert (calculate_match_score(command_lower, skill, skill_index)
+                        == calculate_match_score(command_lower, skill))
+
+def test_automaton_finds_the_same_terms_as_substring_scan(index, large_index, benchmark_commands):
+    from aho_corasick import AhoCorasick, CompactAhoCorasick
+
+    for skill_index in (index, large_index):
+        for command in benchmark_commands:
+            command_lower = command.lower().strip()
+            assert skill_index.find_terms(command_lower) == {term for term in skill_index.terms if term in command_lower}
+
+    # 互相重叠、互为前后缀的模式：每次出现的结束位置都要报告
+    patterns = ["he", "she", "his", "hers", "备份", "自动备份", "份策", "", "aaa", "aa", "he"]
+    for automaton in (AhoCorasick(patterns), CompactAhoCorasick(patterns)):
+        for text in ["ushers", "ahishers", "设置自动备份策略", "aaaaa", ""]:
+            expected = sorted((start + len(pattern) - 1, pattern_id)
+                              for pattern_id, pattern in enumerate(patterns) if pattern
+                              for start in range(len(text)) if text.startswith(pattern, start))
+            assert sorted(automaton.iter_matches(text)) == expected
+            assert automaton.find_all(text) == {pattern_id for _, pattern_id in expected}
+
+def test_compact_index_matches_dict_index(large_index, benchmark_commands):
+    from compact_catalog import CompactSkillIndex
+
+    compact = CompactSkillIndex(large_index.skills)
+    assert compact.terms == large_index.terms
+    for command in benchmark_commands:
+        command_lower = command.lower().strip()
+        assert compact.find_terms(command_lower) == large_index.find_terms(command_lower)
+        assert analyze_user_command(command, compact) == analyze_user_command(command, large_index)
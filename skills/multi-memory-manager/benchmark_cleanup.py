@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆清理性能基准
+生成指定大小的合成 OPERATION_LOG.md / WORKING_CONTEXT.md，测量 Markdown 后端清理过期条目的
+耗时和峰值内存。每次清理在独立子进程中运行，峰值内存互不影响；
+legacy 为整文件读入内存后 split 的原始实现，作为对照（文件较大时可能耗尽内存）
+"""
+
+import contextlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(current_dir)
+
+DEFAULT_SIZES_MB = [2048]
+DEFAULT_SEED = 42
+TARGETS = ('operation_log', 'working_context')
+IMPLEMENTATIONS = ('streaming', 'legacy')
+
+TARGET_FILES = {'operation_log': "OPERATION_LOG.md", 'working_context': "WORKING_CONTEXT.md"}
+
+OPERATION_TYPES = ['CODE_EDIT', 'JSON_CONFIG', 'FILE_CREATE', 'FILE_DELETE', 'SYSTEM_CONFIG']
+IMPORTANCE_LEVELS = ['critical', 'high', 'normal', 'normal', 'low']
+DETAIL_WORDS = ['修改', '配置', '文件', '函数', '索引', 'update', 'config', 'handler', 'cache', 'retry']
+
+def peak_rss_mb():
+    """当前进程的峰值常驻内存（MB）"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux上单位为KB，macOS上为字节
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+def generate_file(path, target, size_mb, seed=DEFAULT_SEED):
+    """
+    生成合成记忆文件，条目时间在最近6天内均匀分布（约一半以上会被清理）
+    Args:
+        path (Path): 输出文件
+        target (str): operation_log 或 working_context
+        size_mb (int): 目标大小（MB）
+        seed (int): 随机种子，相同种子生成相同的文件
+    Returns:
+        int: 生成的条目数
+    """
+    rng = random.Random(seed)
+    target_size = size_mb * 1024 * 1024
+    now = time.time()
+    written = 0
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target_size:
+            batch = []
+            for _ in range(1000):
+                timestamp = datetime.fromtimestamp(now - rng.randint(0, 6 * 86400)).strftime("%Y-%m-%d %H:%M:%S")
+                details = " ".join(rng.choice(DETAIL_WORDS) for _ in range(rng.randint(5, 40)))
+                if target == 'operation_log':
+                    batch.append(f"## {timestamp} - {rng.choice(OPERATION_TYPES)}\n"
+                                 f"**重要性**: {rng.choice(IMPORTANCE_LEVELS)}\n"
+                                 f"**文件**: src/module_{count % 500}.py\n"
+                                 f"**详情**: {details}\n\n")
+                else:
+                    batch.append(f"## {timestamp} - Priority: normal\n{details}\n\n")
+                count += 1
+            text = "".join(batch)
+            f.write(text)
+            written += len(text.encode('utf-8'))
+    return count
+
+def legacy_cleanup(manager, target):
+    """原始实现：整文件读入内存、split 后过滤并一次性写回"""
+    if target == 'working_context':
+        valid_context = manager.load_context()
+        with open(manager.context_file, 'w', encoding='utf-8') as f:
+            if valid_context:
+                f.write("## " + valid_context)
+        return
+
+    current_time = time.time()
+    kept_logs = []
+    with open(manager.log_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for entry in content.split('## ')[1:]:
+        if not entry.strip():
+            continue
+        try:
+            timestamp_str = entry.split(' - ')[0]
+            entry_timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").timestamp()
+            is_important = ('**重要性**: critical' in entry or '**重要性**: high' in entry)
+            if is_important or (current_time - entry_timestamp <= manager.cleanup_threshold):
+                kept_logs.append(entry)
+            else:
+                print(f"🧹 清理过期操作日志: {timestamp_str}")
+        except ValueError:
+            kept_logs.append(entry)
+    with open(manager.log_file, 'w', encoding='utf-8') as f:
+        if kept_logs:
+            f.write("## " + "## ".join(kept_logs))
+
+def run_worker(workspace, target, implementation):
+    """在当前（子）进程中对工作区执行一次清理并计时"""
+    if target == 'operation_log':
+        from operation_log import OperationLogManager
+        manager = OperationLogManager(workspace)
+        cleanup = manager.cleanup_old_logs
+    else:
+        from working_context import WorkingContextManager
+        manager = WorkingContextManager(workspace)
+        cleanup = manager.cleanup_expired
+
+    path = Path(workspace) / TARGET_FILES[target]
+    size_before = path.stat().st_size
+    baseline_rss = peak_rss_mb()
+    start = time.perf_counter()
+    # 每条过期条目都会打印一行，测量时丢弃
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if implementation == 'legacy':
+            legacy_cleanup(manager, target)
+        else:
+            cleanup()
+    seconds = time.perf_counter() - start
+
+    return {
+        'target': target,
+        'implementation': implementation,
+        'input_mb': round(size_before / (1024 * 1024), 1),
+        'output_mb': round(path.stat().st_size / (1024 * 1024), 1),
+        'seconds': round(seconds, 2),
+        'throughput_mb_s': round(size_before / (1024 * 1024) / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'baseline_rss_mb': round(baseline_rss, 1)
+    }
+
+def run_in_subprocess(workspace, target, implementation):
+    """在独立子进程中运行一次清理，返回其JSON结果"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker',
+         '--workspace', str(workspace), '--targets', target, '--implementations', implementation],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error_lines = completed.stderr.strip().splitlines() or [f'退出码 {completed.returncode}']
+        return {'target': target, 'implementation': implementation, 'error': error_lines[-1]}
+    return json.loads(completed.stdout)
+
+def run_benchmark(sizes_mb, targets, implementations, seed=DEFAULT_SEED, workspace_root=None):
+    """
+    对每个 (大小, 目标文件, 实现) 组合生成同样的合成文件并在子进程中清理
+    Args:
+        sizes_mb (list): 合成文件大小（MB）
+        targets (list): 要测量的记忆文件
+        implementations (list): 要测量的实现
+        seed (int): 随机种子
+        workspace_root (str): 存放合成文件的目录，缺省时使用临时目录并在结束后删除
+    Returns:
+        dict: 报告
+    """
+    report = {'python': sys.version.split()[0], 'seed': seed, 'results': []}
+    with tempfile.TemporaryDirectory(prefix='memory-cleanup-bench-', dir=workspace_root) as root:
+        workspace = Path(root)
+        for size_mb in sizes_mb:
+            for target in targets:
+                for implementation in implementations:
+                    path = workspace / TARGET_FILES[target]
+                    entries = generate_file(path, target, size_mb, seed)
+                    result = run_in_subprocess(workspace, target, implementation)
+                    result['entries'] = entries
+                    report['results'].append(result)
+                    print(f"  {size_mb:>6}MB {target:<16} {implementation:<10} "
+                          f"{result.get('seconds')}s {result.get('throughput_mb_s')}MB/s "
+                          f"rss={result.get('peak_rss_mb')}MB {result.get('error', '')}",
+                          file=sys.stderr, flush=True)
+                    path.unlink()
+    return report
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='记忆清理性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES_MB, help='合成文件大小（MB）')
+    parser.add_argument('--targets', nargs='+', default=list(TARGETS), choices=TARGETS, help='要测量的记忆文件')
+    parser.add_argument('--implementations', nargs='+', default=['streaming'], choices=IMPLEMENTATIONS,
+                        help='要测量的实现（legacy 需要数倍于文件大小的内存）')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='随机种子')
+    parser.add_argument('--workspace', help='存放合成文件的目录（--worker 时为要清理的工作区）')
+    parser.add_argument('--output', help='JSON报告输出文件，缺省输出到标准输出')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.workspace, args.targets[0], args.implementations[0])))
+        return
+
+    report = run_benchmark(args.sizes, args.targets, args.implementations, args.seed, args.workspace)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
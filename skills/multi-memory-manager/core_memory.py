@@ -6,14 +6,23 @@
 """
 
 import os
+import re
 import json
 from datetime import datetime
 from pathlib import Path
 
+# 核心指令条目：- [时间戳] 指令
+INSTRUCTION_PATTERN = re.compile(r'^- \[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\] (.+)$', re.MULTILINE)
+
 class CoreMemoryManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", store=None):
         self.workspace_path = Path(workspace_path)
         self.core_file = self.workspace_path / "CORE_MEMORY.md"
+        # SQLite存储后端（memory_store.SQLiteMemoryStore）；为None时直接读写Markdown文件。
+        # 数据库只保存核心指令，其余章节（偏好、准则等）可能被手工编辑，仍以文件为准
+        self.store = store
+        if store is not None:
+            store.import_once("core_memory", "core_instructions", self._parse_markdown_instructions)
         
     def initialize_core_memory(self):
         """初始化核心记忆文件"""
@@ -51,6 +60,16 @@ class CoreMemoryManager:
             
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
+        if self.store is not None:
+            # 数据库中检查重复，不必扫描文件
+            existing = self.store.query(
+                "SELECT 1 FROM core_instructions WHERE instr(instruction, ?) > 0 LIMIT 1",
+                (instruction.strip(),)).fetchone()
+            if existing:
+                print("ℹ️  核心指令已存在，跳过重复保存")
+                return
+            self.store.insert("core_instructions", timestamp=timestamp, instruction=instruction.strip())
+        
         # 读取现有内容
         with open(self.core_file, 'r', encoding='utf-8') as f:
             content = f.read()
@@ -97,8 +116,55 @@ class CoreMemoryManager:
         with open(self.core_file, 'r', encoding='utf-8') as f:
             return f.read()
             
+    def _core_section_bounds(self, content):
+        """核心指令部分在文件内容中的 (起始, 结束) 位置，没有该部分时返回None"""
+        if "## 核心指令" not in content:
+            return None
+        core_start = content.find("## 核心指令")
+        core_end = content.find("\n## ", core_start + 1)
+        if core_end == -1:
+            core_end = len(content)
+        return core_start, core_end
+        
+    def _parse_markdown_instructions(self):
+        """解析核心指令部分的全部条目（导入SQLite用）"""
+        if not self.core_file.exists():
+            return []
+            
+        with open(self.core_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+            
+        bounds = self._core_section_bounds(content)
+        if bounds is None:
+            return []
+        return [{'timestamp': timestamp, 'instruction': instruction.strip()}
+                for timestamp, instruction in INSTRUCTION_PATTERN.findall(content[bounds[0]:bounds[1]])]
+        
+    def export_markdown(self):
+        """由数据库重新生成 CORE_MEMORY.md 的核心指令部分，其他章节保持不变（仅SQLite后端）"""
+        from entry_stream import write_atomic
+        
+        if not self.core_file.exists():
+            self.initialize_core_memory()
+            
+        with open(self.core_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+            
+        rows = self.store.query("SELECT timestamp, instruction FROM core_instructions ORDER BY id")
+        section = "## 核心指令\n" + "".join(f"\n- [{timestamp}] {instruction}" for timestamp, instruction in rows)
+        bounds = self._core_section_bounds(content)
+        if bounds is None:
+            content = content.rstrip('\n') + "\n\n" + section + "\n"
+        else:
+            content = content[:bounds[0]] + section + content[bounds[1]:]
+        write_atomic(self.core_file, [content])
+        
     def get_core_summary(self):
         """获取核心记忆摘要"""
+        if self.store is not None:
+            count = self.store.query("SELECT COUNT(*) FROM core_instructions").fetchone()[0]
+            return f"包含 {count} 条核心指令"
+            
         if not self.core_file.exists():
             return "无核心记忆"
             
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆文件的流式读写
+记忆文件由以 "## " 开头的条目组成。iter_entries 分块读取文件并逐个产出条目，
+与 content.split('## ')[1:] 的切分完全一致，同一时刻只在内存中保留一个条目和一个读取块；
+write_atomic 把内容写入同目录的临时文件，fsync 后用 os.replace 原子替换原文件，
+写到一半崩溃时原文件保持完整。清理过期条目时两者配合，内存占用只与最大的单个条目有关
+"""
+
+import os
+
+ENTRY_MARKER = b"## "
+
+# 每次从文件读取的字节数
+CHUNK_SIZE = 1 << 20
+
+def iter_entries(path, chunk_size=CHUNK_SIZE):
+    """
+    逐个读取文件中的条目（第一个 "## " 之前的内容与 split 结果的第一段一样被忽略）
+    Args:
+        path (Path): 文件路径
+        chunk_size (int): 每次读取的字节数
+    Yields:
+        tuple: (条目在文件中的字节偏移, 条目字节串)，条目包含开头的 "## "
+    """
+    marker_size = len(ENTRY_MARKER)
+    with open(path, 'rb') as f:
+        # bytearray 原地追加和从头部删除，单个条目跨越很多读取块时不会反复复制
+        buffer = bytearray()
+        # buffer 在文件中的起始偏移；entry_start 为当前条目在 buffer 中的位置（尚未遇到条目时为None）
+        buffer_offset = 0
+        entry_start = None
+        search_from = 0
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            while True:
+                position = buffer.find(ENTRY_MARKER, search_from)
+                if position == -1:
+                    break
+                if entry_start is not None:
+                    yield buffer_offset + entry_start, bytes(buffer[entry_start:position])
+                entry_start = position
+                search_from = position + marker_size
+            if not chunk:
+                break
+            # 丢弃已产出的部分；标记可能跨越两个读取块，保留末尾不足一个标记长度的字节重新查找
+            keep_from = entry_start if entry_start is not None else max(len(buffer) - marker_size + 1, 0)
+            search_from = max(search_from, len(buffer) - marker_size + 1) - keep_from
+            del buffer[:keep_from]
+            buffer_offset += keep_from
+            if entry_start is not None:
+                entry_start = 0
+        if entry_start is not None:
+            yield buffer_offset + entry_start, bytes(buffer[entry_start:])
+
+def write_atomic(path, chunks):
+    """
+    逐块写入文件：先写同目录的临时文件并 fsync，再原子替换原文件并同步目录，
+    任何时刻中断，path 要么是旧内容要么是完整的新内容
+    Args:
+        path (Path): 目标文件路径
+        chunks (iterable): 依次写入的文本块（str 按UTF-8编码）或字节块
+    Returns:
+        int: 写入的字节数
+    """
+    temp_path = path.with_name(path.name + ".tmp")
+    written = 0
+    try:
+        with open(temp_path, 'wb') as f:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                f.write(chunk)
+                written += len(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    # 同步所在目录，确保替换操作本身落盘（不支持打开目录的平台上跳过）
+    if hasattr(os, 'O_DIRECTORY'):
+        directory_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+    return written
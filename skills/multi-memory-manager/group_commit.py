@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆文件的分组提交写入器
+各记忆组件追加条目时不再各自打开、追加、关闭文件，而是先按文件缓存在内存中，
+累计大小达到阈值、最早的条目等待超过时限、显式 flush() 或进程退出时，每个文件只打开一次、一次写入整批条目。
+持久性级别：
+- buffered: 分组提交，写入操作系统缓存，不 fsync（进程崩溃最多丢失一个提交周期内的条目）
+- fsync: 分组提交，每次提交后对写入的文件 fsync（断电最多丢失一个提交周期内的条目）
+- sync: 不缓存，每条追加立即写入并 fsync 后才返回
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+DURABILITY_LEVELS = ('buffered', 'fsync', 'sync')
+
+# 缓存的条目累计超过该字节数时立即提交
+DEFAULT_MAX_BYTES = 64 * 1024
+# 最早的未提交条目最多等待的秒数
+DEFAULT_MAX_DELAY = 1.0
+
+def append_text(path, text):
+    """默认的写入方式：追加到文件末尾"""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+def flushes_writer(method):
+    """
+    记忆组件读取或重写文件的方法使用的装饰器：组件带有写入器（self.writer）时，
+    先提交缓存的条目，并在方法执行期间持有写入器的锁，定时器和其他线程的提交要等方法返回后才写文件
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.writer is None:
+            return method(self, *args, **kwargs)
+        with self.writer.exclusive():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+def fsync_path(path):
+    """把文件已写入的内容同步到磁盘"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+class GroupCommitWriter:
+    def __init__(self, durability="buffered", max_bytes=DEFAULT_MAX_BYTES, max_delay=DEFAULT_MAX_DELAY):
+        """
+        Args:
+            durability (str): 持久性级别 (buffered/fsync/sync)
+            max_bytes (int): 缓存达到该字节数时提交
+            max_delay (float): 最早的未提交条目等待超过该秒数时提交
+        """
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"未知的持久性级别: {durability}，可选: {', '.join(DURABILITY_LEVELS)}")
+        self.durability = durability
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        # 文件路径 -> [写入函数, 待写入的文本块]；dict 保持首次写入的顺序，提交时按该顺序写文件
+        self.pending = {}
+        self.pending_bytes = 0
+        self.oldest = None
+        self.lock = threading.RLock()
+        self.timer = None
+        self.commits = 0
+        atexit.register(self.flush)
+
+    def append(self, path, text, sink=None):
+        """
+        追加文本到文件（缓存到下次提交）
+        Args:
+            path (Path): 目标文件
+            text (str): 要追加的文本
+            sink (callable): 可选的写入函数 sink(text)，用于需要同步维护索引的文件；缺省时直接追加
+        """
+        sink = sink or (lambda batch, path=path: append_text(path, batch))
+        if self.durability == 'sync':
+            with self.lock:
+                sink(text)
+                fsync_path(path)
+                self.commits += 1
+            return
+
+        with self.lock:
+            entry = self.pending.get(path)
+            if entry is None:
+                entry = self.pending[path] = [sink, []]
+            entry[1].append(text)
+            self.pending_bytes += len(text.encode('utf-8'))
+            now = time.monotonic()
+            if self.oldest is None:
+                self.oldest = now
+            if self.pending_bytes >= self.max_bytes or now - self.oldest >= self.max_delay:
+                self.flush()
+            elif self.timer is None:
+                # 之后没有新的写入时，由定时器在时限到达时提交
+                self.timer = threading.Timer(self.max_delay, self._flush_on_timer)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """
+        立即提交所有缓存的条目：每个文件打开一次、写入整批文本
+        Returns:
+            int: 提交的文件数
+        """
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            pending = self.pending
+            self.pending = {}
+            self.pending_bytes = 0
+            self.oldest = None
+
+            paths = list(pending)
+            for position, path in enumerate(paths):
+                sink, chunks = pending[path]
+                try:
+                    sink("".join(chunks))
+                    if self.durability == 'fsync':
+                        fsync_path(path)
+                except BaseException:
+                    # 写入失败的文件及其后尚未写入的文件放回缓存，下次提交时重试
+                    self.pending = {retry_path: pending[retry_path] for retry_path in paths[position:]}
+                    self.pending_bytes = sum(len(chunk.encode('utf-8'))
+                                             for _, retry_chunks in self.pending.values() for chunk in retry_chunks)
+                    self.oldest = time.monotonic()
+                    raise
+            if paths:
+                self.commits += 1
+            return len(paths)
+
+    @contextmanager
+    def exclusive(self):
+        """提交所有缓存的条目，并在with块结束前阻止其他提交（用于读取或原子重写记忆文件）"""
+        with self.lock:
+            self.flush()
+            yield
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"⚠️ 提交缓存的记忆条目失败: {e}", file=sys.stderr)
+
+    def close(self):
+        """提交剩余条目并停止定时器"""
+        self.flush()
+        atexit.unregister(self.flush)
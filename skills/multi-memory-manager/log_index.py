@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志时间偏移索引
+为 OPERATION_LOG.md 维护一个旁路索引文件，每个条目一行：
+(截至该条目的最大时间戳, 时间戳, 字节偏移, 字节长度, 重要性, 操作类型)。
+log_operation 追加条目时同步追加索引行；按时间范围查询时在索引上二分查找到第一个
+符合条件的条目，只读取之后的索引行和对应的日志片段，不再读入整个日志并逐条 strptime。
+
+条目边界与 Markdown 后端的 content.split('## ') 一致，按时间范围查询的结果与全文扫描逐字节相同；
+重要性过滤按条目的第一个 "**重要性**:" 字段精确匹配（全文扫描曾按子串匹配整个条目）。
+索引文件头记录建索引时日志的大小和修改时间，日志被清理重写或外部修改后自动重建
+"""
+
+import os
+import re
+from datetime import datetime
+
+from entry_stream import ENTRY_MARKER, iter_entries
+
+INDEX_MAGIC = b"OPLOG-INDEX 1"
+# 固定宽度的文件头：魔数、日志大小、日志修改时间(ns)、最大时间戳，追加条目时原地更新
+HEADER_FORMAT = INDEX_MAGIC + b" %020d %020d %020d\n"
+HEADER_SIZE = len(HEADER_FORMAT % (0, 0, 0))
+
+IMPORTANCE_PATTERN = re.compile(r'\*\*重要性\*\*: (\S*)')
+
+# 二分查找范围小于该字节数时改为顺序扫描
+LINEAR_SCAN_BYTES = 4096
+
+def _clean_field(value):
+    """索引字段中不能出现制表符和换行"""
+    return value.replace('\t', ' ').replace('\n', ' ')
+
+def parse_entry(piece):
+    """
+    解析一个条目片段（以 "## " 开头、到下一个 "## " 为止的字节串）
+    Returns:
+        tuple: (时间戳, 重要性, 操作类型)；标题中没有有效时间戳时返回None（与全文扫描时跳过的条目一致）
+    """
+    text = piece[len(ENTRY_MARKER):].decode('utf-8', 'replace')
+    try:
+        timestamp_str = text.split(' - ')[0]
+        epoch = int(datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").timestamp())
+    except ValueError:
+        return None
+    first_line = text.split('\n', 1)[0]
+    op_type = first_line.split(' - ')[1].lower() if ' - ' in first_line else 'unknown'
+    importance_match = IMPORTANCE_PATTERN.search(text)
+    importance = importance_match.group(1) if importance_match else ''
+    return epoch, _clean_field(importance), _clean_field(op_type)
+
+def split_entries(data, base_offset=0):
+    """
+    按 "## " 切分日志内容，与 content.split('## ')[1:] 的边界一致
+    Yields:
+        tuple: (字节偏移, 片段)，片段包含开头的 "## "
+    """
+    position = data.find(ENTRY_MARKER)
+    while position != -1:
+        next_position = data.find(ENTRY_MARKER, position + len(ENTRY_MARKER))
+        end = next_position if next_position != -1 else len(data)
+        yield base_offset + position, data[position:end]
+        position = next_position
+
+class OperationLogIndex:
+    def __init__(self, log_file, index_file):
+        """
+        Args:
+            log_file (Path): OPERATION_LOG.md 路径
+            index_file (Path): 索引文件路径
+        """
+        self.log_file = log_file
+        self.index_file = index_file
+
+    def _read_header(self):
+        """读取索引文件头，返回 (日志大小, 日志修改时间, 最大时间戳)；索引不存在或损坏时返回None"""
+        try:
+            with open(self.index_file, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+        except FileNotFoundError:
+            return None
+        fields = header.split()
+        if len(header) != HEADER_SIZE or header[:len(INDEX_MAGIC)] != INDEX_MAGIC or len(fields) != 5:
+            return None
+        return int(fields[2]), int(fields[3]), int(fields[4])
+
+    def _is_current(self, header, stat):
+        return header is not None and header[:2] == (stat.st_size, stat.st_mtime_ns)
+
+    def ensure(self):
+        """
+        确保索引与日志一致，不一致时重建
+        Returns:
+            tuple|None: 索引文件头；日志不存在时为None
+        """
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            return None
+        header = self._read_header()
+        if not self._is_current(header, stat):
+            header = self.rebuild()
+        return header
+
+    def rebuild(self):
+        """全量扫描日志重建索引（日志被重写或首次使用时），逐条流式读取，先写临时文件再原子替换"""
+        stat = os.stat(self.log_file)
+        max_epoch = 0
+        temp_file = self.index_file.with_name(self.index_file.name + ".tmp")
+        with open(temp_file, 'wb') as f:
+            f.write(HEADER_FORMAT % (stat.st_size, stat.st_mtime_ns, max_epoch))
+            for offset, piece in iter_entries(self.log_file):
+                parsed = parse_entry(piece)
+                if parsed is None:
+                    continue
+                epoch, importance, op_type = parsed
+                max_epoch = max(max_epoch, epoch)
+                f.write(f"{max_epoch}\t{epoch}\t{offset}\t{len(piece)}\t{importance}\t{op_type}\n".encode('utf-8'))
+            # 最大时间戳扫描结束才知道，回填到固定宽度的文件头
+            f.seek(0)
+            f.write(HEADER_FORMAT % (stat.st_size, stat.st_mtime_ns, max_epoch))
+        os.replace(temp_file, self.index_file)
+        return stat.st_size, stat.st_mtime_ns, max_epoch
+
+    def append(self, entry):
+        """
+        把条目追加到日志，并同步追加索引行
+        Args:
+            entry (str): 完整的日志条目文本
+        """
+        header = self.ensure()
+        data = entry.encode('utf-8')
+        with open(self.log_file, 'ab') as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(data)
+        stat = os.stat(self.log_file)
+        if offset != (header[0] if header else 0) or stat.st_size != offset + len(data):
+            # 确认索引与写入之间（或写入之后）其他进程也追加了条目：增量索引会漏掉这些条目，整体重建
+            self.rebuild()
+            return
+
+        max_epoch = header[2] if header else 0
+        lines = []
+        for piece_offset, piece in split_entries(data, offset):
+            parsed = parse_entry(piece)
+            if parsed is None:
+                continue
+            epoch, importance, op_type = parsed
+            max_epoch = max(max_epoch, epoch)
+            lines.append(f"{max_epoch}\t{epoch}\t{piece_offset}\t{len(piece)}\t{importance}\t{op_type}\n")
+
+        if header is None:
+            # 日志刚创建：直接写出完整索引
+            with open(self.index_file, 'wb') as f:
+                f.write(HEADER_FORMAT % (stat.st_size, stat.st_mtime_ns, max_epoch))
+                f.write("".join(lines).encode('utf-8'))
+            return
+        with open(self.index_file, 'r+b') as f:
+            f.seek(0, os.SEEK_END)
+            f.write("".join(lines).encode('utf-8'))
+            f.seek(0)
+            f.write(HEADER_FORMAT % (stat.st_size, stat.st_mtime_ns, max_epoch))
+
+    def invalidate(self):
+        """删除索引（日志被整体重写后调用，下次查询时重建）"""
+        try:
+            os.remove(self.index_file)
+        except FileNotFoundError:
+            pass
+
+    def _seek_first(self, f, cutoff):
+        """
+        二分查找第一个“截至该条目的最大时间戳”不小于cutoff的索引行，返回其位置
+        （最大时间戳单调不减，时钟回拨时也成立；之前的条目时间戳都小于cutoff）
+        """
+        low = HEADER_SIZE
+        high = f.seek(0, os.SEEK_END)
+        while high - low > LINEAR_SCAN_BYTES:
+            middle = (low + high) // 2
+            f.seek(middle)
+            f.readline()
+            position = f.tell()
+            if position >= high:
+                high = middle
+                continue
+            line = f.readline()
+            if int(line.split(b'\t', 1)[0]) < cutoff:
+                low = position + len(line)
+            else:
+                high = position
+
+        f.seek(low)
+        while True:
+            line = f.readline()
+            if not line or int(line.split(b'\t', 1)[0]) >= cutoff:
+                return low
+            low += len(line)
+
+    def records_since(self, cutoff, importance=None):
+        """
+        时间戳不早于cutoff的条目
+        Args:
+            cutoff (float): 起始时间戳（秒）
+            importance (str): 可选的重要性过滤，与条目的重要性字段精确匹配
+        Returns:
+            list: [(偏移, 长度, 时间戳)]，按日志中的顺序；日志不存在时为None
+        """
+        if self.ensure() is None:
+            return None
+        records = []
+        with open(self.index_file, 'rb') as f:
+            f.seek(self._seek_first(f, cutoff))
+            for line in f:
+                _, epoch, offset, length, entry_importance, _ = line.rstrip(b'\n').split(b'\t')
+                if int(epoch) < cutoff:
+                    continue
+                if importance and entry_importance.decode('utf-8') != importance:
+                    continue
+                records.append((int(offset), int(length), int(epoch)))
+        return records
+
+    def read_entries(self, records):
+        """
+        读取条目原文
+        Args:
+            records (list): records_since 的结果
+        Returns:
+            list: 各条目文本（不含开头的 "## "）
+        """
+        if not records:
+            return []
+        entries = []
+        with open(self.log_file, 'rb') as f:
+            # 条目连续时一次读出整段，否则逐条定位读取
+            start = records[0][0]
+            end = records[-1][0] + records[-1][1]
+            span = end - start
+            if span <= 2 * sum(length for _, length, _ in records):
+                f.seek(start)
+                data = f.read(span)
+                for offset, length, _ in records:
+                    entries.append(data[offset - start + len(ENTRY_MARKER):offset - start + length])
+            else:
+                for offset, length, _ in records:
+                    f.seek(offset + len(ENTRY_MARKER))
+                    entries.append(f.read(length - len(ENTRY_MARKER)))
+        return [entry.decode('utf-8') for entry in entries]
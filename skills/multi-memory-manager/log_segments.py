@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按天分段的操作日志
+操作日志不再写入单个 OPERATION_LOG.md，而是写入工作区 OPERATION_LOG/ 目录：
+普通条目按条目日期写入当天的日段文件（2026-01-31.md），critical/high 条目直接写入永久段 PERMANENT.md。
+清理过期日志只需删除整段都已过期的日段文件，不再重写整个日志；
+读取最近N天的日志只打开这N天的日段，永久段通过旁路索引（log_index.py）二分定位时间范围
+"""
+
+import heapq
+import os
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from entry_stream import ENTRY_MARKER, iter_entries
+from log_index import OperationLogIndex, parse_entry
+
+SEGMENT_DIR_NAME = "OPERATION_LOG"
+PERMANENT_SEGMENT_NAME = "PERMANENT.md"
+SEGMENT_DATE_FORMAT = "%Y-%m-%d"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 写入永久段、永不过期的重要性
+PERMANENT_IMPORTANCE = ('critical', 'high')
+
+def is_permanent(entry):
+    """条目是否需要永久保存（与单文件清理时的判断一致）"""
+    return any(f'**重要性**: {level}' in entry for level in PERMANENT_IMPORTANCE)
+
+class SegmentedOperationLog:
+    def __init__(self, directory):
+        """
+        Args:
+            directory (Path): 日段目录
+        """
+        self.directory = Path(directory)
+        self.permanent_file = self.directory / PERMANENT_SEGMENT_NAME
+        self.permanent_index = OperationLogIndex(self.permanent_file,
+                                                 self.directory / f".{PERMANENT_SEGMENT_NAME}.idx")
+
+    def exists(self):
+        return self.directory.is_dir()
+
+    def segment_path(self, day):
+        """某一天的日段文件路径"""
+        return self.directory / f"{day.strftime(SEGMENT_DATE_FORMAT)}.md"
+
+    def day_segments(self):
+        """
+        现有的日段
+        Returns:
+            list: [(日期, 路径)]，按日期升序
+        """
+        if not self.exists():
+            return []
+        segments = []
+        for path in self.directory.glob("*.md"):
+            try:
+                day = datetime.strptime(path.stem, SEGMENT_DATE_FORMAT).date()
+            except ValueError:
+                continue
+            segments.append((day, path))
+        segments.sort()
+        return segments
+
+    def append(self, entry, timestamp, writer=None):
+        """
+        追加条目：重要条目写入永久段（同步追加索引），其余写入条目日期对应的日段
+        Args:
+            entry (str): 完整的条目文本（以 "## " 开头）
+            timestamp (str): 条目时间戳
+            writer (GroupCommitWriter): 可选的分组提交写入器，缺省时直接写文件
+        Returns:
+            Path: 写入的段文件
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if is_permanent(entry):
+            if writer is not None:
+                writer.append(self.permanent_file, entry, self.permanent_index.append)
+            else:
+                self.permanent_index.append(entry)
+            return self.permanent_file
+        path = self.segment_path(datetime.strptime(timestamp, TIMESTAMP_FORMAT))
+        if writer is not None:
+            writer.append(path, entry)
+        else:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(entry)
+        return path
+
+    def expire(self, cutoff):
+        """
+        删除整段都早于cutoff的日段（该日结束时刻不晚于cutoff）
+        Args:
+            cutoff (float): 过期时间戳，早于它的普通条目可以删除
+        Returns:
+            list: 被删除的日段日期
+        """
+        removed = []
+        for day, path in self.day_segments():
+            day_end = datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+            if day_end > cutoff:
+                break
+            os.remove(path)
+            removed.append(day)
+        return removed
+
+    def _read_segment(self, path, cutoff, importance=None):
+        """读取一个日段中不早于cutoff的条目，返回 [(时间戳, 条目文本)]"""
+        entries = []
+        for _, piece in iter_entries(path):
+            parsed = parse_entry(piece)
+            if parsed is None or parsed[0] < cutoff:
+                continue
+            if importance and parsed[1] != importance:
+                continue
+            entries.append((parsed[0], piece[len(ENTRY_MARKER):].decode('utf-8')))
+        return entries
+
+    def entries_since(self, cutoff, importance=None):
+        """
+        时间戳不早于cutoff的条目
+        Args:
+            cutoff (float): 起始时间戳（秒）
+            importance (str): 可选的重要性过滤
+        Returns:
+            list: 条目文本（不含开头的 "## "），按时间排序；目录不存在时为None
+        """
+        if not self.exists():
+            return None
+
+        # 永久段：在旁路索引上定位时间范围
+        records = self.permanent_index.records_since(cutoff, importance) or []
+        permanent = [(epoch, entry) for (_, _, epoch), entry
+                     in zip(records, self.permanent_index.read_entries(records))]
+
+        # 日段：只打开时间范围内的各天；日段中没有 critical/high 条目
+        first_day = datetime.fromtimestamp(cutoff).date()
+        daily = []
+        if importance not in PERMANENT_IMPORTANCE:
+            for day, path in self.day_segments():
+                if day >= first_day:
+                    daily.extend(self._read_segment(path, cutoff, importance))
+
+        # 两路各自按时间有序，合并时同一秒内永久段在前
+        return [entry for _, entry in heapq.merge(permanent, daily, key=lambda item: item[0])]
+
+    def iter_all(self):
+        """依次产出所有段（永久段在前）中的条目文本（不含开头的 "## "）"""
+        paths = []
+        if self.permanent_file.exists():
+            paths.append(self.permanent_file)
+        paths.extend(path for _, path in self.day_segments())
+        for path in paths:
+            for _, piece in iter_entries(path):
+                yield piece[len(ENTRY_MARKER):].decode('utf-8')
+
+    def migrate(self, log_file):
+        """
+        把单文件日志拆分为日段：先在临时目录中生成，完成后整体改名为日段目录，
+        原日志改名为 OPERATION_LOG.md.migrated 保留。不以有效时间戳开头的片段（如正文中的 "## " 小标题）
+        跟随上一个条目写入同一段，位于文件开头的写入永久段（与单文件清理时一样保留）
+        Args:
+            log_file (Path): 原 OPERATION_LOG.md
+        Returns:
+            int: 迁移的条目数
+        """
+        temp_directory = self.directory.with_name(self.directory.name + ".tmp")
+        # 上次迁移中断时留下的临时目录
+        if temp_directory.exists():
+            shutil.rmtree(temp_directory)
+        temp_directory.mkdir(parents=True)
+
+        count = 0
+        current_path = None
+        current_file = None
+        try:
+            for _, piece in iter_entries(log_file):
+                entry = piece[len(ENTRY_MARKER):].decode('utf-8')
+                try:
+                    entry_time = datetime.strptime(entry.split(' - ')[0], TIMESTAMP_FORMAT)
+                except ValueError:
+                    path = current_path or temp_directory / PERMANENT_SEGMENT_NAME
+                else:
+                    path = temp_directory / (PERMANENT_SEGMENT_NAME if is_permanent(entry) else
+                                             f"{entry_time.strftime(SEGMENT_DATE_FORMAT)}.md")
+                    count += 1
+                if path != current_path:
+                    if current_file is not None:
+                        current_file.close()
+                    current_file = open(path, 'ab')
+                    current_path = path
+                current_file.write(piece)
+        finally:
+            if current_file is not None:
+                current_file.close()
+
+        # 永久段的旁路索引在首次查询时重建
+        os.replace(temp_directory, self.directory)
+        os.replace(log_file, log_file.with_name(log_file.name + ".migrated"))
+        return count
@@ -12,11 +12,23 @@ from datetime import datetime
 from pathlib import Path
 import re
 
+from group_commit import flushes_writer
+
+# 预编译的解析规则（整理历史时会对每个条目调用）
+SENTENCE_SEPARATOR_PATTERN = re.compile(r'[。！？.!?]')
+TOPIC_PATTERN = re.compile(r'## ([^-\n]+)')
+
 class LogicHistoryManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", store=None, writer=None):
         self.workspace_path = Path(workspace_path)
         self.history_file = self.workspace_path / "LOGIC_HISTORY.md"
         self.optimization_interval = 7 * 24 * 3600  # 7天优化一次
+        # SQLite存储后端（memory_store.SQLiteMemoryStore）；为None时直接读写Markdown文件
+        self.store = store
+        # 分组提交写入器（group_commit.GroupCommitWriter）；为None时每次追加直接写文件
+        self.writer = writer
+        if store is not None:
+            store.import_once("logic_history", "logic_history", self._parse_markdown_entries)
         
     def save_logic_entry(self, topic, logic_content, importance="medium"):
         """
@@ -31,25 +43,25 @@ class LogicHistoryManager:
         # 提取关键点
         key_points = self._extract_key_points(logic_content)
         
-        entry = f"""## {topic} - {timestamp}
-**重要性**: {importance}
-**关键点**: {key_points}
-
-{logic_content}
-
----
-"""
+        entry = "## " + self._format_entry(topic, timestamp, importance, key_points, logic_content)
         
-        # 追加到文件
-        with open(self.history_file, 'a', encoding='utf-8') as f:
-            f.write(entry)
+        if self.store is not None:
+            self.store.insert("logic_history", timestamp=timestamp, topic=topic, importance=importance,
+                              key_points=key_points, content=logic_content)
+        
+        # 追加到文件（SQLite后端下为导出视图）
+        if self.writer is not None:
+            self.writer.append(self.history_file, entry)
+        else:
+            with open(self.history_file, 'a', encoding='utf-8') as f:
+                f.write(entry)
             
         print(f"✅ 逻辑历史已保存到 {self.history_file}")
         
     def _extract_key_points(self, content):
         """从内容中提取关键点"""
         # 简单的关键点提取逻辑
-        sentences = re.split(r'[。！？.!?]', content)
+        sentences = SENTENCE_SEPARATOR_PATTERN.split(content)
         key_sentences = []
         
         # 寻找包含关键词的句子
@@ -64,6 +76,71 @@ class LogicHistoryManager:
             
         return "; ".join(key_sentences[:2])  # 最多返回2个关键点
         
+    def _format_entry(self, topic, timestamp, importance, key_points, content):
+        """条目在Markdown文件中的格式（不含开头的 "## "）"""
+        return f"""{topic} - {timestamp}
+**重要性**: {importance}
+**关键点**: {key_points}
+
+{content}
+
+---
+"""
+        
+    def _parse_markdown_entries(self):
+        """解析Markdown文件中的全部条目（导入SQLite用），正文中的 "## " 片段归入所在条目"""
+        from memory_store import split_entries
+        
+        if not self.history_file.exists():
+            return []
+            
+        with open(self.history_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+            
+        rows = []
+        for entry in split_entries(content, self._is_entry_header):
+            lines = entry.split('\n')
+            topic, _, timestamp = lines[0].rpartition(' - ')
+            fields = {'importance': 'medium', 'key_points': ''}
+            body_start = 1
+            for i, line in enumerate(lines[1:3], start=1):
+                if i < body_start:
+                    continue
+                if line.startswith('**重要性**: '):
+                    fields['importance'] = line[len('**重要性**: '):].strip()
+                    body_start = i + 1
+                elif line.startswith('**关键点**: '):
+                    # 关键点取自正文的前几句，可能跨多行，一直到正文之前的空行
+                    end = i + 1
+                    while end < len(lines) and lines[end]:
+                        end += 1
+                    fields['key_points'] = '\n'.join([line[len('**关键点**: '):]] + lines[i + 1:end]).strip()
+                    body_start = end
+            body = '\n'.join(lines[body_start:]).strip('\n')
+            if body.endswith('---'):
+                body = body[:-3].rstrip('\n')
+            rows.append({'timestamp': timestamp.strip(), 'topic': topic, 'content': body, **fields})
+        return rows
+        
+    def _is_entry_header(self, piece):
+        """片段是否以条目标题（"主题 - 时间戳"）开头"""
+        topic, separator, timestamp = piece.split('\n', 1)[0].rpartition(' - ')
+        try:
+            datetime.strptime(timestamp.strip(), "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return False
+        return bool(separator)
+        
+    @flushes_writer
+    def export_markdown(self):
+        """由数据库重新生成 LOGIC_HISTORY.md（仅SQLite后端）"""
+        from entry_stream import write_atomic
+        
+        rows = self.store.query(
+            "SELECT topic, timestamp, importance, key_points, content FROM logic_history ORDER BY id")
+        write_atomic(self.history_file, ("## " + self._format_entry(*row) for row in rows))
+        
+    @flushes_writer
     def load_logic_history(self, topic_filter=None):
         """
         加载逻辑历史
@@ -72,6 +149,22 @@ class LogicHistoryManager:
         Returns:
             str: 逻辑历史内容
         """
+        if self.store is not None and topic_filter:
+            # 与Markdown后端一致按子串匹配整个条目；转义LIKE通配符
+            escaped = topic_filter.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f"%{escaped}%"
+            rows = self.store.query(
+                "SELECT topic, timestamp, importance, key_points, content FROM logic_history "
+                "WHERE lower(topic) LIKE ?1 ESCAPE '\\' OR lower(key_points) LIKE ?1 ESCAPE '\\' "
+                "OR lower(content) LIKE ?1 ESCAPE '\\' OR importance LIKE ?1 ESCAPE '\\' "
+                "OR timestamp LIKE ?1 ESCAPE '\\' ORDER BY id",
+                (pattern,)
+            )
+            filtered_entries = [self._format_entry(*row) for row in rows]
+            if filtered_entries:
+                return "## " + "## ".join(filtered_entries)
+            return f"未找到与 '{topic_filter}' 相关的逻辑历史"
+            
         if not self.history_file.exists():
             return ""
             
@@ -94,31 +187,48 @@ class LogicHistoryManager:
         else:
             return f"未找到与 '{topic_filter}' 相关的逻辑历史"
             
+    @flushes_writer
     def get_optimization_summary(self):
         """获取优化摘要"""
-        if not self.history_file.exists():
-            return "无逻辑历史记录"
+        if self.store is not None:
+            counts = dict(self.store.query(
+                "SELECT importance, COUNT(*) FROM logic_history GROUP BY importance").fetchall())
+            total_entries = sum(counts.values())
+            if not total_entries and not self.history_file.exists():
+                return "无逻辑历史记录"
+            high_count = counts.get('high', 0)
+            medium_count = counts.get('medium', 0)
+            low_count = counts.get('low', 0)
             
-        with open(self.history_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+            # 最近5个条目中的高重要性条目，按时间顺序
+            recent = self.store.query(
+                "SELECT topic, timestamp, importance FROM logic_history ORDER BY id DESC LIMIT 5").fetchall()
+            recent_high_entries = [f"{topic} - {timestamp}" for topic, timestamp, importance in reversed(recent)
+                                   if importance == 'high']
+        else:
+            if not self.history_file.exists():
+                return "无逻辑历史记录"
+                
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                content = f.read()
+                
+            # 统计条目数量
+            entries = content.split('## ')[1:]
+            total_entries = len(entries)
+            
+            # 统计重要性分布
+            high_count = content.count('**重要性**: high')
+            medium_count = content.count('**重要性**: medium')
+            low_count = content.count('**重要性**: low')
             
-        # 统计条目数量
-        entries = content.split('## ')[1:]
-        total_entries = len(entries)
-        
-        # 统计重要性分布
-        high_count = content.count('**重要性**: high')
-        medium_count = content.count('**重要性**: medium')
-        low_count = content.count('**重要性**: low')
-        
-        # 提取最近的重要条目
-        recent_high_entries = []
-        for entry in entries[-5:]:  # 最近5个条目
-            if '**重要性**: high' in entry:
-                lines = entry.strip().split('\n')
-                if lines:
-                    topic_timestamp = lines[0]
-                    recent_high_entries.append(topic_timestamp)
+            # 提取最近的重要条目
+            recent_high_entries = []
+            for entry in entries[-5:]:  # 最近5个条目
+                if '**重要性**: high' in entry:
+                    lines = entry.strip().split('\n')
+                    if lines:
+                        topic_timestamp = lines[0]
+                        recent_high_entries.append(topic_timestamp)
                     
         summary = f"""### 逻辑历史统计:
 - 总条目数: {total_entries}
@@ -133,8 +243,18 @@ class LogicHistoryManager:
             
         return summary
         
+    @flushes_writer
     def optimize_history(self):
         """优化历史记录，合并重复条目，清理冗余内容"""
+        if self.store is not None:
+            total = self.store.query("SELECT COUNT(*) FROM logic_history").fetchone()[0]
+            # 同一主题只保留最早的条目
+            removed = self.store.execute(
+                "DELETE FROM logic_history WHERE id NOT IN (SELECT MIN(id) FROM logic_history GROUP BY topic)")
+            self.export_markdown()
+            print(f"✅ 逻辑历史优化完成，原始条目: {total}, 优化后: {total - removed}")
+            return
+            
         if not self.history_file.exists():
             return
             
@@ -153,7 +273,7 @@ class LogicHistoryManager:
                 continue
                 
             # 提取主题
-            topic_match = re.search(r'## ([^-\n]+)', entry)
+            topic_match = TOPIC_PATTERN.search(entry)
             if topic_match:
                 topic = topic_match.group(1).strip()
                 if topic not in seen_topics:
@@ -7,25 +7,94 @@
 
 import os
 import sys
+from functools import cached_property
 from pathlib import Path
 
-# 添加当前目录到Python路径
-sys.path.append(str(Path(__file__).parent))
+# 添加当前目录到Python路径（直接运行脚本时已在路径中，不重复添加）
+current_dir = str(Path(__file__).parent)
+if current_dir not in sys.path:
+    sys.path.append(current_dir)
 
-from core_memory import CoreMemoryManager
-from working_context import WorkingContextManager  
-from logic_history import LogicHistoryManager
-from operation_log import OperationLogManager
-from task_recovery import TaskRecoveryManager
+# 存储后端：markdown 直接读写各记忆文件；sqlite 以工作区内的SQLite数据库为准，
+# Markdown文件作为导出视图（memory_store.py）
+MEMORY_BACKENDS = ('markdown', 'sqlite')
+BACKEND_ENV_VAR = 'MEMORY_BACKEND'
+
+# 操作日志布局（仅 markdown 后端）：single 为单个 OPERATION_LOG.md；segmented 按天分段，
+# 重要日志写入永久段，过期时删除整段（log_segments.py）
+LOG_LAYOUTS = ('single', 'segmented')
+LOG_LAYOUT_ENV_VAR = 'MEMORY_LOG_LAYOUT'
+
+# 设置后各组件的追加写入经分组提交写入器（group_commit.py）批量提交，取值为其持久性级别
+DURABILITY_ENV_VAR = 'MEMORY_DURABILITY'
 
 class MultiMemoryManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", backend=None, log_layout=None,
+                 durability=None):
+        self._workspace = workspace_path
         self.workspace_path = Path(workspace_path)
-        self.core_memory = CoreMemoryManager(workspace_path)
-        self.working_context = WorkingContextManager(workspace_path)
-        self.logic_history = LogicHistoryManager(workspace_path)
-        self.operation_log = OperationLogManager(workspace_path)
-        self.task_recovery = TaskRecoveryManager(workspace_path)
+        # 未指定时读取环境变量 MEMORY_BACKEND，默认 markdown
+        self.backend = backend or os.environ.get(BACKEND_ENV_VAR) or 'markdown'
+        if self.backend not in MEMORY_BACKENDS:
+            raise ValueError(f"未知的存储后端: {self.backend}，可选: {', '.join(MEMORY_BACKENDS)}")
+        # 未指定时读取环境变量 MEMORY_LOG_LAYOUT，默认 single
+        self.log_layout = log_layout or os.environ.get(LOG_LAYOUT_ENV_VAR) or 'single'
+        if self.log_layout not in LOG_LAYOUTS:
+            raise ValueError(f"未知的操作日志布局: {self.log_layout}，可选: {', '.join(LOG_LAYOUTS)}")
+        if self.log_layout == 'segmented' and self.backend == 'sqlite':
+            raise ValueError("分段操作日志只用于 markdown 后端")
+        # 未指定时读取环境变量 MEMORY_DURABILITY；都未设置时不缓存，每次追加直接写文件
+        self.durability = durability or os.environ.get(DURABILITY_ENV_VAR) or None
+        if self.durability is not None:
+            # 创建写入器时校验持久性级别
+            self.writer
+
+    @cached_property
+    def store(self):
+        """SQLite存储（仅 sqlite 后端，首次访问时打开），markdown 后端为None"""
+        if self.backend != 'sqlite':
+            return None
+        from memory_store import DB_FILE_NAME, SQLiteMemoryStore
+        return SQLiteMemoryStore(self.workspace_path / DB_FILE_NAME)
+
+    @cached_property
+    def writer(self):
+        """分组提交写入器（设置了持久性级别时创建），否则为None"""
+        if self.durability is None:
+            return None
+        from group_commit import GroupCommitWriter
+        return GroupCommitWriter(self.durability)
+
+    def flush(self):
+        """提交分组提交写入器中缓存的条目；读取或重写记忆文件之前调用，保证读到全部已保存的条目"""
+        if self.durability is not None:
+            self.writer.flush()
+
+    # 各组件在首次访问时才导入和创建，单条命令只加载用到的组件
+    @cached_property
+    def core_memory(self):
+        from core_memory import CoreMemoryManager
+        return CoreMemoryManager(self._workspace, self.store)
+
+    @cached_property
+    def working_context(self):
+        from working_context import WorkingContextManager
+        return WorkingContextManager(self._workspace, self.store, self.writer)
+
+    @cached_property
+    def logic_history(self):
+        from logic_history import LogicHistoryManager
+        return LogicHistoryManager(self._workspace, self.store, self.writer)
+
+    @cached_property
+    def operation_log(self):
+        from operation_log import OperationLogManager
+        return OperationLogManager(self._workspace, self.store, self.log_layout, self.writer)
+
+    @cached_property
+    def task_recovery(self):
+        from task_recovery import TaskRecoveryManager
+        return TaskRecoveryManager(self._workspace, self.store, self.writer)
         
     def initialize_memory_system(self):
         """初始化整个记忆系统"""
@@ -90,6 +159,8 @@ class MultiMemoryManager:
         
     def complete_task(self, task_id):
         """完成任务"""
+        # 完成任务会重写恢复文件，先提交缓存的条目
+        self.flush()
         self.task_recovery.complete_task(task_id)
         self.operation_log.log_operation(
             "task_recovery",
@@ -100,6 +171,7 @@ class MultiMemoryManager:
     def cleanup_expired_memory(self):
         """清理过期的记忆"""
         print("🧹 清理过期记忆...")
+        self.flush()
         
         # 清理工作上下文（3天过期）
         self.working_context.cleanup_expired()
@@ -112,8 +184,22 @@ class MultiMemoryManager:
         
         print("✅ 过期记忆清理完成")
         
+    def export_markdown(self):
+        """由SQLite数据库重新生成全部Markdown记忆文件（仅 sqlite 后端）"""
+        if self.store is None:
+            print("ℹ️  markdown 后端直接读写记忆文件，无需导出")
+            return
+        self.flush()
+            
+        for component in (self.core_memory, self.working_context, self.logic_history,
+                          self.operation_log, self.task_recovery):
+            component.export_markdown()
+            
+        print("✅ 记忆文件已由数据库重新生成")
+        
     def get_memory_summary(self):
         """获取所有记忆的摘要"""
+        self.flush()
         summary = "### 多记忆管理系统摘要\n\n"
         
         # 核心记忆摘要
@@ -141,6 +227,7 @@ class MultiMemoryManager:
     def load_startup_memory(self):
         """启动时加载关键记忆"""
         print("🚀 启动时加载关键记忆...")
+        self.flush()
         
         # 加载核心记忆（最高优先级）
         core_memory = self.core_memory.load_core_memory()
@@ -164,10 +251,11 @@ class MultiMemoryManager:
 # 命令行接口
 def main():
     import argparse
+    from group_commit import DURABILITY_LEVELS
     
     parser = argparse.ArgumentParser(description='多记忆管理系统')
     parser.add_argument('command', choices=[
-        'init', 'core', 'context', 'logic', 'log', 'task', 'cleanup', 'summary', 'startup'
+        'init', 'core', 'context', 'logic', 'log', 'task', 'cleanup', 'summary', 'startup', 'export'
     ], help='命令类型')
     parser.add_argument('--content', '-c', help='内容')
     parser.add_argument('--topic', '-t', help='主题（用于逻辑历史）')
@@ -179,10 +267,16 @@ def main():
                        help='优先级（用于上下文和任务）')
     parser.add_argument('--task-id', help='任务ID（用于完成任务）')
     parser.add_argument('--file-path', help='文件路径（用于操作日志）')
+    parser.add_argument('--backend', choices=MEMORY_BACKENDS,
+                       help=f'存储后端（默认读取环境变量 {BACKEND_ENV_VAR}，否则为 markdown）')
+    parser.add_argument('--log-layout', choices=LOG_LAYOUTS,
+                       help=f'操作日志布局（默认读取环境变量 {LOG_LAYOUT_ENV_VAR}，否则为 single）')
+    parser.add_argument('--durability', choices=DURABILITY_LEVELS,
+                       help=f'启用分组提交写入并设置持久性级别（默认读取环境变量 {DURABILITY_ENV_VAR}，未设置时直接写入）')
     
     args = parser.parse_args()
     
-    manager = MultiMemoryManager()
+    manager = MultiMemoryManager(backend=args.backend, log_layout=args.log_layout, durability=args.durability)
     
     if args.command == 'init':
         manager.initialize_memory_system()
@@ -233,6 +327,12 @@ def main():
     elif args.command == 'startup':
         startup_data = manager.load_startup_memory()
         print("启动记忆加载完成")
+        
+    elif args.command == 'export':
+        manager.export_markdown()
+        
+    # 退出前提交缓存的条目（atexit 也会提交，这里让写入错误在命令中直接报出）
+    manager.flush()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
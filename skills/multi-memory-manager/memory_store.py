@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite记忆存储后端
+五个记忆组件的条目保存在工作区的同一个SQLite数据库（WAL模式）中，时间、重要性、主题、
+优先级和状态列都建有索引，加载、过滤和清理只访问符合条件的行，不再随历史总量增长。
+Markdown文件保留为导出视图：追加类写入在文件末尾追加同样格式的条目，删除类操作
+（清理过期条目、完成任务、整理历史）之后由数据库重新生成整个文件
+"""
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+DB_FILE_NAME = "MEMORY_STORE.sqlite3"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS imported_views (
+    component TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS core_instructions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    instruction TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS working_context (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    priority TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS working_context_created ON working_context (created);
+CREATE INDEX IF NOT EXISTS working_context_priority ON working_context (priority);
+
+CREATE TABLE IF NOT EXISTS logic_history (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    topic TEXT NOT NULL,
+    importance TEXT NOT NULL,
+    key_points TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS logic_history_created ON logic_history (created);
+CREATE INDEX IF NOT EXISTS logic_history_topic ON logic_history (topic);
+CREATE INDEX IF NOT EXISTS logic_history_importance ON logic_history (importance);
+
+CREATE TABLE IF NOT EXISTS operation_log (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    operation_type TEXT NOT NULL,
+    importance TEXT NOT NULL,
+    file_path TEXT,
+    summary TEXT NOT NULL,
+    details TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS operation_log_created ON operation_log (created);
+CREATE INDEX IF NOT EXISTS operation_log_importance ON operation_log (importance, created);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    created REAL NOT NULL,
+    description TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, priority);
+"""
+
+def to_epoch(timestamp):
+    """把 "%Y-%m-%d %H:%M:%S" 格式的本地时间转换为时间戳（秒）"""
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).timestamp()
+
+def split_entries(content, is_header):
+    """
+    按 "## " 切分Markdown记忆文件（切分位置与 content.split('## ') 相同）。
+    不以条目标题开头的片段（条目正文里的 "## 小标题"、行中的 "## " 等）属于上一个条目，
+    原样接回上一个条目的正文，而不是作为无效条目丢弃
+    Args:
+        content (str): 文件内容
+        is_header (callable): is_header(片段) 判断片段是否以条目标题开头
+    Returns:
+        list: 各条目文本（不含开头的 "## "）；第一个条目之前无法归属的片段不包含在内
+    """
+    entries = []
+    for piece in content.split('## ')[1:]:
+        if is_header(piece):
+            entries.append(piece)
+        elif entries:
+            entries[-1] += '## ' + piece
+    return entries
+
+class SQLiteMemoryStore:
+    def __init__(self, db_path):
+        """
+        打开（必要时创建）记忆数据库
+        Args:
+            db_path (str|Path): 数据库文件路径
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        # WAL模式下读不阻塞写；synchronous=NORMAL 在WAL下只在检查点时同步，崩溃不会损坏数据库
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def query(self, sql, params=()):
+        """执行查询，返回游标（可逐行迭代）"""
+        return self.connection.execute(sql, params)
+
+    def execute(self, sql, params=()):
+        """执行写操作并提交，返回受影响的行数"""
+        with self.connection:
+            return self.connection.execute(sql, params).rowcount
+
+    def insert(self, table, **values):
+        """插入一行；带 timestamp 的行同时写入用于范围查询的 created 列"""
+        if 'timestamp' in values and 'created' not in values:
+            values['created'] = to_epoch(values['timestamp'])
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        with self.connection:
+            self.connection.execute(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                                    tuple(values.values()))
+
+    def import_once(self, component, table, load_rows):
+        """
+        组件首次使用数据库时导入其已有的Markdown条目；登记和导入在同一个事务中，
+        解析失败时不会留下“已导入”的标记
+        Args:
+            component (str): 组件名
+            table (str): 目标表
+            load_rows (callable): 返回待导入行（字典）列表的函数，只在需要导入时调用
+        Returns:
+            int: 导入的行数，已导入过时为0
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO imported_views (component) VALUES (?)", (component,))
+            if cursor.rowcount != 1:
+                return 0
+            rows = load_rows()
+            for row in rows:
+                if 'timestamp' in row and 'created' not in row:
+                    row['created'] = to_epoch(row['timestamp'])
+            if rows:
+                columns = list(rows[0])
+                placeholders = ", ".join("?" for _ in columns)
+                self.connection.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                    [tuple(row[column] for column in columns) for row in rows]
+                )
+            return len(rows)
+
+    def close(self):
+        self.connection.close()
@@ -3,6 +3,7 @@
 """
 操作日志管理模块
 记录代码修改、JSON配置变更等操作，重要记录永久保存，普通记录1天后删除
+日志布局：single 为单个 OPERATION_LOG.md；segmented 按天分段（log_segments.py），过期时删除整段
 """
 
 import os
@@ -10,13 +11,35 @@ import json
 import time
 from datetime import datetime, timedelta
 from pathlib import Path
-import hashlib
+
+from entry_stream import iter_entries, write_atomic
+from group_commit import flushes_writer
+from log_index import OperationLogIndex
 
 class OperationLogManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", store=None, layout="single", writer=None):
         self.workspace_path = Path(workspace_path)
         self.log_file = self.workspace_path / "OPERATION_LOG.md"
         self.cleanup_threshold = 24 * 3600  # 1天（秒）
+        # 时间偏移旁路索引：每个条目的 (时间戳, 字节偏移, 重要性, 操作类型)，用于按时间范围和重要性查询
+        self.log_index = OperationLogIndex(self.log_file, self.workspace_path / ".OPERATION_LOG.md.idx")
+        # SQLite存储后端（memory_store.SQLiteMemoryStore）；为None时直接读写Markdown文件
+        self.store = store
+        # 分组提交写入器（group_commit.GroupCommitWriter）；为None时每次追加直接写文件
+        self.writer = writer
+        if store is not None:
+            store.import_once("operation_log", "operation_log", self._parse_markdown_entries)
+        # 按天分段的日志（log_segments.SegmentedOperationLog），仅 markdown 后端；为None时使用单文件
+        self.segments = None
+        if layout == "segmented":
+            if store is not None:
+                raise ValueError("分段操作日志只用于 markdown 后端，SQLite后端本身按时间索引")
+            from log_segments import SEGMENT_DIR_NAME, SegmentedOperationLog
+            self.segments = SegmentedOperationLog(self.workspace_path / SEGMENT_DIR_NAME)
+            # 首次使用时把已有的单文件日志拆分为日段
+            if not self.segments.exists() and self.log_file.exists():
+                count = self.segments.migrate(self.log_file)
+                print(f"📦 已将 {count} 条操作日志拆分为日段: {self.segments.directory}")
         
     def log_operation(self, operation_type, details, importance="normal", file_path=None):
         """
@@ -32,21 +55,33 @@ class OperationLogManager:
         # 生成操作摘要
         operation_summary = self._generate_operation_summary(operation_type, details, file_path)
         
-        log_entry = f"""## {timestamp} - {operation_type.upper()}
-**重要性**: {importance}
-**文件**: {file_path or 'N/A'}
-**摘要**: {operation_summary}
-
-{details}
-
----
-"""
+        log_entry = "## " + self._format_entry(timestamp, operation_type, importance, file_path,
+                                               operation_summary, details)
+        
+        if self.store is not None:
+            self.store.insert("operation_log", timestamp=timestamp, operation_type=operation_type,
+                              importance=importance, file_path=file_path, summary=operation_summary,
+                              details=details)
         
-        # 追加到日志文件
-        with open(self.log_file, 'a', encoding='utf-8') as f:
-            f.write(log_entry)
+        log_path = self.log_file
+        if self.store is not None:
+            # 追加到导出视图
+            if self.writer is not None:
+                self.writer.append(self.log_file, log_entry)
+            else:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(log_entry)
+        elif self.segments is not None:
+            # 追加到当天的日段或永久段
+            log_path = self.segments.append(log_entry, timestamp, self.writer)
+        elif self.writer is not None:
+            # 整批条目提交时一次追加到日志文件和旁路索引
+            self.writer.append(self.log_file, log_entry, self.log_index.append)
+        else:
+            # 追加到日志文件，同时追加旁路索引
+            self.log_index.append(log_entry)
             
-        print(f"✅ 操作日志已记录到 {self.log_file}")
+        print(f"✅ 操作日志已记录到 {log_path}")
         
     def _generate_operation_summary(self, operation_type, details, file_path):
         """生成操作摘要"""
@@ -66,123 +101,224 @@ class OperationLogManager:
             # 截取详情的前50个字符作为摘要
             return details[:50] + "..." if len(details) > 50 else details
             
+    def _format_entry(self, timestamp, operation_type, importance, file_path, summary, details):
+        """条目在Markdown文件中的格式（不含开头的 "## "）"""
+        return f"""{timestamp} - {operation_type.upper()}
+**重要性**: {importance}
+**文件**: {file_path or 'N/A'}
+**摘要**: {summary}
+
+{details}
+
+---
+"""
+        
+    def _parse_markdown_entries(self):
+        """解析Markdown文件中的全部条目（导入SQLite用），正文中的 "## " 片段归入所在条目"""
+        from memory_store import split_entries
+        
+        if not self.log_file.exists():
+            return []
+            
+        with open(self.log_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+            
+        rows = []
+        for entry in split_entries(content, self._is_entry_header):
+            lines = entry.split('\n')
+            timestamp, _, operation_type = lines[0].partition(' - ')
+            fields = {'importance': 'normal', 'file_path': None, 'summary': ''}
+            body_start = 1
+            for i, line in enumerate(lines[1:4], start=1):
+                if line.startswith('**重要性**: '):
+                    fields['importance'] = line[len('**重要性**: '):].strip()
+                elif line.startswith('**文件**: '):
+                    file_path = line[len('**文件**: '):].strip()
+                    fields['file_path'] = None if file_path == 'N/A' else file_path
+                elif line.startswith('**摘要**: '):
+                    fields['summary'] = line[len('**摘要**: '):].strip()
+                else:
+                    break
+                body_start = i + 1
+            details = '\n'.join(lines[body_start:]).strip('\n')
+            if details.endswith('---'):
+                details = details[:-3].rstrip('\n')
+            rows.append({'timestamp': timestamp, 'operation_type': operation_type.strip().lower(),
+                         'details': details, **fields})
+        return rows
+        
+    def _is_entry_header(self, piece):
+        """片段是否以条目标题（"时间戳 - 操作类型"）开头"""
+        timestamp, separator, _ = piece.split('\n', 1)[0].partition(' - ')
+        try:
+            datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return False
+        return bool(separator)
+        
+    @flushes_writer
+    def export_markdown(self):
+        """由数据库重新生成 OPERATION_LOG.md（仅SQLite后端）"""
+        rows = self.store.query(
+            "SELECT timestamp, operation_type, importance, file_path, summary, details "
+            "FROM operation_log ORDER BY id")
+        write_atomic(self.log_file, ("## " + self._format_entry(*row) for row in rows))
+        self.log_index.invalidate()
+            
+    @flushes_writer
     def load_operation_log(self, days_back=7, importance_filter=None):
         """
         加载操作日志
         Args:
             days_back (int): 加载多少天内的日志
-            importance_filter (str): 重要性过滤器 (critical/high/normal/low)
+            importance_filter (str): 重要性过滤器 (critical/high/normal/low)，与条目的重要性字段精确匹配
         Returns:
             str: 操作日志内容
         """
-        if not self.log_file.exists():
-            return "无操作日志记录"
-            
         cutoff_time = datetime.now() - timedelta(days=days_back)
-        relevant_logs = []
         
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if self.store is not None:
+            sql = ("SELECT timestamp, operation_type, importance, file_path, summary, details "
+                   "FROM operation_log WHERE created >= ?")
+            params = [cutoff_time.timestamp()]
+            if importance_filter:
+                sql += " AND importance = ?"
+                params.append(importance_filter)
+            relevant_logs = [self._format_entry(*row) for row in self.store.query(sql + " ORDER BY id", params)]
+            if not relevant_logs:
+                return f"最近{days_back}天内无相关操作日志"
+            return "## " + "## ".join(relevant_logs)
+            
+        if self.segments is not None:
+            # 只打开时间范围内的日段，永久段通过索引定位
+            relevant_logs = self.segments.entries_since(cutoff_time.timestamp(), importance_filter)
+            if relevant_logs is None:
+                return "无操作日志记录"
+        else:
+            # 在旁路索引上定位时间范围内的第一个条目，只读取符合条件的日志片段
+            records = self.log_index.records_since(cutoff_time.timestamp(), importance_filter)
+            if records is None:
+                return "无操作日志记录"
+            relevant_logs = self.log_index.read_entries(records)
             
-        # 按条目分割
-        entries = content.split('## ')
-        for entry in entries[1:]:
-            if not entry.strip():
-                continue
-                
-            try:
-                # 提取时间戳
-                timestamp_str = entry.split(' - ')[0]
-                entry_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                
-                # 检查是否在时间范围内
-                if entry_time >= cutoff_time:
-                    # 检查重要性过滤
-                    if importance_filter:
-                        if f'**重要性**: {importance_filter}' in entry:
-                            relevant_logs.append(entry)
-                    else:
-                        relevant_logs.append(entry)
-                        
-            except ValueError:
-                # 时间戳格式错误，跳过
-                continue
-                
         if not relevant_logs:
             return f"最近{days_back}天内无相关操作日志"
             
         return "## " + "## ".join(relevant_logs)
         
+    @flushes_writer
     def cleanup_old_logs(self):
         """清理过期的操作日志（保留重要日志）"""
+        if self.store is not None:
+            removed = self.store.execute(
+                "DELETE FROM operation_log WHERE created < ? AND importance NOT IN ('critical', 'high')",
+                (time.time() - self.cleanup_threshold,)
+            )
+            kept = self.store.query("SELECT COUNT(*) FROM operation_log").fetchone()[0]
+            self.export_markdown()
+            print(f"🧹 清理过期操作日志 {removed} 条")
+            print(f"✅ 操作日志清理完成，保留 {kept} 条记录")
+            return
+            
+        if self.segments is not None:
+            # 重要日志在永久段中；普通日志按天整段删除（整天都超过1天的日段），不再重写文件
+            removed = self.segments.expire(time.time() - self.cleanup_threshold)
+            for day in removed:
+                print(f"🧹 清理过期操作日志段: {day}")
+            print(f"✅ 操作日志清理完成，删除 {len(removed)} 个过期日段")
+            return
+            
         if not self.log_file.exists():
             return
             
         current_time = time.time()
-        kept_logs = []
+        kept_count = 0
         
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        entries = content.split('## ')
-        for entry in entries[1:]:
-            if not entry.strip():
-                continue
-                
-            try:
-                timestamp_str = entry.split(' - ')[0]
-                entry_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                entry_timestamp = entry_time.timestamp()
-                
-                # 检查重要性
-                is_important = ('**重要性**: critical' in entry or 
-                              '**重要性**: high' in entry)
-                
-                # 保留重要日志或1天内的日志
-                if is_important or (current_time - entry_timestamp <= self.cleanup_threshold):
-                    kept_logs.append(entry)
-                else:
-                    print(f"🧹 清理过期操作日志: {timestamp_str}")
+        def kept_logs():
+            nonlocal kept_count
+            for _, piece in iter_entries(self.log_file):
+                entry = piece[3:].decode('utf-8')
+                if not entry.strip():
+                    continue
+                    
+                try:
+                    timestamp_str = entry.split(' - ')[0]
+                    entry_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+                    entry_timestamp = entry_time.timestamp()
                     
-            except ValueError:
-                # 时间戳格式错误，保留以防万一
-                kept_logs.append(entry)
+                    # 检查重要性
+                    is_important = ('**重要性**: critical' in entry or 
+                                  '**重要性**: high' in entry)
+                    
+                    # 保留重要日志或1天内的日志
+                    if not (is_important or (current_time - entry_timestamp <= self.cleanup_threshold)):
+                        print(f"🧹 清理过期操作日志: {timestamp_str}")
+                        continue
+                        
+                except ValueError:
+                    # 时间戳格式错误，保留以防万一
+                    pass
+                    
+                kept_count += 1
+                yield piece
                 
-        # 重写日志文件
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            if kept_logs:
-                f.write("## " + "## ".join(kept_logs))
+        # 逐条读取、逐条写入临时文件后原子替换，内存占用只与最大的单个条目有关；
+        # 旁路索引在下次查询时重建
+        write_atomic(self.log_file, kept_logs())
+        self.log_index.invalidate()
                 
-        print(f"✅ 操作日志清理完成，保留 {len(kept_logs)} 条记录")
+        print(f"✅ 操作日志清理完成，保留 {kept_count} 条记录")
         
+    @flushes_writer
     def get_log_statistics(self):
         """获取日志统计信息"""
-        if not self.log_file.exists():
-            return "无操作日志"
-            
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        entries = content.split('## ')[1:]
-        total_logs = len(entries)
-        
-        # 统计各类型操作
-        operation_types = {}
         importance_levels = {"critical": 0, "high": 0, "normal": 0, "low": 0}
         
-        for entry in entries:
-            # 统计操作类型
-            lines = entry.strip().split('\n')
-            if lines:
-                first_line = lines[0]
-                op_type = first_line.split(' - ')[1].lower() if ' - ' in first_line else 'unknown'
-                operation_types[op_type] = operation_types.get(op_type, 0) + 1
-                
-            # 统计重要性
-            for level in importance_levels.keys():
-                if f'**重要性**: {level}' in entry:
-                    importance_levels[level] += 1
-                    break
+        if self.store is not None:
+            total_logs = self.store.query("SELECT COUNT(*) FROM operation_log").fetchone()[0]
+            if not total_logs and not self.log_file.exists():
+                return "无操作日志"
+            # 按首次出现的顺序排列，与Markdown后端一致
+            operation_types = dict(self.store.query(
+                "SELECT lower(operation_type), COUNT(*) FROM operation_log "
+                "GROUP BY lower(operation_type) ORDER BY MIN(id)").fetchall())
+            for level, count in self.store.query(
+                    "SELECT importance, COUNT(*) FROM operation_log GROUP BY importance"):
+                if level in importance_levels:
+                    importance_levels[level] = count
+        else:
+            if self.segments is not None:
+                if not self.segments.exists():
+                    return "无操作日志"
+                # 逐条读取永久段和各日段
+                entries = self.segments.iter_all()
+            else:
+                if not self.log_file.exists():
+                    return "无操作日志"
+                    
+                with open(self.log_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                    
+                entries = content.split('## ')[1:]
+            total_logs = 0
+            
+            # 统计各类型操作
+            operation_types = {}
+            
+            for entry in entries:
+                total_logs += 1
+                # 统计操作类型
+                lines = entry.strip().split('\n')
+                if lines:
+                    first_line = lines[0]
+                    op_type = first_line.split(' - ')[1].lower() if ' - ' in first_line else 'unknown'
+                    operation_types[op_type] = operation_types.get(op_type, 0) + 1
+                    
+                # 统计重要性
+                for level in importance_levels.keys():
+                    if f'**重要性**: {level}' in entry:
+                        importance_levels[level] += 1
+                        break
                     
         stats = f"""### 操作日志统计:
 - 总记录数: {total_logs}
@@ -10,12 +10,19 @@ import json
 import time
 from datetime import datetime
 from pathlib import Path
-import uuid
+
+from group_commit import flushes_writer
 
 class TaskRecoveryManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", store=None, writer=None):
         self.workspace_path = Path(workspace_path)
         self.recovery_file = self.workspace_path / "TASK_RECOVERY.md"
+        # SQLite存储后端（memory_store.SQLiteMemoryStore）；为None时直接读写Markdown文件
+        self.store = store
+        # 分组提交写入器（group_commit.GroupCommitWriter）；为None时每次追加直接写文件
+        self.writer = writer
+        if store is not None:
+            store.import_once("task_recovery", "tasks", self._parse_markdown_rows)
         
     def save_task_state(self, task_description, task_data=None, priority="normal"):
         """
@@ -27,32 +34,52 @@ class TaskRecoveryManager:
         Returns:
             str: 任务ID
         """
+        import uuid
+
         task_id = str(uuid.uuid4())
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
-        task_entry = f"""## TASK_ID: {task_id}
-**描述**: {task_description}
-**优先级**: {priority}
-**开始时间**: {timestamp}
-**状态**: running
-
-"""
-        if task_data:
-            task_entry += f"**数据**:\n```json\n{json.dumps(task_data, indent=2, ensure_ascii=False)}\n```\n\n"
+        task_entry = self._format_entry(task_id, task_description, priority, timestamp, "running", task_data)
+        
+        if self.store is not None:
+            self.store.insert("tasks", task_id=task_id, timestamp=timestamp, description=task_description,
+                              priority=priority, status="running",
+                              data=json.dumps(task_data, ensure_ascii=False) if task_data else None)
             
-        # 追加到恢复文件
-        with open(self.recovery_file, 'a', encoding='utf-8') as f:
-            f.write(task_entry)
+        # 追加到恢复文件（SQLite后端下为导出视图）
+        if self.writer is not None:
+            self.writer.append(self.recovery_file, task_entry)
+        else:
+            with open(self.recovery_file, 'a', encoding='utf-8') as f:
+                f.write(task_entry)
             
         print(f"✅ 任务状态已保存 (ID: {task_id})")
         return task_id
         
+    @flushes_writer
     def load_active_tasks(self):
         """
         加载所有活动任务
         Returns:
             list: 活动任务列表
         """
+        if self.store is not None:
+            rows = self.store.query(
+                "SELECT task_id, description, priority, timestamp, status, data FROM tasks "
+                "WHERE status = 'running' ORDER BY rowid")
+            return [{
+                'task_id': task_id,
+                'description': description,
+                'priority': priority,
+                'start_time': start_time,
+                'status': status,
+                'data': json.loads(data) if data else None
+            } for task_id, description, priority, start_time, status, data in rows]
+            
+        return [task for task in self._parse_markdown_tasks() if task['status'] == 'running']
+        
+    def _parse_markdown_tasks(self):
+        """解析恢复文件中的全部任务条目"""
         if not self.recovery_file.exists():
             return []
             
@@ -64,7 +91,7 @@ class TaskRecoveryManager:
             
         # 按任务分割
         task_entries = content.split('## TASK_ID: ')
-        active_tasks = []
+        tasks = []
         
         for entry in task_entries[1:]:
             if not entry.strip():
@@ -105,21 +132,73 @@ class TaskRecoveryManager:
                                 task_info['data'] = None
                         break
                         
-                if task_info['status'] == 'running':
-                    active_tasks.append(task_info)
+                tasks.append(task_info)
                     
             except Exception as e:
                 print(f"⚠️ 解析任务条目时出错: {e}")
                 continue
                 
-        return active_tasks
+        return tasks
+        
+    def _parse_markdown_rows(self):
+        """恢复文件中的任务转换为数据库行（导入SQLite用），开始时间无效的任务跳过"""
+        rows = []
+        for task in self._parse_markdown_tasks():
+            try:
+                datetime.strptime(task['start_time'], "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                continue
+            rows.append({
+                'task_id': task['task_id'],
+                'timestamp': task['start_time'],
+                'description': task['description'],
+                'priority': task['priority'],
+                'status': task['status'],
+                'data': json.dumps(task['data'], ensure_ascii=False) if task['data'] else None
+            })
+        return rows
         
+    def _format_entry(self, task_id, description, priority, start_time, status, task_data):
+        """任务在恢复文件中的格式"""
+        task_entry = f"""## TASK_ID: {task_id}
+**描述**: {description}
+**优先级**: {priority}
+**开始时间**: {start_time}
+**状态**: {status}
+
+"""
+        if task_data:
+            task_entry += f"**数据**:\n```json\n{json.dumps(task_data, indent=2, ensure_ascii=False)}\n```\n\n"
+        return task_entry
+        
+    @flushes_writer
+    def export_markdown(self):
+        """由数据库重新生成 TASK_RECOVERY.md（仅SQLite后端）"""
+        from entry_stream import write_atomic
+        
+        rows = self.store.query(
+            "SELECT task_id, description, priority, timestamp, status, data FROM tasks ORDER BY rowid")
+        write_atomic(self.recovery_file, (
+            self._format_entry(task_id, description, priority, start_time, status,
+                               json.loads(data) if data else None)
+            for task_id, description, priority, start_time, status, data in rows
+        ))
+        
+    @flushes_writer
     def complete_task(self, task_id):
         """
         标记任务为完成并从恢复文件中移除
         Args:
             task_id (str): 任务ID
         """
+        if self.store is not None:
+            if not self.store.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,)):
+                print(f"⚠️ 未找到任务ID: {task_id}")
+                return
+            self.export_markdown()
+            print(f"✅ 任务 {task_id} 已完成并从恢复文件中移除")
+            return
+            
         if not self.recovery_file.exists():
             return
             
@@ -153,6 +232,7 @@ class TaskRecoveryManager:
             
         print(f"✅ 任务 {task_id} 已完成并从恢复文件中移除")
         
+    @flushes_writer
     def get_recovery_summary(self):
         """获取任务恢复摘要"""
         active_tasks = self.load_active_tasks()
@@ -172,8 +252,11 @@ class TaskRecoveryManager:
             
         return summary
         
+    @flushes_writer
     def clear_all_tasks(self):
         """清除所有任务（谨慎使用）"""
+        if self.store is not None:
+            self.store.execute("DELETE FROM tasks")
         if self.recovery_file.exists():
             self.recovery_file.unlink()
             print("🧹 所有任务已清除")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式清理测试：逐条读取、原子替换的清理与整文件读入后 split 的原始实现输出相同
+"""
+
+import functools
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import entry_stream
+import operation_log
+import working_context
+from benchmark_cleanup import legacy_cleanup
+from operation_log import OperationLogManager
+from working_context import WorkingContextManager
+
+def _timestamp(seconds_ago):
+    return datetime.fromtimestamp(time.time() - seconds_ago).strftime("%Y-%m-%d %H:%M:%S")
+
+def _operation_log():
+    """过期/未过期、重要/普通条目，夹杂无效时间戳、空条目、正文中的 "## " 和首个条目前的内容"""
+    entries = ["文件开头的说明\n"]
+    for number in range(40):
+        importance = ["critical", "high", "normal", "low"][number % 4]
+        seconds_ago = [60, 2 * 86400, 3600, 5 * 86400, 30][number % 5]
+        entries.append(f"## {_timestamp(seconds_ago)} - CODE\n**重要性**: {importance}\n"
+                       f"**详情**: 第{number}条修改，含中文字符\n\n")
+        if number % 7 == 0:
+            entries.append("## 正文里的小标题\n继续正文\n\n")
+        if number % 11 == 0:
+            entries.append("## \n")
+    return "".join(entries)
+
+def _working_context():
+    entries = ["文件开头的说明\n"]
+    for number in range(40):
+        seconds_ago = [60, 4 * 86400, 3600, 10 * 86400][number % 4]
+        entries.append(f"## {_timestamp(seconds_ago)} - Priority: normal\n第{number}条上下文\n\n")
+        if number % 9 == 0:
+            entries.append("## 无效时间戳的条目\n内容\n\n")
+    return "".join(entries)
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, entry_stream.CHUNK_SIZE])
+@pytest.mark.parametrize("target", ["operation_log", "working_context"])
+def test_streaming_cleanup_matches_legacy(tmp_path, monkeypatch, capsys, target, chunk_size):
+    if target == "operation_log":
+        content, module, file_name = _operation_log(), operation_log, "OPERATION_LOG.md"
+    else:
+        content, module, file_name = _working_context(), working_context, "WORKING_CONTEXT.md"
+    # 较小的读取块让条目分隔符和多字节字符跨越块边界
+    monkeypatch.setattr(module, "iter_entries", functools.partial(entry_stream.iter_entries, chunk_size=chunk_size))
+
+    outputs = []
+    for implementation in ("legacy", "streaming"):
+        workspace = tmp_path / implementation
+        workspace.mkdir()
+        (workspace / file_name).write_text(content, encoding='utf-8')
+        if target == "operation_log":
+            manager = OperationLogManager(workspace)
+            cleanup = manager.cleanup_old_logs
+        else:
+            manager = WorkingContextManager(workspace)
+            cleanup = manager.cleanup_expired
+        capsys.readouterr()
+        if implementation == "legacy":
+            legacy_cleanup(manager, target)
+        else:
+            cleanup()
+        printed = [line for line in capsys.readouterr().out.splitlines() if line.startswith("🧹 清理过期")]
+        outputs.append(((workspace / file_name).read_bytes(), printed))
+
+    assert outputs[0] == outputs[1]
+    assert outputs[1][1] and len(outputs[1][0]) < len(content.encode('utf-8'))
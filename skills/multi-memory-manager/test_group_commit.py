@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分组提交写入器测试：单独使用各管理器时，读取、清理和导出都能看到缓存中的条目，定时提交不会穿插进原子重写
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import working_context
+from group_commit import GroupCommitWriter
+from logic_history import LogicHistoryManager
+from memory_store import DB_FILE_NAME, SQLiteMemoryStore
+from operation_log import OperationLogManager
+from task_recovery import TaskRecoveryManager
+from working_context import WorkingContextManager
+
+def _writer():
+    # 时限足够长，测试期间缓存的条目只会由读取/重写路径提交
+    return GroupCommitWriter('buffered', max_delay=3600)
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_components_read_their_buffered_appends(tmp_path):
+    writer = _writer()
+    context = WorkingContextManager(tmp_path, writer=writer)
+    logic = LogicHistoryManager(tmp_path, writer=writer)
+    log = OperationLogManager(tmp_path, writer=writer)
+    tasks = TaskRecoveryManager(tmp_path, writer=writer)
+
+    context.save_context("缓存中的上下文")
+    logic.save_logic_entry("缓存主题", "缓存中的逻辑")
+    log.log_operation("code", "缓存中的操作")
+    task_id = tasks.save_task_state("缓存中的任务")
+    assert writer.pending
+
+    assert "缓存中的上下文" in context.load_context()
+    assert not writer.pending
+    logic.save_logic_entry("缓存主题", "第二条逻辑")
+    assert "第二条逻辑" in logic.load_logic_history("缓存主题")
+    log.log_operation("code", "第二条操作")
+    assert "第二条操作" in log.load_operation_log(1)
+    assert "- 总记录数: 2" in log.get_log_statistics()
+    tasks.save_task_state("第二个任务")
+    assert [task['description'] for task in tasks.load_active_tasks()] == ["缓存中的任务", "第二个任务"]
+    tasks.complete_task(task_id)
+    assert [task['description'] for task in tasks.load_active_tasks()] == ["第二个任务"]
+    writer.close()
+
+def test_sqlite_cleanup_does_not_duplicate_buffered_entries(tmp_path):
+    writer = _writer()
+    store = SQLiteMemoryStore(tmp_path / DB_FILE_NAME)
+    log = OperationLogManager(tmp_path, store=store, writer=writer)
+    log.log_operation("code", "清理前缓存的操作")
+
+    # 清理由数据库重新生成视图，之前缓存的条目不能在之后再追加一次
+    log.cleanup_old_logs()
+    writer.flush()
+    assert _read(tmp_path / "OPERATION_LOG.md").count("清理前缓存的操作") == 1
+    writer.close()
+    store.close()
+
+def test_timer_commit_waits_for_cleanup_rewrite(tmp_path, monkeypatch):
+    writer = _writer()
+    context = WorkingContextManager(tmp_path, writer=writer)
+    context.save_context("清理前的上下文")
+    rewrite_file = working_context.write_atomic
+    committer = threading.Thread(target=lambda: (context.save_context("清理期间保存的上下文"),
+                                                  writer._flush_on_timer()))
+
+    def rewrite_while_timer_fires(path, chunks):
+        # 模拟清理已读完原文件、尚未替换时，另一个线程保存上下文、定时器到期提交
+        chunks = list(chunks)
+        committer.start()
+        committer.join(timeout=0.5)
+        rewrite_file(path, chunks)
+
+    monkeypatch.setattr(working_context, "write_atomic", rewrite_while_timer_fires)
+    context.cleanup_expired()
+    committer.join()
+    writer.flush()
+
+    content = _read(tmp_path / "WORKING_CONTEXT.md")
+    assert content.count("清理前的上下文") == 1
+    assert content.count("清理期间保存的上下文") == 1
+    writer.close()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+操作日志时间偏移索引测试：按时间范围和重要性查询的结果与逐条扫描全文相同；
+其他进程同时追加条目时索引不会遗漏
+"""
+
+import os
+import random
+import re
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_index import HEADER_SIZE
+from operation_log import OperationLogManager
+
+IMPORTANCES = ["critical", "high", "normal", "low"]
+# 重要性过滤按条目的第一个重要性字段精确匹配，级别名的前缀不会匹配
+FILTERS = [None] + IMPORTANCES + ["norm", "crit", "hi"]
+IMPORTANCE_FIELD = re.compile(r'\*\*重要性\*\*: (\S*)')
+
+def _linear_scan(content, cutoff, importance_filter=None):
+    """逐条扫描全文：按 "## " 切分，逐条解析时间戳，按第一个重要性字段过滤"""
+    relevant_logs = []
+    for entry in content.split('## ')[1:]:
+        if not entry.strip():
+            continue
+        try:
+            entry_time = datetime.strptime(entry.split(' - ')[0], "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            continue
+        if entry_time.timestamp() >= cutoff:
+            field = IMPORTANCE_FIELD.search(entry)
+            if not importance_filter or (field and field.group(1) == importance_filter):
+                relevant_logs.append(entry)
+    return relevant_logs
+
+def _write_log(manager, count, seed=7):
+    """逐条追加 count 个条目：时间戳大体递增但有回拨，夹杂无效标题和正文中的 "## " """
+    rng = random.Random(seed)
+    now = time.time()
+    for number in range(count):
+        epoch = now - 10 * 24 * 3600 * (1 - number / count) + rng.randint(-7200, 60)
+        timestamp = datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+        details = f"第{number}次操作"
+        if number % 17 == 0:
+            details += "\n## 正文中的小标题\n说明"
+        if number % 19 == 0:
+            # 正文中引用了其他重要性，不影响过滤
+            details += "\n引用：**重要性**: high"
+        entry = "## " + manager._format_entry(timestamp, rng.choice(["code", "json", "note"]),
+                                              rng.choice(IMPORTANCES), None, f"摘要{number}", details)
+        if number % 53 == 0:
+            entry = "## 无效标题\n" + entry
+        manager.log_index.append(entry)
+
+def test_records_since_matches_linear_scan(tmp_path):
+    manager = OperationLogManager(tmp_path)
+    _write_log(manager, 1500)
+    content = manager.log_file.read_text(encoding='utf-8')
+    now = time.time()
+
+    def check():
+        for days in [0, 0.5, 1, 3, 7, 9.9, 11]:
+            cutoff = now - days * 24 * 3600
+            for importance in FILTERS:
+                records = manager.log_index.records_since(cutoff, importance)
+                assert manager.log_index.read_entries(records) == _linear_scan(content, cutoff, importance)
+                assert all(epoch >= cutoff for _, _, epoch in records)
+
+    # 追加时同步维护的索引，以及删除后全量重建的索引
+    check()
+    manager.log_index.invalidate()
+    check()
+
+def _indexed_entry_count(index):
+    """索引中的条目行数（不经 ensure，不会触发重建）"""
+    with open(index.index_file, 'rb') as f:
+        return len(f.read()[HEADER_SIZE:].splitlines())
+
+def test_append_rebuilds_after_concurrent_writes(tmp_path, monkeypatch):
+    manager = OperationLogManager(tmp_path)
+    index = manager.log_index
+    _write_log(manager, 5)
+    other_entry = "## " + manager._format_entry(datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "code",
+                                                "normal", None, "其他进程", "其他进程追加的操作")
+
+    def append_from_other_process():
+        with open(manager.log_file, 'a', encoding='utf-8') as f:
+            f.write(other_entry)
+
+    # 另一个进程在本进程确认索引之后、写入之前追加
+    ensure = index.ensure
+    def ensure_then_other_append():
+        header = ensure()
+        append_from_other_process()
+        return header
+    monkeypatch.setattr(index, "ensure", ensure_then_other_append)
+    _write_log(manager, 1, seed=8)
+    monkeypatch.undo()
+    assert _indexed_entry_count(index) == len(_linear_scan(manager.log_file.read_text(encoding='utf-8'), 0))
+
+    # 另一个进程在本进程写入之后、读取日志大小之前追加
+    real_stat = os.stat
+    written = []
+    def ensure_then_mark():
+        header = ensure()
+        written.append(True)
+        return header
+    def stat_after_other_append(path, *args, **kwargs):
+        if written and path == manager.log_file:
+            written.clear()
+            append_from_other_process()
+        return real_stat(path, *args, **kwargs)
+    monkeypatch.setattr(index, "ensure", ensure_then_mark)
+    monkeypatch.setattr(os, "stat", stat_after_other_append)
+    _write_log(manager, 1, seed=9)
+    monkeypatch.undo()
+
+    content = manager.log_file.read_text(encoding='utf-8')
+    assert content.count("其他进程追加的操作") == 2
+    assert _indexed_entry_count(index) == len(_linear_scan(content, 0))
+    assert index.read_entries(index.records_since(0)) == _linear_scan(content, 0)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分段操作日志测试：单文件日志迁移为日段，按时间范围查询的结果与单文件日志相同
+"""
+
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from log_segments import PERMANENT_SEGMENT_NAME, SEGMENT_DIR_NAME
+from operation_log import OperationLogManager
+
+DETAILS_WITH_HEADING = "引言\n## Sub heading\n小标题下的正文"
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_migrate_keeps_headings_with_their_entry(tmp_path):
+    single = OperationLogManager(tmp_path, layout='single')
+    single.log_operation("system", "重要操作", "high")
+    single.log_operation("code", DETAILS_WITH_HEADING, "normal")
+    expected = single.load_operation_log(1)
+
+    # 上次迁移中断时留下的临时目录（含子目录）
+    stale = tmp_path / f"{SEGMENT_DIR_NAME}.tmp" / "nested"
+    stale.mkdir(parents=True)
+    (stale / "partial.md").write_text("## 残留", encoding='utf-8')
+
+    segmented = OperationLogManager(tmp_path, layout='segmented')
+    directory = tmp_path / SEGMENT_DIR_NAME
+    assert not (tmp_path / f"{SEGMENT_DIR_NAME}.tmp").exists()
+    assert "Sub heading" not in _read(directory / PERMANENT_SEGMENT_NAME)
+    day_segments = [path for path in directory.glob("*.md") if path.name != PERMANENT_SEGMENT_NAME]
+    assert len(day_segments) == 1
+    assert DETAILS_WITH_HEADING in _read(day_segments[0])
+    assert segmented.load_operation_log(1) == expected
+
+def test_segmented_queries_match_single_file(tmp_path):
+    single = OperationLogManager(tmp_path / "single", layout='single')
+    segmented = OperationLogManager(tmp_path / "segmented", layout='segmented')
+    single.workspace_path.mkdir()
+
+    # 跨越多天、时间戳各不相同的条目（同一秒内的条目在分段日志中永久段在前，与单文件顺序不同）
+    now = time.time()
+    for number in range(120):
+        timestamp = datetime.fromtimestamp(now - 6 * 86400 + number * 4321).strftime("%Y-%m-%d %H:%M:%S")
+        importance = ["critical", "high", "normal", "low", "normal"][number % 5]
+        details = DETAILS_WITH_HEADING if number % 13 == 0 else f"第{number}次操作"
+        entry = "## " + single._format_entry(timestamp, "code", importance, None, f"摘要{number}", details)
+        single.log_index.append(entry)
+        segmented.segments.append(entry, timestamp)
+
+    for days_back in [1, 2, 5, 7]:
+        for importance in [None, "critical", "high", "normal", "low"]:
+            expected = single.load_operation_log(days_back, importance)
+            assert segmented.load_operation_log(days_back, importance) == expected
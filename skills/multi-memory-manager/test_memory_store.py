@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite后端测试：导入已有的Markdown文件后，清理和导出重新生成的视图与 markdown 后端一致
+"""
+
+import os
+import shutil
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memory_manager import MultiMemoryManager
+
+# 正文中带 "## " 小标题的条目，按 '## ' 切分时会被切成几段
+DETAILS_WITH_HEADING = "引言\n## Sub heading\n小标题下的正文"
+CONTEXT_WITH_HEADING = "当前任务\n## notes heading\n笔记内容"
+LOGIC_WITH_HEADING = "结论如下\n## 细节\n细节内容"
+
+def _write_markdown_workspace(workspace):
+    manager = MultiMemoryManager(workspace, backend='markdown')
+    for i in range(10):
+        details = DETAILS_WITH_HEADING if i == 4 else f"操作 {i}"
+        manager.operation_log.log_operation("code", details, "normal", f"src/module_{i}.py")
+    manager.working_context.save_context("普通上下文")
+    manager.working_context.save_context(CONTEXT_WITH_HEADING)
+    manager.logic_history.save_logic_entry("记忆管理", LOGIC_WITH_HEADING)
+    return manager
+
+def _read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_sqlite_import_keeps_headings_inside_entries(tmp_path):
+    markdown_dir = tmp_path / "markdown"
+    sqlite_dir = tmp_path / "sqlite"
+    markdown_dir.mkdir()
+    markdown = _write_markdown_workspace(markdown_dir)
+    shutil.copytree(markdown_dir, sqlite_dir)
+    original_log = _read(markdown_dir / "OPERATION_LOG.md")
+    original_context = _read(markdown_dir / "WORKING_CONTEXT.md")
+    original_logic = _read(markdown_dir / "LOGIC_HISTORY.md")
+
+    sqlite = MultiMemoryManager(sqlite_dir, backend='sqlite')
+    # 条目都在保留期内，清理后文件内容不变；SQLite后端的清理会由数据库重新生成视图
+    markdown.cleanup_expired_memory()
+    sqlite.cleanup_expired_memory()
+    sqlite.logic_history.export_markdown()
+
+    assert _read(markdown_dir / "OPERATION_LOG.md") == original_log
+    assert _read(sqlite_dir / "OPERATION_LOG.md") == original_log
+    # markdown 后端清理时会给正文中的小标题加上 "[INVALID TIMESTAMP] " 前缀（原有行为），SQLite后端保留原文
+    assert _read(sqlite_dir / "WORKING_CONTEXT.md") == original_context
+    assert _read(sqlite_dir / "LOGIC_HISTORY.md") == original_logic
+
+    assert "- 总记录数: 10" in sqlite.operation_log.get_log_statistics()
+    assert DETAILS_WITH_HEADING in sqlite.operation_log.load_operation_log(1)
+    assert CONTEXT_WITH_HEADING in sqlite.working_context.load_context()
+    sqlite.store.close()
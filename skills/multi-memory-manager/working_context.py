@@ -11,11 +11,20 @@ import time
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from entry_stream import iter_entries, write_atomic
+from group_commit import flushes_writer
+
 class WorkingContextManager:
-    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace"):
+    def __init__(self, workspace_path="/home/kousoyu/.openclaw/workspace", store=None, writer=None):
         self.workspace_path = Path(workspace_path)
         self.context_file = self.workspace_path / "WORKING_CONTEXT.md"
         self.cleanup_threshold = 3 * 24 * 3600  # 3天（秒）
+        # SQLite存储后端（memory_store.SQLiteMemoryStore）；为None时直接读写Markdown文件
+        self.store = store
+        # 分组提交写入器（group_commit.GroupCommitWriter）；为None时每次追加直接写文件
+        self.writer = writer
+        if store is not None:
+            store.import_once("working_context", "working_context", self._parse_markdown_entries)
         
     def save_context(self, context_data, priority="normal"):
         """
@@ -25,20 +34,34 @@ class WorkingContextManager:
             priority (str): 优先级 (high/normal/low)
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        context_entry = f"## {timestamp} - Priority: {priority}\n{context_data}\n\n"
+        context_entry = "## " + self._format_entry(timestamp, priority, context_data)
+        
+        if self.store is not None:
+            self.store.insert("working_context", timestamp=timestamp, priority=priority, content=context_data)
         
-        # 追加到文件
-        with open(self.context_file, 'a', encoding='utf-8') as f:
-            f.write(context_entry)
+        # 追加到文件（SQLite后端下为导出视图）
+        if self.writer is not None:
+            self.writer.append(self.context_file, context_entry)
+        else:
+            with open(self.context_file, 'a', encoding='utf-8') as f:
+                f.write(context_entry)
             
         print(f"✅ 工作上下文已保存到 {self.context_file}")
         
+    @flushes_writer
     def load_context(self):
         """
         加载当前有效的工作上下文（3天内）
         Returns:
             str: 有效的工作上下文内容
         """
+        if self.store is not None:
+            rows = self.store.query(
+                "SELECT timestamp, priority, content FROM working_context WHERE created >= ? ORDER BY id",
+                (time.time() - self.cleanup_threshold,)
+            )
+            return "## ".join(self._format_entry(*row) for row in rows)
+        
         if not self.context_file.exists():
             return ""
             
@@ -51,38 +74,103 @@ class WorkingContextManager:
         # 按条目分割（每个条目以 ## 开头）
         entries = content.split('## ')
         for entry in entries[1:]:  # 跳过第一个空条目
-            if not entry.strip():
-                continue
-                
-            # 提取时间戳
-            try:
-                timestamp_str = entry.split(' - Priority:')[0]
-                entry_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
-                entry_timestamp = entry_time.timestamp()
-                
-                # 检查是否在3天内
-                if current_time - entry_timestamp <= self.cleanup_threshold:
-                    valid_contexts.append(entry)
-                else:
-                    print(f"🧹 清理过期上下文: {timestamp_str}")
-                    
-            except ValueError:
-                # 如果时间戳格式错误，保留条目但标记
-                valid_contexts.append(f"[INVALID TIMESTAMP] {entry}")
+            kept = self._check_entry(entry, current_time)
+            if kept is not None:
+                valid_contexts.append(kept)
                 
         return "## ".join(valid_contexts)
         
+    def _check_entry(self, entry, current_time):
+        """
+        检查单个条目是否仍在有效期内
+        Args:
+            entry (str): 条目文本（不含开头的 "## "）
+            current_time (float): 当前时间戳
+        Returns:
+            str: 需要保留的条目文本；过期或空条目返回None
+        """
+        if not entry.strip():
+            return None
+            
+        # 提取时间戳
+        try:
+            timestamp_str = entry.split(' - Priority:')[0]
+            entry_time = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+            entry_timestamp = entry_time.timestamp()
+            
+            # 检查是否在3天内
+            if current_time - entry_timestamp <= self.cleanup_threshold:
+                return entry
+            print(f"🧹 清理过期上下文: {timestamp_str}")
+            return None
+            
+        except ValueError:
+            # 如果时间戳格式错误，保留条目但标记
+            return f"[INVALID TIMESTAMP] {entry}"
+        
+    @flushes_writer
     def cleanup_expired(self):
         """清理过期的工作上下文"""
-        valid_context = self.load_context()
+        if self.store is not None:
+            removed = self.store.execute("DELETE FROM working_context WHERE created < ?",
+                                         (time.time() - self.cleanup_threshold,))
+            self.export_markdown()
+            print(f"🧹 工作上下文清理完成，清理 {removed} 条过期上下文")
+            return
         
-        # 重写文件只保留有效内容
-        with open(self.context_file, 'w', encoding='utf-8') as f:
-            if valid_context:
-                f.write("## " + valid_context)
+        current_time = time.time()
+        
+        def valid_entries():
+            if not self.context_file.exists():
+                return
+            for _, piece in iter_entries(self.context_file):
+                kept = self._check_entry(piece[3:].decode('utf-8'), current_time)
+                if kept is not None:
+                    yield "## " + kept
+                    
+        # 逐条读取、逐条写入临时文件后原子替换，文件再大也只占用单个条目的内存
+        write_atomic(self.context_file, valid_entries())
                 
         print(f"🧹 工作上下文清理完成")
         
+    def _format_entry(self, timestamp, priority, content):
+        """条目在Markdown文件中的格式（不含开头的 "## "）"""
+        return f"{timestamp} - Priority: {priority}\n{content}\n\n"
+        
+    def _parse_markdown_entries(self):
+        """解析Markdown文件中的全部条目（导入SQLite用），正文中的 "## " 片段归入所在条目"""
+        from memory_store import split_entries
+        
+        if not self.context_file.exists():
+            return []
+            
+        with open(self.context_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+            
+        rows = []
+        for entry in split_entries(content, self._is_entry_header):
+            header, _, body = entry.partition('\n')
+            timestamp, _, priority = header.partition(' - Priority: ')
+            rows.append({'timestamp': timestamp, 'priority': priority.strip(),
+                         'content': body[:-2] if body.endswith('\n\n') else body.rstrip('\n')})
+        return rows
+        
+    def _is_entry_header(self, piece):
+        """片段是否以条目标题（"时间戳 - Priority: 优先级"）开头"""
+        timestamp, separator, _ = piece.split('\n', 1)[0].partition(' - Priority: ')
+        try:
+            datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            return False
+        return bool(separator)
+        
+    @flushes_writer
+    def export_markdown(self):
+        """由数据库重新生成 WORKING_CONTEXT.md（仅SQLite后端）"""
+        rows = self.store.query("SELECT timestamp, priority, content FROM working_context ORDER BY id")
+        write_atomic(self.context_file, ("## " + self._format_entry(*row) for row in rows))
+        
+    @flushes_writer
     def get_context_summary(self):
         """获取工作上下文摘要"""
         context = self.load_context()
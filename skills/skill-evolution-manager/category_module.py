@@ -6,10 +6,28 @@
 """
 
 import os
+import sys
 import json
 import re
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from pathlib import Path
+
+# 智能技能匹配器的脚本目录（增量技能注册表 skill_registry 所在位置）
+MATCHER_SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "intelligent-skill-matcher" / "scripts"
+
+def default_registry():
+    """
+    命令行入口使用的技能注册表：与智能技能匹配器共用进程内的 skill_registry.get_registry()，
+    同一进程内技能目录只扫描一次；未安装技能匹配器时返回None（直接扫描技能目录）
+    """
+    if MATCHER_SCRIPTS_DIR.is_dir() and str(MATCHER_SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(MATCHER_SCRIPTS_DIR))
+    try:
+        from skill_registry import get_registry
+    except ImportError:
+        return None
+    return get_registry()
 
 @dataclass
 class SkillInfo:
@@ -166,8 +184,14 @@ class SkillCategorizer:
 class SkillIntegrator:
     """技能整合器"""
     
-    def __init__(self):
+    def __init__(self, registry=None):
+        """
+        Args:
+            registry: 可选的增量技能注册表（智能技能匹配器的 skill_registry.get_registry()），
+                      缺省时直接扫描技能目录
+        """
         self.categorizer = SkillCategorizer()
+        self.registry = registry
     
     def analyze_skills(self, skill_paths: List[str]) -> Dict[str, List[SkillInfo]]:
         """
@@ -209,6 +233,14 @@ class SkillIntegrator:
         if not os.path.exists(directory):
             return skills
         
+        if self.registry is not None:
+            # 注册表缓存了未变化技能的解析结果；返回副本，分类结果不会写回缓存
+            for entry in self.registry.entries([directory]):
+                skill_info = entry.parse('category_module', self._parse_registry_entry)
+                if skill_info:
+                    skills.append(replace(skill_info))
+            return skills
+        
         for item in os.listdir(directory):
             item_path = os.path.join(directory, item)
             if os.path.isdir(item_path):
@@ -220,12 +252,27 @@ class SkillIntegrator:
         
         return skills
     
+    def _parse_registry_entry(self, entry) -> Optional[SkillInfo]:
+        """注册表条目的解析函数"""
+        if entry.header is None:
+            print(f"Error parsing {entry.path}: {entry.error}")
+            return None
+        return self._parse_skill_content(entry.header, entry.path)
+    
     def _parse_skill_md(self, file_path: str) -> Optional[SkillInfo]:
         """解析SKILL.md文件"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+        except Exception as e:
+            print(f"Error parsing {file_path}: {e}")
+            return None
+        
+        return self._parse_skill_content(content, file_path)
+    
+    def _parse_skill_content(self, content: str, file_path: str) -> Optional[SkillInfo]:
+        """解析SKILL.md内容"""
+        try:
             # 提取YAML frontmatter
             if content.startswith('---'):
                 end_marker = content.find('\n---', 3)
@@ -328,7 +375,7 @@ class SkillIntegrator:
 
 def main():
     """主函数 - 用于测试"""
-    integrator = SkillIntegrator()
+    integrator = SkillIntegrator(default_registry())
     
     # 技能目录路径
     skill_directories = [
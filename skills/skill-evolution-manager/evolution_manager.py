@@ -11,10 +11,10 @@
 5. 优先级管理（当前任务 > 进化任务）
 """
 
+import copy
 import os
+import sys
 import json
-import yaml
-import hashlib
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
@@ -24,10 +24,32 @@ from pathlib import Path
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 智能技能匹配器的脚本目录（增量技能注册表 skill_registry 所在位置）
+MATCHER_SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "intelligent-skill-matcher" / "scripts"
+
+def default_registry():
+    """
+    命令行入口使用的技能注册表：与智能技能匹配器共用进程内的 skill_registry.get_registry()，
+    同一进程内技能目录只扫描一次；未安装技能匹配器时返回None（直接扫描技能目录）
+    """
+    if MATCHER_SCRIPTS_DIR.is_dir() and str(MATCHER_SCRIPTS_DIR) not in sys.path:
+        sys.path.append(str(MATCHER_SCRIPTS_DIR))
+    try:
+        from skill_registry import get_registry
+    except ImportError:
+        return None
+    return get_registry()
+
 class SkillEvolutionManager:
     """技能进化管理器主类"""
     
-    def __init__(self):
+    def __init__(self, registry=None):
+        """
+        Args:
+            registry: 可选的增量技能注册表（智能技能匹配器的 skill_registry.get_registry()），
+                      与匹配器在同一进程时传入，未变化的技能不再重新扫描和解析；缺省时直接扫描技能目录
+        """
+        self.registry = registry
         self.skill_directories = [
             "~/.npm-global/lib/node_modules/openclaw/skills/",
             "~/.openclaw/workspace/skills/",
@@ -50,6 +72,26 @@ class SkillEvolutionManager:
         """发现所有已安装的技能"""
         skills = {}
         
+        for skill_path, skill_info in self._iter_skill_infos():
+            if skill_info:
+                skills[skill_info['name']] = {
+                    'path': skill_path,
+                    'info': skill_info,
+                    'category': self.categorize_skill(skill_info['name'], skill_info.get('description', ''))
+                }
+        
+        return skills
+    
+    def _iter_skill_infos(self):
+        """遍历技能目录，逐个返回 (技能目录路径, SKILL.md解析结果)"""
+        if self.registry is not None:
+            # 注册表缓存了未变化技能的解析结果，只重新解析新增或修改的SKILL.md；
+            # 返回副本，调用方修改技能信息不会写回缓存
+            for entry in self.registry.entries(self.skill_directories):
+                skill_info = entry.parse('evolution_manager', self._parse_registry_entry)
+                yield entry.skill_path, copy.deepcopy(skill_info)
+            return
+        
         for skill_dir in self.skill_directories:
             expanded_dir = os.path.expanduser(skill_dir)
             if os.path.exists(expanded_dir):
@@ -58,22 +100,32 @@ class SkillEvolutionManager:
                     if os.path.isdir(skill_path):
                         skill_md_path = os.path.join(skill_path, "SKILL.md")
                         if os.path.exists(skill_md_path):
-                            skill_info = self.parse_skill_md(skill_md_path)
-                            if skill_info:
-                                skills[skill_info['name']] = {
-                                    'path': skill_path,
-                                    'info': skill_info,
-                                    'category': self.categorize_skill(skill_info['name'], skill_info.get('description', ''))
-                                }
-        
-        return skills
+                            yield skill_path, self.parse_skill_md(skill_md_path)
+    
+    def _parse_registry_entry(self, entry) -> Optional[Dict]:
+        """注册表条目的解析函数"""
+        if entry.header is None:
+            logger.error(f"解析技能文件失败 {entry.path}: {entry.error}")
+            return None
+        return self.parse_skill_content(entry.header, entry.path)
     
     def parse_skill_md(self, skill_md_path: str) -> Optional[Dict]:
         """解析SKILL.md文件"""
         try:
             with open(skill_md_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-            
+        except Exception as e:
+            logger.error(f"解析技能文件失败 {skill_md_path}: {e}")
+            return None
+        
+        return self.parse_skill_content(content, skill_md_path)
+    
+    def parse_skill_content(self, content: str, skill_md_path: str) -> Optional[Dict]:
+        """解析SKILL.md内容"""
+        # yaml导入较慢（数十毫秒），只在真正解析frontmatter时导入
+        import yaml
+
+        try:
             # 提取YAML frontmatter
             if content.startswith('---'):
                 parts = content.split('---', 2)
@@ -159,6 +211,8 @@ class SkillEvolutionManager:
     
     def calculate_directory_hash(self, directory: str) -> str:
         """计算目录的哈希值"""
+        import hashlib
+
         hash_md5 = hashlib.md5()
         for root, dirs, files in os.walk(directory):
             for file in sorted(files):
@@ -378,7 +432,7 @@ class SkillEvolutionManager:
 
 def main():
     """主函数"""
-    manager = SkillEvolutionManager()
+    manager = SkillEvolutionManager(default_registry())
     
     # 运行一次进化周期
     manager.run_evolution_cycle()